@@ -6,6 +6,7 @@ from django.utils.safestring import mark_safe
 
 from applications.models import (
     AhjoDecisionText,
+    AhjoOutboxEntry,
     AhjoSetting,
     AhjoStatus,
     Application,
@@ -17,6 +18,7 @@ from applications.models import (
     DecisionProposalTemplateSection,
     DeMinimisAid,
     Employee,
+    ExportJob,
 )
 from calculator.admin import CalculationInline
 
@@ -221,6 +223,34 @@ class ApplicationLogEntryAdmin(admin.ModelAdmin):
     search_fields = ["application__id"]
 
 
+class AhjoOutboxEntryAdmin(admin.ModelAdmin):
+    list_display = [
+        "application",
+        "request_type",
+        "state",
+        "attempts",
+        "next_attempt_at",
+        "modified_at",
+    ]
+    list_filter = ["state", "request_type"]
+    readonly_fields = ["application", "ahjo_status", "created_at", "modified_at"]
+    search_fields = ["application__id"]
+
+
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "file_name",
+        "export_type",
+        "state",
+        "created_by",
+        "created_at",
+        "completed_at",
+    ]
+    list_filter = ["state", "export_type"]
+    exclude = ["applications"]
+    readonly_fields = ["created_by", "created_at", "modified_at"]
+
+
 class EmployeeAdmin(admin.ModelAdmin):
     exclude = ("encrypted_social_security_number", "social_security_number")
     list_display = [
@@ -246,3 +276,5 @@ admin.site.register(
     DecisionProposalTemplateSection, DecisionProposalTemplateSectionAdmin
 )
 admin.site.register(AhjoDecisionText, AhjoDecisionTextAdmin)
+admin.site.register(AhjoOutboxEntry, AhjoOutboxEntryAdmin)
+admin.site.register(ExportJob, ExportJobAdmin)
@@ -1,6 +1,6 @@
 from django.db import transaction
 from django.forms import ValidationError
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.text import format_lazy
@@ -143,7 +143,8 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
             _("Application batch {date}"),
             date=timezone.now().strftime("%d-%m-%Y %H.%M.%S"),
         )
-        response = HttpResponse(zip_file, content_type="application/x-zip-compressed")
+        # FileResponse streams the temporary file and closes it when done
+        response = FileResponse(zip_file, content_type="application/x-zip-compressed")
         response["Content-Disposition"] = "attachment; filename={file_name}.zip".format(
             file_name=file_name
         )
@@ -1,7 +1,7 @@
 import logging
 import re
 from datetime import date
-from typing import List
+from typing import BinaryIO, List
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
@@ -16,7 +16,7 @@ from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
 from django_filters import DateFromToRangeFilter, rest_framework as filters
 from django_filters.widgets import CSVWidget
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import filters as drf_filters, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
@@ -27,6 +27,11 @@ from rest_framework.views import APIView
 from simple_history.utils import update_change_reason
 from sql_util.aggregates import SubqueryCount
 
+from applications.api.v1.pagination import (
+    BucketOrderedMatches,
+    CursorPage,
+    InvalidCursorPage,
+)
 from applications.api.v1.serializers.application import (
     ApplicantApplicationSerializer,
     HandlerApplicationSerializer,
@@ -36,11 +41,13 @@ from applications.api.v1.serializers.application_alteration import (
     HandlerApplicationAlterationSerializer,
 )
 from applications.api.v1.serializers.attachment import AttachmentSerializer
+from applications.api.v1.serializers.export_job import ExportJobSerializer
 from applications.enums import (
     ApplicationAlterationState,
     ApplicationBatchStatus,
     ApplicationOrigin,
     ApplicationStatus,
+    ExportJobType,
 )
 from applications.models import (
     AhjoSetting,
@@ -59,6 +66,7 @@ from applications.services.application_alteration_csv_report import (
     ApplicationAlterationCsvService,
 )
 from applications.services.applications_csv_report import ApplicationsCsvService
+from applications.services.export_jobs import create_export_job
 from applications.services.generate_application_summary import (
     generate_application_summary_file,
     get_context_for_summary_context,
@@ -72,6 +80,47 @@ from users.utils import get_company_from_request
 
 log = logging.getLogger(__name__)
 
+EXPORT_ASYNC_PARAMETER = OpenApiParameter(
+    name="async",
+    type=bool,
+    description=(
+        "Produce the file in the background instead of returning it in the response."
+        " The response is an export job, whose download URL is available from"
+        " /v1/exportjobs/ when the job is done."
+    ),
+)
+
+SIMPLIFIED_LIST_PAGE_PARAMETERS = [
+    OpenApiParameter(
+        name="limit",
+        type=int,
+        description=(
+            "The maximum number of applications in a page, by default and at most"
+            " 500. The response is an object with the count, the cursor of the next"
+            " page and the results."
+        ),
+    ),
+    OpenApiParameter(
+        name="cursor",
+        type=str,
+        description="The cursor of the page, given as next in the previous page.",
+    ),
+]
+
+# The maximum number of applications in one page of the simplified list
+SIMPLIFIED_LIST_PAGE_LIMIT = 500
+
+EMPLOYEE_NAME_ORDERING = "employee_name"
+
+INCLUDE_PARAMETER = OpenApiParameter(
+    name="include",
+    type=str,
+    description=(
+        "Comma-separated list of the fields that are left out unless requested:"
+        " changes"
+    ),
+)
+
 
 class BaseApplicationFilter(filters.FilterSet):
     status = filters.MultipleChoiceFilter(
@@ -188,6 +237,22 @@ class HandlerApplicationAlterationFilter(filters.FilterSet):
     )
 
 
+def _order_by_employee_name(qs: QuerySet, descending: bool) -> BucketOrderedMatches:
+    """
+    Order the applications by the last name and the first name of the employee. The
+    names are encrypted, so the database orders the applications by the name sort bucket
+    of the employee, and only the names of the buckets on the requested slice are
+    decrypted and sorted in memory.
+    """
+    return BucketOrderedMatches(
+        qs,
+        "employee__name_sort_bucket",
+        ("employee__encrypted_last_name", "employee__encrypted_first_name"),
+        key=lambda name: ((name[1] or "").lower(), (name[2] or "").lower(), name[0]),
+        descending=descending,
+    )
+
+
 class BaseApplicationViewSet(AuditLoggingModelViewSet):
     filter_backends = [
         drf_filters.OrderingFilter,
@@ -220,7 +285,10 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
         "de_minimis_aid_set",
     ]
 
+    @transaction.atomic
     def perform_update(self, serializer):
+        # The change reason is written in the same transaction as the changes, so the
+        # stored change history includes it
         super().perform_update(serializer)
 
         # In case new AuditLogEntry objects were created during the
@@ -235,6 +303,7 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
                 serializer.instance, str(self.request.data.get("change_reason"))
             )
 
+    @extend_schema(parameters=SIMPLIFIED_LIST_PAGE_PARAMETERS)
     @action(methods=["get"], detail=False, url_path="simplified_list")
     def simplified_application_list(self, request):
         """
@@ -243,20 +312,7 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
         """
         context = self.get_serializer_context()
         qs = self._get_simplified_queryset(request, context)
-        serializer = self.serializer_class(qs, many=True, context=context)
-        data = serializer.data
-
-        # Sorting by encrypted fields has to be done after the data has been retrieved and decrypted
-        if request.query_params.get("order_by") in ["employee_name"]:
-            data = sorted(
-                data,
-                key=lambda item: (
-                    item["employee"]["last_name"].lower(),
-                    item["employee"]["first_name"].lower(),
-                ),
-            )
-
-        return Response(data, status=status.HTTP_200_OK)
+        return self._get_simplified_list_response(request, qs, context)
 
     @action(
         methods=("POST",),
@@ -322,6 +378,41 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
 
         return qs
 
+    def _get_simplified_list_response(self, request, qs, context) -> Response:
+        """
+        Serialize the simplified list in pages. The first page is returned if no cursor
+        is given.
+        """
+        order_by = request.query_params.get("order_by", "")
+        if re.sub(r"^-", "", order_by) == EMPLOYEE_NAME_ORDERING:
+            applications = _order_by_employee_name(qs, order_by.startswith("-"))
+        else:
+            # The primary key keeps the order of the pages stable on equal values
+            ordering = qs.query.order_by or qs.model._meta.ordering
+            applications = qs.order_by(*ordering, "pk")
+
+        try:
+            page = CursorPage.from_query_params(
+                request.query_params, max_limit=SIMPLIFIED_LIST_PAGE_LIMIT
+            )
+        except InvalidCursorPage as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        count = applications.count()
+        serializer = self.serializer_class(
+            applications[page.offset : page.offset + page.limit],
+            many=True,
+            context=context,
+        )
+        return Response(
+            {
+                "count": count,
+                "next": page.get_next_cursor(count),
+                "results": serializer.data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
     def _get_attachment(self, attachment_pk):
         try:
             return self.get_object().attachments.get(id=attachment_pk)
@@ -593,7 +684,8 @@ class ApplicantApplicationViewSet(BaseApplicationViewSet):
     description=(
         "API for create/read/update/delete operations on Helsinki benefit applications"
         " for application handlers"
-    )
+    ),
+    parameters=[INCLUDE_PARAMETER],
 )
 class HandlerApplicationViewSet(BaseApplicationViewSet):
     serializer_class = HandlerApplicationSerializer
@@ -635,14 +727,26 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             )
         ).order_by("-handled_at", "-calculation__modified_at")
 
+    # Fields that are computed only when requested with the include query parameter
+    OPT_IN_FIELDS = ["changes"]
+
     def get_serializer_context(self):
         context = super().get_serializer_context()
         if fields := self.request.query_params.get("fields", None):
             context.update({"fields": fields.split(",")})
         if exclude_fields := self.request.query_params.get("exclude_fields", None):
             context.update({"exclude_fields": exclude_fields.split(",")})
+        include = self.request.query_params.get("include", "").split(",")
+        if excluded_opt_in_fields := [
+            field for field in self.OPT_IN_FIELDS if field not in include
+        ]:
+            context["exclude_fields"] = [
+                *context.get("exclude_fields", []),
+                *excluded_opt_in_fields,
+            ]
         return context
 
+    @extend_schema(parameters=SIMPLIFIED_LIST_PAGE_PARAMETERS)
     @action(methods=["get"], detail=False, url_path="simplified_list")
     def simplified_application_list(self, request):
         context = self.get_serializer_context()
@@ -651,52 +755,66 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             status=ApplicationStatus.DRAFT,
             application_origin=ApplicationOrigin.APPLICANT,
         )
-        serializer = self.serializer_class(qs, many=True, context=context)
-
-        return Response(
-            serializer.data,
-            status=status.HTTP_200_OK,
-        )
+        return self._get_simplified_list_response(request, qs, context)
 
+    @extend_schema(parameters=[EXPORT_ASYNC_PARAMETER])
     @action(methods=["GET"], detail=False)
     def export_csv(self, request) -> StreamingHttpResponse:
         queryset = self.get_queryset()
         filtered_queryset = self.filter_queryset(queryset)
+        if self._is_async_export():
+            return self._export_job_response(
+                ExportJobType.APPLICATIONS_CSV, filtered_queryset
+            )
         return self._csv_response(filtered_queryset)
 
     APPLICATION_ORDERING = "application_number"
 
+    @extend_schema(parameters=[EXPORT_ASYNC_PARAMETER])
     @action(methods=["GET"], detail=False)
     @transaction.atomic
     def batch_pdf_files(self, request) -> HttpResponse:
         batch_id = request.query_params.get("batch_id")
         if batch_id:
             apps = Application.objects.filter(batch_id=batch_id)
+            if self._is_async_export():
+                return self._export_job_response(
+                    ExportJobType.APPLICATIONS_CSV_PDF, apps
+                )
             return self._csv_pdf_response(apps)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(parameters=[EXPORT_ASYNC_PARAMETER])
     @action(methods=["GET"], detail=False)
     @transaction.atomic
     def batch_p2p_file(self, request) -> HttpResponse:
         batch_id = request.query_params.get("batch_id")
         if batch_id:
             apps = Application.objects.filter(batch_id=batch_id)
+            if self._is_async_export():
+                return self._export_job_response(ExportJobType.TALPA_CSV, apps)
             return self._csv_response(apps, True, True)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(parameters=[EXPORT_ASYNC_PARAMETER])
     @action(methods=["GET"], detail=False)
     @transaction.atomic
     def export_new_accepted_applications_csv_pdf(self, request) -> HttpResponse:
-        return self._csv_pdf_response(
-            self._create_application_batch(ApplicationStatus.ACCEPTED), True, True
-        )
-
+        # The batch is created right away also for asynchronous exports, so the same
+        # applications are not exported twice
+        apps = self._create_application_batch(ApplicationStatus.ACCEPTED)
+        if self._is_async_export():
+            return self._export_job_response(ExportJobType.TALPA_CSV_PDF, apps)
+        return self._csv_pdf_response(apps, True, True)
+
+    @extend_schema(parameters=[EXPORT_ASYNC_PARAMETER])
     @action(methods=["GET"], detail=False)
     @transaction.atomic
     def export_new_rejected_applications_csv_pdf(self, request) -> HttpResponse:
-        return self._csv_pdf_response(
-            self._create_application_batch(ApplicationStatus.REJECTED)
-        )
+        apps = self._create_application_batch(ApplicationStatus.REJECTED)
+        if self._is_async_export():
+            return self._export_job_response(ExportJobType.APPLICATIONS_CSV_PDF, apps)
+        return self._csv_pdf_response(apps)
 
     @action(methods=["PATCH"], detail=True, url_path="change-handler")
     @transaction.atomic
@@ -723,7 +841,8 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             batch = ApplicationBatch.objects.create(
                 proposal_for_decision=status_map[status]
             )
-            queryset.update(batch=batch)
+            # the default ordering refers to annotations, which update() does not support
+            queryset.order_by().update(batch=batch)
         return self.get_queryset().filter(pk__in=application_ids)
 
     @staticmethod
@@ -733,6 +852,24 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             date=timezone.now().strftime("%Y%m%d_%H%M%S"),
         )
 
+    def _is_async_export(self) -> bool:
+        return self.request.query_params.get("async", "").lower() in ("1", "true")
+
+    def _export_job_response(
+        self, export_type: ExportJobType, queryset: QuerySet[Application]
+    ) -> Response:
+        """Queue the export to be produced by the process_export_jobs command."""
+        job = create_export_job(
+            export_type,
+            queryset,
+            self.request.user,
+            self._export_filename_without_suffix(),
+        )
+        return Response(
+            ExportJobSerializer(job, context={"request": self.request}).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
     def _csv_response(
         self,
         queryset: QuerySet[Application],
@@ -764,7 +901,7 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
         queryset: QuerySet[Application],
         prune_data_for_talpa: bool = False,
         remove_quotes: bool = False,
-    ) -> HttpResponse:
+    ) -> FileResponse:
         ordered_queryset = queryset.order_by(self.APPLICATION_ORDERING)
         export_filename_without_suffix = self._export_filename_without_suffix()
 
@@ -774,10 +911,11 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
 
         pdf_files: List[ExportFileInfo] = prepare_pdf_files(ordered_queryset)
 
-        zip_file: bytes = generate_zip([csv_file] + pdf_files)
+        zip_file: BinaryIO = generate_zip([csv_file] + pdf_files)
         zip_filename = f"{export_filename_without_suffix}.zip"
 
-        response: HttpResponse = HttpResponse(
+        # FileResponse streams the temporary file and closes it when done
+        response: FileResponse = FileResponse(
             zip_file, content_type="application/x-zip-compressed"
         )
         response["Content-Disposition"] = f"attachment; filename={zip_filename}"
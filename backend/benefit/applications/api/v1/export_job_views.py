@@ -0,0 +1,51 @@
+import os
+
+from django.http import FileResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from applications.api.v1.serializers.export_job import ExportJobSerializer
+from applications.enums import ExportJobState
+from applications.models import ExportJob
+from common.permissions import BFIsHandler
+from shared.audit_log import audit_logging
+from shared.audit_log.enums import Operation
+from shared.audit_log.viewsets import AuditLoggingModelViewSet
+
+
+@extend_schema(
+    description=(
+        "API for following the exports that are produced in the background. The jobs are"
+        " created by the export endpoints of the handler applications API when they are"
+        " called with async=true."
+    )
+)
+class ExportJobViewSet(AuditLoggingModelViewSet):
+    serializer_class = ExportJobSerializer
+    permission_classes = [BFIsHandler]
+    http_method_names = ["get"]
+
+    def get_queryset(self):
+        # handlers only see the exports they have started themselves
+        return ExportJob.objects.filter(created_by=self.request.user)
+
+    @action(methods=["GET"], detail=True)
+    def download(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.state != ExportJobState.DONE or not job.file:
+            return Response(
+                self.get_serializer(job).data, status=status.HTTP_409_CONFLICT
+            )
+        audit_logging.log(
+            request.user,
+            "",
+            Operation.READ,
+            job,
+        )
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=os.path.basename(job.file.name),
+        )
@@ -0,0 +1,146 @@
+import base64
+import binascii
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from django.db.models import Count, Q
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidCursorPage(Exception):
+    pass
+
+
+@dataclass
+class CursorPage:
+    """
+    The slice of the results returned in one response. The cursor of the next page is
+    the opaque encoding of its offset.
+    """
+
+    offset: int
+    limit: int
+
+    @classmethod
+    def from_query_params(cls, query_params, max_limit: int) -> "CursorPage":
+        try:
+            limit = int(query_params.get("limit", max_limit))
+        except ValueError:
+            raise InvalidCursorPage(_("Invalid limit"))
+        if limit < 1:
+            raise InvalidCursorPage(_("Invalid limit"))
+        return cls(
+            offset=_decode_cursor(query_params.get("cursor")),
+            limit=min(limit, max_limit),
+        )
+
+    def get_next_cursor(self, count: int) -> Optional[str]:
+        next_offset = self.offset + self.limit
+        return _encode_cursor(next_offset) if next_offset < count else None
+
+
+class OrderedMatches:
+    """
+    The objects of the queryset with the given primary keys, in the order of the keys.
+    Only the objects of a slice are fetched from the database.
+    """
+
+    def __init__(self, queryset, pks):
+        self.queryset = queryset
+        self.pks = pks
+
+    def count(self) -> int:
+        return len(self.pks)
+
+    def __getitem__(self, page_slice: slice) -> list:
+        pks = self.pks[page_slice]
+        if not pks:
+            return []
+        objects = {obj.pk: obj for obj in self.queryset.filter(pk__in=pks)}
+        return [objects[pk] for pk in pks]
+
+
+class BucketOrderedMatches:
+    """
+    The objects of the queryset in the order of a key that the database cannot sort, such
+    as an encrypted value. The objects are grouped in buckets whose order is consistent
+    with the order of the keys, so the database counts the objects of each bucket, and
+    only the values of the buckets on a slice are fetched and sorted in memory. The
+    objects without a bucket are in the first bucket, 0.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        bucket_field: str,
+        value_fields: Sequence[str],
+        key: Callable[[tuple], tuple],
+        descending: bool = False,
+    ):
+        self.queryset = queryset
+        self.bucket_field = bucket_field
+        self.value_fields = value_fields
+        self.key = key
+        self.descending = descending
+        self._bucket_counts: Optional[List[Tuple[int, int]]] = None
+
+    def _get_bucket_counts(self) -> List[Tuple[int, int]]:
+        if self._bucket_counts is None:
+            counts = defaultdict(int)
+            for bucket, count in (
+                self.queryset.order_by()
+                .values_list(self.bucket_field)
+                .annotate(count=Count("pk"))
+            ):
+                counts[bucket or 0] += count
+            self._bucket_counts = sorted(counts.items(), reverse=self.descending)
+        return self._bucket_counts
+
+    def count(self) -> int:
+        return sum(count for _, count in self._get_bucket_counts())
+
+    def __getitem__(self, page_slice: slice) -> list:
+        start = page_slice.start or 0
+        stop = self.count() if page_slice.stop is None else page_slice.stop
+        buckets = []
+        buckets_start = position = 0
+        for bucket, count in self._get_bucket_counts():
+            if position + count <= start:
+                buckets_start = position + count
+            elif position < stop:
+                buckets.append(bucket)
+            position += count
+        if not buckets:
+            return []
+
+        condition = Q(**{f"{self.bucket_field}__in": buckets})
+        if 0 in buckets:
+            condition |= Q(**{f"{self.bucket_field}__isnull": True})
+        values = sorted(
+            self.queryset.filter(condition)
+            .order_by()
+            .values_list("pk", *self.value_fields),
+            key=self.key,
+            reverse=self.descending,
+        )
+        return OrderedMatches(self.queryset, [value[0] for value in values])[
+            start - buckets_start : stop - buckets_start
+        ]
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o={offset}".encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        position = base64.urlsafe_b64decode(cursor.encode()).decode()
+        key, offset = position.split("=")
+        if key != "o" or not offset.isdigit():
+            raise ValueError
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursorPage(_("Invalid cursor"))
+    return int(offset)
@@ -1,8 +1,9 @@
 import re
 from datetime import datetime
-from typing import Union
+from typing import List, Optional, Union
 
 from dateutil.relativedelta import relativedelta
+from django.contrib.postgres.lookups import TrigramSimilar
 from django.contrib.postgres.search import (
     SearchQuery,
     SearchRank,
@@ -10,13 +11,14 @@ from django.contrib.postgres.search import (
     TrigramSimilarity,
 )
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Q
 from django.utils.translation import gettext_lazy as _
 from fuzzywuzzy import fuzz
 from rest_framework import filters as drf_filters, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from applications.api.v1.pagination import CursorPage, InvalidCursorPage, OrderedMatches
 from applications.api.v1.serializers.application import (
     ArchivalApplicationListSerializer,
     HandlerApplicationListSerializer,
@@ -36,6 +38,20 @@ class SearchPattern(models.TextChoices):
     ARCHIVAL = "archived_application", _("Archival application")
 
 
+# The decrypted employee name fields used for the in-memory name search
+APPLICATION_NAME_FIELDS = (
+    "employee__encrypted_first_name",
+    "employee__encrypted_last_name",
+)
+ARCHIVAL_APPLICATION_NAME_FIELDS = (
+    "encrypted_employee_first_name",
+    "encrypted_employee_last_name",
+)
+
+# The maximum number of matches returned in one page
+SEARCH_RESULT_LIMIT = 500
+
+
 class SubsidyInEffect(models.TextChoices):
     NOW = "now", _("Now")
 
@@ -57,6 +73,14 @@ class SearchView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # The matches are always paginated, the first page is returned without a cursor
+        try:
+            page = CursorPage.from_query_params(
+                request.query_params, max_limit=SEARCH_RESULT_LIMIT
+            )
+        except InvalidCursorPage as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         archived = request.query_params.get("archived") == "1" or False
         search_from_archival = request.query_params.get("archival") == "1" or False
 
@@ -99,6 +123,7 @@ class SearchView(APIView):
             in_memory_filter_str,
             detected_pattern,
             search_from_archival,
+            page,
         )
 
 
@@ -161,10 +186,11 @@ def search_applications(
     in_memory_filter_str,
     detected_pattern,
     search_from_archival=False,
+    page: Optional[CursorPage] = None,
 ) -> Response:
     if search_string == "" and in_memory_filter_str == "":
         return _query_and_respond_to_empty_search(
-            application_queryset, archival_application_queryset
+            application_queryset, archival_application_queryset, page
         )
 
     # Return early in case of number-like pattern
@@ -174,14 +200,15 @@ def search_applications(
             archival_application_queryset,
             search_string,
             detected_pattern,
+            page,
         )
     elif detected_pattern == SearchPattern.SSN:
         return _query_and_respond_to_ssn(
-            application_queryset, search_string, detected_pattern
+            application_queryset, search_string, detected_pattern, page
         )
     elif detected_pattern == SearchPattern.ARCHIVAL:
         return _query_and_respond_to_archival_application(
-            archival_application_queryset, search_string, detected_pattern
+            archival_application_queryset, search_string, detected_pattern, page
         )
 
     # Perform trigram query for company name
@@ -192,9 +219,6 @@ def search_applications(
         applications = results_for_related_company["applications"]
         archival_applications = results_for_related_company["archival"]
 
-    applications = HandlerApplicationListSerializer(applications, many=True).data
-
-    filtered_data = []
     in_memory_results = None
 
     # Use filter string to perform in-memory search
@@ -208,34 +232,29 @@ def search_applications(
             application_queryset,
             search_string,
             in_memory_filter_str,
-            HandlerApplicationListSerializer,
+            APPLICATION_NAME_FIELDS,
         )
-        filtered_data = in_memory_results["data"]
-
-        archival_data = ArchivalApplicationListSerializer(
-            archival_applications, many=True
-        ).data
         in_memory_results_archival = _perform_in_memory_search(
-            archival_data,
+            archival_applications,
             detected_pattern,
             archival_application_queryset,
             search_string,
             in_memory_filter_str,
-            ArchivalApplicationListSerializer,
+            ARCHIVAL_APPLICATION_NAME_FIELDS,
         )
-        filtered_data += in_memory_results_archival["data"]
-
+        results = [
+            (in_memory_results["matches"], HandlerApplicationListSerializer),
+            (in_memory_results_archival["matches"], ArchivalApplicationListSerializer),
+        ]
         detected_pattern = in_memory_results["detected_pattern"]
     else:
-        filtered_data = applications
+        results = [(applications, HandlerApplicationListSerializer)]
         if search_from_archival:
-            filtered_data += ArchivalApplicationListSerializer(
-                archival_applications, many=True
-            ).data
+            results.append((archival_applications, ArchivalApplicationListSerializer))
 
     return _create_search_response(
-        None,
-        filtered_data,
+        results,
+        page,
         detected_pattern,
         search_string,
         in_memory_results,
@@ -243,68 +262,89 @@ def search_applications(
     )
 
 
-def _fuzzy_matching(applications, query, threshold):
-    """Advanced fuzzy matching for all possible combinations of first/lastname orders"""
+def _get_employee_names(queryset, name_fields):
+    """
+    Return the primary keys and the employee names of the applications, in the order
+    of the queryset. Only the names are decrypted, the applications are not serialized.
+    """
+    return [
+        (pk, first_name or "", last_name or "")
+        for pk, first_name, last_name in queryset.values_list("pk", *name_fields)
+    ]
+
+
+def _get_fuzzy_scores(names, query):
+    """Score all possible combinations of first/lastname orders against the query"""
+    return [
+        max(
+            fuzz.ratio(str(query), value)
+            for value in _get_filter_combinations(first_name, last_name)
+        )
+        for _, first_name, last_name in names
+    ]
 
-    scores = []
-    for index, app in enumerate(applications):
-        ratios = [
-            fuzz.ratio(str(query), str(value))
-            for value in _get_filter_combinations(app)
-        ]
-        scores.append({"index": index, "score": max(ratios)})
 
-    filtered_scores = [item for item in scores if item["score"] >= threshold]
+def _fuzzy_matching(names, scores, threshold):
+    """Advanced fuzzy matching for all possible combinations of first/lastname orders"""
+    filtered_scores = [
+        {"index": index, "score": score}
+        for index, score in enumerate(scores)
+        if score >= threshold
+    ]
     sorted_filtered_scores = sorted(
         filtered_scores, key=lambda k: k["score"], reverse=True
     )
 
-    filtered_list_of_dicts = [
-        applications[item["index"]] for item in sorted_filtered_scores
-    ]
-    return {"data": filtered_list_of_dicts, "scores": sorted_filtered_scores}
+    return {
+        "pks": [names[item["index"]][0] for item in sorted_filtered_scores],
+        "scores": sorted_filtered_scores,
+    }
 
 
 def _contains_matching(
-    applications,
+    names,
     query,
 ):
     """Simple substring matching for all possible combinations of first/lastname orders,
     used as fallback for fuzzy matching"""
     results = []
-    for app in applications:
-        for value in _get_filter_combinations(app):
-            if query in value.lower():
-                results.append(app)
+    for pk, first_name, last_name in names:
+        for value in _get_filter_combinations(first_name, last_name):
+            if query in value:
+                results.append(pk)
                 break
-    return {"data": results, "scores": None}
+    return {"pks": results, "scores": None}
 
 
-def _get_filter_combinations(app):
+def _get_filter_combinations(first_name, last_name):
     """Return all possible combinations of first/lastname orders for matching"""
     return [
-        (app["employee"]["first_name"] + " " + app["employee"]["last_name"]).lower(),
-        (app["employee"]["last_name"] + " " + app["employee"]["first_name"]).lower(),
-        app["employee"]["first_name"].lower(),
-        app["employee"]["last_name"].lower(),
+        (first_name + " " + last_name).lower(),
+        (last_name + " " + first_name).lower(),
+        first_name.lower(),
+        last_name.lower(),
     ]
 
 
 def _query_and_respond_to_empty_search(
-    application_queryset, archival_application_queryset
+    application_queryset, archival_application_queryset, page
 ):
-    data = []
-    data += HandlerApplicationListSerializer(application_queryset, many=True).data
-    data += ArchivalApplicationListSerializer(
-        archival_application_queryset, many=True
-    ).data
-    return _create_search_response(None, data, SearchPattern.ALL, "")
+    return _create_search_response(
+        [
+            (application_queryset, HandlerApplicationListSerializer),
+            (archival_application_queryset, ArchivalApplicationListSerializer),
+        ],
+        page,
+        SearchPattern.ALL,
+        "",
+    )
 
 
 def _query_and_respond_to_ssn(
     application_queryset,
     search_query_str,
     detected_pattern,
+    page,
 ):
     """
     Because of limitation in django-searchable-encrypted-fields,
@@ -318,25 +358,24 @@ def _query_and_respond_to_ssn(
             employee__social_security_number=search_query_str.upper()
         )
     return _create_search_response(
-        application_queryset,
-        None,
+        [(application_queryset, HandlerApplicationListSerializer)],
+        page,
         detected_pattern,
         search_query_str,
     )
 
 
 def _query_and_respond_to_archival_application(
-    archival_application_queryset, search_query_str, detected_pattern
+    archival_application_queryset, search_query_str, detected_pattern, page
 ):
     archival_application_queryset = archival_application_queryset.filter(
         Q(application_number__icontains=search_query_str)
     )
     return _create_search_response(
-        queryset=archival_application_queryset,
-        serialized_data=None,
+        results=[(archival_application_queryset, ArchivalApplicationListSerializer)],
+        page=page,
         detected_pattern=detected_pattern,
         search_query_str=search_query_str,
-        serializer=ArchivalApplicationListSerializer,
     )
 
 
@@ -345,6 +384,7 @@ def _query_and_respond_to_numbers(
     archival_application_queryset,
     search_query_str,
     detected_pattern,
+    page,
 ):
     """
     Perform simple LIKE query for application number, AHJO case ID and company business ID
@@ -354,32 +394,65 @@ def _query_and_respond_to_numbers(
         | Q(ahjo_case_id__icontains=search_query_str)
         | Q(application_number__icontains=search_query_str)
     )
-    data = HandlerApplicationListSerializer(applications, many=True).data
-
     archival_applications = archival_application_queryset.filter(
         company__business_id__icontains=search_query_str
     )
-    data += ArchivalApplicationListSerializer(archival_applications, many=True).data
 
     return _create_search_response(
-        queryset=None,
-        serialized_data=data,
+        results=[
+            (applications, HandlerApplicationListSerializer),
+            (archival_applications, ArchivalApplicationListSerializer),
+        ],
+        page=page,
         detected_pattern=detected_pattern,
         search_query_str=search_query_str,
     )
 
 
+def _get_page_slice(page: Optional[CursorPage]) -> slice:
+    return slice(page.offset, page.offset + page.limit) if page else slice(None)
+
+
+def _serialize_page(results, page: Optional[CursorPage]):
+    """
+    Count the matches of each result and serialize only the matches on the page, or all
+    the matches if no page is given. The results are paginated as if they were
+    concatenated in the given order.
+
+    :return: The serialized matches on the page and the total number of matches.
+    """
+    serialized_data: List[dict] = []
+    count = 0
+    page_slice = _get_page_slice(page)
+    for matches, serializer in results:
+        if isinstance(matches, models.QuerySet):
+            # The primary key keeps the order of the pages stable on equal values
+            ordering = matches.query.order_by or matches.model._meta.ordering
+            matches = matches.order_by(*ordering, "pk")
+        matches_count = matches.count()
+        start = max((page_slice.start or 0) - count, 0)
+        end = matches_count
+        if page_slice.stop is not None:
+            end = min(page_slice.stop - count, matches_count)
+        if start < end:
+            serialized_data += serializer(matches[start:end], many=True).data
+        count += matches_count
+    return serialized_data, count
+
+
 def _create_search_response(
-    queryset: Union[Application, None],
-    serialized_data: Union[list, None],
+    results: list,
+    page: Optional[CursorPage],
     detected_pattern: str,
     search_query_str: str,
     in_memory_results: Union[dict, None] = None,
     in_memory_filter_str="",
-    serializer=HandlerApplicationListSerializer,
 ):
-    if serialized_data is None:
-        serialized_data = serializer(queryset, many=True).data
+    serialized_data, count = _serialize_page(results, page)
+    # The scores are in the order of the in-memory matches, which are the first results
+    scores = None
+    if in_memory_results and in_memory_results["scores"] is not None:
+        scores = in_memory_results["scores"][_get_page_slice(page)]
 
     return Response(
         {
@@ -387,43 +460,56 @@ def _create_search_response(
             "matches": serialized_data,
             "filter": in_memory_filter_str,
             "detected_pattern": detected_pattern,
-            "count": len(serialized_data),
-            "score": in_memory_results["scores"] if in_memory_results else None,
+            "count": count,
+            "next": page.get_next_cursor(count) if page else None,
+            "score": scores,
         },
         status=status.HTTP_200_OK,
     )
 
 
 def _perform_in_memory_search(
-    data,
+    candidate_queryset,
     detected_pattern,
     queryset,
     search_string,
     in_memory_filter_str,
-    serializer,
+    name_fields,
 ):
-    """Perform more expensive in-memory search from within applications"""
+    """
+    Perform more expensive in-memory search from within applications. The names are
+    matched in memory, as they are encrypted in the database, so only the names are
+    fetched and the matching applications are returned in the order of the scores.
+    """
     if detected_pattern == SearchPattern.COMPANY:
         in_memory_filter_str = search_string
+    names = _get_employee_names(candidate_queryset, name_fields)
     # No previous search results, use all applications as haystack
-    if len(data) == 0 or search_string == "":
-        data = serializer(queryset, many=True).data
+    if len(names) == 0 or search_string == "":
+        matching_queryset = queryset
+        names = _get_employee_names(queryset, name_fields)
         detected_pattern = f"{SearchPattern.ALL} {SearchPattern.IN_MEMORY}"
     else:
+        matching_queryset = candidate_queryset
         detected_pattern = f"{SearchPattern.COMPANY} {SearchPattern.IN_MEMORY}"
 
     # Try fuzzy matching with high threshold. If zero matches, try lower score and finally try substring matching
-    in_memory_results = _fuzzy_matching(data, in_memory_filter_str, 80)
-    if not in_memory_results["data"]:
-        in_memory_results = _fuzzy_matching(data, in_memory_filter_str, 70)
-    if not in_memory_results["data"]:
+    scores = _get_fuzzy_scores(names, in_memory_filter_str)
+    in_memory_results = _fuzzy_matching(names, scores, 80)
+    if not in_memory_results["pks"]:
+        in_memory_results = _fuzzy_matching(names, scores, 70)
+    if not in_memory_results["pks"]:
         in_memory_results = _contains_matching(
-            data,
+            names,
             in_memory_filter_str,
         )
         detected_pattern += "-fallback"
 
-    return {**in_memory_results, **{"detected_pattern": detected_pattern}}
+    return {
+        "matches": OrderedMatches(matching_queryset, in_memory_results["pks"]),
+        "scores": in_memory_results["scores"],
+        "detected_pattern": detected_pattern,
+    }
 
 
 def _query_for_company_name(
@@ -431,6 +517,8 @@ def _query_for_company_name(
 ):
     search_vectors = SearchVector("company__name")
     query = SearchQuery(search_string, search_type="websearch")
+    # The TrigramSimilar lookup can use the trigram index of the company name,
+    # the similarity annotation alone would be computed for every application
 
     return {
         "applications": (
@@ -439,7 +527,9 @@ def _query_for_company_name(
                 similarity=TrigramSimilarity("company__name", search_string),
                 rank=SearchRank(search_vectors, query),
             )
-            .filter(similarity__gt=0.3)
+            .filter(
+                TrigramSimilar(F("company__name"), search_string), similarity__gt=0.3
+            )
             .order_by("-similarity", "-handled_at")
         ),
         "archival": (
@@ -448,7 +538,9 @@ def _query_for_company_name(
                 similarity=TrigramSimilarity("company__name", search_string),
                 rank=SearchRank(search_vectors, query),
             )
-            .filter(similarity__gt=0.3)
+            .filter(
+                TrigramSimilar(F("company__name"), search_string), similarity__gt=0.3
+            )
             .order_by("-similarity", "-handled_at")
         ),
     }
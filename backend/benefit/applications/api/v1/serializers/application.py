@@ -1,11 +1,12 @@
 from datetime import date, timedelta
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Set, Union
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.db import transaction
+from django.db.models import Manager, Max
 from django.utils import timezone
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
@@ -34,7 +35,10 @@ from applications.api.v1.status_transition_validator import (
     ApplicantApplicationStatusValidator,
     HandlerApplicationStatusValidator,
 )
-from applications.benefit_aggregation import get_former_benefit_info
+from applications.benefit_aggregation import (
+    FormerBenefitPeriodLookup,
+    get_former_benefit_info,
+)
 from applications.enums import (
     AhjoStatus as AhjoStatusEnum,
     ApplicationActions,
@@ -56,11 +60,9 @@ from applications.models import (
     ApplicationLogEntry,
     ArchivalApplication,
     Employee,
+    FormerBenefitPeriod,
 )
-from applications.services.change_history import (
-    get_application_change_history_made_by_applicant,
-    get_application_change_history_made_by_handler,
-)
+from applications.services.change_history import get_application_change_history
 from calculator.api.v1.serializers import (
     CalculationSearchSerializer,
     CalculationSerializer,
@@ -91,6 +93,78 @@ from terms.models import ApplicantTermsApproval, Terms
 from users.api.v1.serializers import UserSerializer
 from users.utils import get_company_from_request, get_request_user_from_context
 
+APPLICATION_LIST_PRELOADER_CONTEXT_KEY = "application_list_preloader"
+
+APPLICATION_TERMS_TYPES = {
+    ApplicationOrigin.APPLICANT: TermsType.APPLICANT_TERMS,
+    ApplicationOrigin.HANDLER: TermsType.HANDLER_TERMS,
+}
+
+
+class ApplicationListPreloader:
+    """
+    Resolve the values that the application serializer would otherwise query for each
+    application, with one query per value for the whole list of applications. Only the
+    values of the serialized fields are loaded.
+    """
+
+    def __init__(self, applications: List[Application], field_names: Set[str]):
+        self._application_pks = {application.pk for application in applications}
+        self.former_benefit_periods = None
+        self.applicant_terms_in_effect = None
+        self.latest_ahjo_statuses = None
+        self.status_last_changed_at = None
+
+        if {"warnings", "former_benefit_info"} & field_names:
+            self.former_benefit_periods = FormerBenefitPeriodLookup(applications)
+        if "applicant_terms_in_effect" in field_names:
+            self.applicant_terms_in_effect = {
+                terms.terms_type: terms
+                for terms in Terms.objects.filter(
+                    terms_type__in=APPLICATION_TERMS_TYPES.values(),
+                    effective_from__lte=date.today(),
+                )
+                .order_by("terms_type", "-effective_from")
+                .distinct("terms_type")
+                .prefetch_related("applicant_consents")
+            }
+        if {"ahjo_status", "ahjo_error", "calculated_benefit_amount"} & field_names:
+            self.latest_ahjo_statuses = {
+                ahjo_status.application_id: ahjo_status
+                for ahjo_status in AhjoStatus.objects.filter(
+                    application__in=self._application_pks
+                )
+                .order_by("application_id", "-created_at")
+                .distinct("application_id")
+            }
+        if "status_last_changed_at" in field_names:
+            self.status_last_changed_at = dict(
+                ApplicationLogEntry.objects.filter(
+                    application__in=self._application_pks
+                )
+                .order_by()
+                .values("application")
+                .annotate(status_last_changed_at=Max("created_at"))
+                .values_list("application", "status_last_changed_at")
+            )
+
+    def __contains__(self, application: Application) -> bool:
+        return application.pk in self._application_pks
+
+
+class ApplicationListSerializer(serializers.ListSerializer):
+    """
+    Preload the values of the listed applications that would otherwise be queried
+    for each application, see ApplicationListPreloader.
+    """
+
+    def to_representation(self, data):
+        applications = list(data.all() if isinstance(data, Manager) else data)
+        self.context[APPLICATION_LIST_PRELOADER_CONTEXT_KEY] = ApplicationListPreloader(
+            applications, set(self.child.fields)
+        )
+        return super().to_representation(applications)
+
 
 class BaseApplicationSerializer(DynamicFieldsModelSerializer):
     """
@@ -147,6 +221,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     class Meta:
         model = Application
+        list_serializer_class = ApplicationListSerializer
         fields = [
             "id",
             "status",
@@ -398,13 +473,11 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
     calculated_benefit_amount = serializers.SerializerMethodField()
 
     def get_calculated_benefit_amount(self, obj):
-        # Check if ahjo_status is None or does not have any related objects
-        if obj.ahjo_status is None or not obj.ahjo_status.exists():
-            return None
-
-        latest_status = obj.ahjo_status.latest().status
-
-        if latest_status != AhjoStatusEnum.DETAILS_RECEIVED_FROM_AHJO:
+        latest_status = self._get_latest_ahjo_status(obj)
+        if (
+            latest_status is None
+            or latest_status.status != AhjoStatusEnum.DETAILS_RECEIVED_FROM_AHJO
+        ):
             return None
         return obj.calculated_benefit_amount
 
@@ -498,14 +571,14 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     @extend_schema_field(TermsSerializer())
     def get_applicant_terms_in_effect(self, obj):
-        terms_map = {
-            ApplicationOrigin.APPLICANT: TermsType.APPLICANT_TERMS,
-            ApplicationOrigin.HANDLER: TermsType.HANDLER_TERMS,
-        }
-        terms_type = terms_map.get(
+        terms_type = APPLICATION_TERMS_TYPES.get(
             ApplicationOrigin(obj.application_origin), ApplicationOrigin.APPLICANT
         )
-        terms = Terms.objects.get_terms_in_effect(terms_type)
+        preloader = self._get_list_preloader(obj)
+        if preloader is not None and preloader.applicant_terms_in_effect is not None:
+            terms = preloader.applicant_terms_in_effect.get(terms_type)
+        else:
+            terms = Terms.objects.get_terms_in_effect(terms_type)
         if terms:
             # If given the request in context, DRF will output the URL for FileFields
             context = {"request": self.context.get("request")}
@@ -513,6 +586,36 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
         else:
             return None
 
+    def _get_list_preloader(self, obj) -> Optional[ApplicationListPreloader]:
+        """
+        Return the preloader of the list of applications being serialized, if the
+        application is in the list.
+        """
+        preloader = self.context.get(APPLICATION_LIST_PRELOADER_CONTEXT_KEY)
+        if preloader is not None and obj in preloader:
+            return preloader
+        return None
+
+    def _get_latest_ahjo_status(self, obj) -> Optional[AhjoStatus]:
+        preloader = self._get_list_preloader(obj)
+        if preloader is not None and preloader.latest_ahjo_statuses is not None:
+            return preloader.latest_ahjo_statuses.get(obj.pk)
+        try:
+            return obj.ahjo_status.latest()
+        except AhjoStatus.DoesNotExist:
+            return None
+
+    def _get_former_benefit_periods(self, obj) -> List[FormerBenefitPeriod]:
+        """
+        Return the former benefit periods of the employee from the lookup made for the
+        whole list of applications, or look them up for this application only.
+        """
+        preloader = self._get_list_preloader(obj)
+        if preloader is None or preloader.former_benefit_periods is None:
+            preloader = ApplicationListPreloader([obj], {"former_benefit_info"})
+            self.context[APPLICATION_LIST_PRELOADER_CONTEXT_KEY] = preloader
+        return preloader.former_benefit_periods.get_periods_for_application(obj)
+
     def get_warnings(self, obj) -> Dict[str, List[str]]:
         """
         Return the warnings related to this application. The data format is same as for error responses:
@@ -547,6 +650,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
                 obj.start_date,
                 obj.end_date,
                 obj.apprenticeship_program,
+                self._get_former_benefit_periods(obj),
             ).warnings:
                 warnings["former_benefits"] = former_benefit_warnings
         return warnings
@@ -571,6 +675,9 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
             return None
 
     def get_status_last_changed_at(self, obj):
+        preloader = self._get_list_preloader(obj)
+        if preloader is not None and preloader.status_last_changed_at is not None:
+            return preloader.status_last_changed_at.get(obj.pk)
         if log_entry := obj.log_entries.all().order_by("-created_at").first():
             return log_entry.created_at
         else:
@@ -588,6 +695,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
             obj.calculation.start_date or obj.start_date,
             obj.calculation.end_date or obj.end_date,
             obj.apprenticeship_program,
+            self._get_former_benefit_periods(obj),
         )
         if aggregated_info.months_remaining is None:
             last_possible_end_date = None
@@ -987,9 +1095,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     def get_latest_ahjo_status(self, obj) -> Union[str, None]:
         """Get the latest Ahjo status text for the application"""
-        try:
-            status = obj.ahjo_status.latest()
-        except AhjoStatus.DoesNotExist:
+        if (status := self._get_latest_ahjo_status(obj)) is None:
             return None
         return status.status
 
@@ -1616,6 +1722,7 @@ class HandlerApplicationSerializer(BaseApplicationSerializer):
     changes = serializers.SerializerMethodField(
         help_text=(
             "Possible changes made by applicant when additional information is asked."
+            " Only included with the include=changes query parameter."
         ),
     )
 
@@ -1631,9 +1738,7 @@ class HandlerApplicationSerializer(BaseApplicationSerializer):
 
     def get_latest_ahjo_error(self, obj) -> Union[Dict, None]:
         """Get the latest Ahjo error for the application"""
-        try:
-            status = obj.ahjo_status.latest()
-        except AhjoStatus.DoesNotExist:
+        if (status := self._get_latest_ahjo_status(obj)) is None:
             return None
         return AhjoStatusSerializer(status).data
 
@@ -1641,10 +1746,7 @@ class HandlerApplicationSerializer(BaseApplicationSerializer):
         return self.get_latest_ahjo_error(obj)
 
     def get_changes(self, obj):
-        return {
-            "handler": get_application_change_history_made_by_handler(obj),
-            "applicant": get_application_change_history_made_by_applicant(obj),
-        }
+        return get_application_change_history(obj)
 
     def get_company_for_new_application(self, _):
         """
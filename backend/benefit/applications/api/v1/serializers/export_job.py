@@ -0,0 +1,40 @@
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from applications.enums import ExportJobState
+from applications.models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    An export that is produced in the background. Poll the job until its state is "done"
+    and download the file from download_url.
+    """
+
+    download_url = serializers.SerializerMethodField(
+        "get_download_url",
+        help_text="URL of the exported file, null until the job is done",
+    )
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "export_type",
+            "state",
+            "file_name",
+            "created_at",
+            "started_at",
+            "completed_at",
+            "error",
+            "download_url",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.state != ExportJobState.DONE or not obj.file:
+            return None
+        path = reverse("v1:export-job-download", kwargs={"pk": obj.pk})
+        if request := self.context.get("request"):
+            return request.build_absolute_uri(path)
+        return path
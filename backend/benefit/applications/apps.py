@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "applications"
+
+    def ready(self):
+        # Connect the receiver that stores the change history of the applications
+        import applications.services.change_history  # noqa: F401
@@ -1,16 +1,20 @@
 import operator
+from collections import defaultdict
 from dataclasses import dataclass, field
 from decimal import Decimal
-from itertools import chain
-from typing import List, Optional, Union
+from functools import reduce
+from typing import Iterable, List, Optional
 
 from dateutil.relativedelta import relativedelta
+from django.db.models import Q
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
 
-from applications.enums import ApplicationStatus
-from applications.models import Application
-from calculator.models import PreviousBenefit
+from applications.models import (
+    Application,
+    FormerBenefitPeriod,
+    hash_social_security_number,
+)
 from common.utils import date_range_overlap, duration_in_months, pairwise
 
 
@@ -27,6 +31,64 @@ class FormerBenefitInfo:
 BENEFIT_WAITING_PERIOD_MONTHS = 24
 
 
+class FormerBenefitPeriodLookup:
+    """
+    Look up the former benefit periods of the employees of many applications with one
+    query. The periods are keyed by the blind index of the employee's social security
+    number and the company.
+    """
+
+    def __init__(self, applications: Iterable[Application]):
+        self._keys = {}
+        for application in applications:
+            employee = getattr(application, "employee", None)
+            if employee and employee.social_security_number:
+                self._keys[application.pk] = (
+                    hash_social_security_number(employee.social_security_number),
+                    application.company_id,
+                )
+        self._periods = defaultdict(list)
+        if self._keys:
+            condition = reduce(
+                operator.or_,
+                (
+                    Q(
+                        social_security_number_hash=social_security_number_hash,
+                        company_id=company_id,
+                    )
+                    for social_security_number_hash, company_id in set(
+                        self._keys.values()
+                    )
+                ),
+            )
+            for period in FormerBenefitPeriod.objects.filter(condition):
+                self._periods[
+                    (period.social_security_number_hash, period.company_id)
+                ].append(period)
+
+    def __contains__(self, application: Application) -> bool:
+        return application.pk in self._keys
+
+    def get_periods_for_application(
+        self, application: Application
+    ) -> List[FormerBenefitPeriod]:
+        # the employee has no social security number to look the periods up with
+        if application.pk not in self._keys:
+            return []
+        return self._periods.get(self._keys[application.pk], [])
+
+    @staticmethod
+    def get_periods(company, social_security_number) -> List[FormerBenefitPeriod]:
+        return list(
+            FormerBenefitPeriod.objects.filter(
+                social_security_number_hash=hash_social_security_number(
+                    social_security_number
+                ),
+                company=company,
+            )
+        )
+
+
 def get_former_benefit_info(
     application,
     company,
@@ -34,12 +96,15 @@ def get_former_benefit_info(
     start_date,
     end_date,
     apprenticeship_program,
+    past_benefit_periods: Optional[List[FormerBenefitPeriod]] = None,
 ):
     # the application field values are separate parameters, because validation is done
     # before assigning values, and if a new Application is being created, an Application doesn't yet exist when
     # the rest framework does the validation.
     # The Application parameter is only used to ensure that the application being validated isn't validated
     # against itself.
+    # The past_benefit_periods of the employee and the company may be given when they have been looked up
+    # already with FormerBenefitPeriodLookup.
 
     former_benefit_info = FormerBenefitInfo()
 
@@ -47,8 +112,12 @@ def get_former_benefit_info(
         # the employee info hasn't been entered yet
         return former_benefit_info
 
+    if past_benefit_periods is None:
+        past_benefit_periods = FormerBenefitPeriodLookup.get_periods(
+            company, social_security_number
+        )
     recent_benefits = _get_benefits_relevant_for_validation(
-        _get_past_benefits(application, company, social_security_number, end_date),
+        _get_past_benefits(application, past_benefit_periods, end_date),
         start_date,
     )
 
@@ -81,40 +150,31 @@ def get_former_benefit_info(
 
 
 def _get_past_benefits(
-    application, company, social_security_number, end_date
-) -> List[Union[PreviousBenefit, Application]]:
+    application, past_benefit_periods, end_date
+) -> List[FormerBenefitPeriod]:
     """
-    Return a list containing two types of objects:
-    * PreviousBenefits
-    * Applications that are in ACCEPTED status
+    Return the benefit periods of the PreviousBenefits and the Applications in ACCEPTED
+    status that start before the end_date. The application itself is excluded.
 
     The list is sorted according to start_date in descending order.
 
-    PreviousBenefit and Application objects these have these in common:
-    * start_date and end_date fields
-    * duration_in_months property
+    FormerBenefitPeriod objects have start_date and end_date fields and
+    duration_in_months property.
     """
 
     # The waiting time starts at the end of the latest benefit period granted.
-    previously_accepted_applications = Application.objects.filter(
-        employee__social_security_number=social_security_number,
-        company=company,
-        status=ApplicationStatus.ACCEPTED,
-        start_date__lte=end_date,  # catch also overlapping benefits
-    )
-
-    if application:
-        previously_accepted_applications = previously_accepted_applications.exclude(
-            pk=application.pk
-        )
-
-    previous_benefits = PreviousBenefit.objects.filter(
-        social_security_number=social_security_number,
-        company=company,
-        start_date__lte=end_date,
-    )
     return sorted(
-        chain(previously_accepted_applications, previous_benefits),
+        (
+            period
+            for period in past_benefit_periods
+            # catch also overlapping benefits
+            if period.start_date <= end_date
+            and (
+                application is None
+                or period.application_id is None
+                or period.application_id != application.pk
+            )
+        ),
         key=operator.attrgetter("start_date"),
         reverse=True,
     )  # most recent first
@@ -122,7 +182,7 @@ def _get_past_benefits(
 
 def _get_benefits_relevant_for_validation(past_benefits, start_date):
     """
-    :param past_benefits: list of PreviousBenefit and/or Application objects,
+    :param past_benefits: list of FormerBenefitPeriod objects,
     sorted according to start_date in descending order.
 
     :param start_date: start_date of an application
@@ -212,6 +212,28 @@ class AhjoRequestType(models.TextChoices):
     SUBSCRIBE_TO_DECISIONS = "subscribe_to_decisions", _("Subscribe to decisions API")
 
 
+class AhjoOutboxState(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    IN_PROGRESS = "in_progress", _("In progress")
+    SENT = "sent", _("Sent")
+    CANCELLED = "cancelled", _("Cancelled")
+    DEAD = "dead", _("Failed too many times")
+
+
+class ExportJobType(models.TextChoices):
+    APPLICATIONS_CSV = "applications_csv", _("Applications CSV")
+    TALPA_CSV = "talpa_csv", _("Applications CSV for Talpa")
+    APPLICATIONS_CSV_PDF = "applications_csv_pdf", _("Applications CSV and PDF files")
+    TALPA_CSV_PDF = "talpa_csv_pdf", _("Applications CSV for Talpa and PDF files")
+
+
+class ExportJobState(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    RUNNING = "running", _("Running")
+    DONE = "done", _("Done")
+    FAILED = "failed", _("Failed")
+
+
 class DecisionType(models.TextChoices):
     ACCEPTED = "accepted_decision", _("An accepted decision")
     DENIED = "denied_decision", _("A denied decision")
@@ -16,3 +16,5 @@ class Job(DailyJob):
         call_command("delete_applications", keep=30, status="cancelled")
         call_command("delete_applications", keep=180, status="draft")
         call_command("check_drafts_to_delete", notify=14, keep=180)
+        call_command("process_export_jobs", delete_expired=True)
+        call_command("rebuild_former_benefit_periods")
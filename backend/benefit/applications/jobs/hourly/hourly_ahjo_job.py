@@ -18,5 +18,5 @@ class Job(HourlyJob):
 
         if settings.ENABLE_AHJO_AUTOMATION:
             call_command(
-                "send_ahjo_requests", request_type=AhjoRequestType.GET_DECISION_DETAILS
+                "process_ahjo_outbox", request_type=AhjoRequestType.GET_DECISION_DETAILS
             )
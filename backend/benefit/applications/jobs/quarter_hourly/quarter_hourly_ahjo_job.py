@@ -10,19 +10,20 @@ class Job(QuarterHourlyJob):
 
     def execute(self):
         if settings.ENABLE_AHJO_AUTOMATION:
-            call_command("send_ahjo_requests", request_type=AhjoRequestType.OPEN_CASE)
+            call_command("process_ahjo_outbox", request_type=AhjoRequestType.OPEN_CASE)
             call_command(
-                "send_ahjo_requests",
+                "process_ahjo_outbox",
                 request_type=AhjoRequestType.SEND_DECISION_PROPOSAL,
             )
+            # New attachments do not change the Ahjo status, so they are not queued
             call_command(
                 "send_ahjo_requests",
                 request_type=AhjoRequestType.ADD_RECORDS,
             )
             call_command(
-                "send_ahjo_requests", request_type=AhjoRequestType.UPDATE_APPLICATION
+                "process_ahjo_outbox", request_type=AhjoRequestType.UPDATE_APPLICATION
             )
 
             call_command(
-                "send_ahjo_requests", request_type=AhjoRequestType.DELETE_APPLICATION
+                "process_ahjo_outbox", request_type=AhjoRequestType.DELETE_APPLICATION
             )
@@ -0,0 +1,155 @@
+import logging
+from typing import List, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+
+from applications.enums import AhjoRequestType
+from applications.management.commands.send_ahjo_requests import (
+    Command as SendAhjoRequestsCommand,
+)
+from applications.models import AhjoOutboxEntry, AhjoStatus
+from applications.services.ahjo_authentication import (
+    AhjoToken,
+    AhjoTokenExpiredException,
+)
+from applications.services.ahjo_integration import get_token
+
+LOGGER = logging.getLogger(__name__)
+
+OUTBOX_REQUEST_TYPES = list(
+    dict.fromkeys(AhjoOutboxEntry.REQUEST_TYPE_FOR_AHJO_STATUS.values())
+)
+
+
+class Command(SendAhjoRequestsCommand):
+    help = (
+        "Send the requests queued in the Ahjo outbox to Ahjo Rest API. Several instances"
+        " of the command can be run at the same time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=50,
+            help="Number of queued requests to claim per request type",
+        )
+
+        parser.add_argument(
+            "--request-type",
+            type=AhjoRequestType,
+            choices=OUTBOX_REQUEST_TYPES,
+            help="The type of requests to send, defaults to all queued request types",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of requests to send concurrently, defaults to the limit of the request type",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            ahjo_auth_token = get_token()
+        except (AhjoTokenExpiredException, ImproperlyConfigured) as e:
+            LOGGER.error(f"Failed to get auth token from Ahjo: {e}")
+            return
+
+        request_types = (
+            [options["request_type"]]
+            if options["request_type"]
+            else OUTBOX_REQUEST_TYPES
+        )
+        for request_type in request_types:
+            self.process_outbox(
+                request_type, ahjo_auth_token, options["number"], options["workers"]
+            )
+
+    def process_outbox(
+        self,
+        request_type: AhjoRequestType,
+        ahjo_auth_token: AhjoToken,
+        number_to_process: int,
+        workers: Optional[int] = None,
+    ) -> None:
+        ready_entries = self._claim_ready_entries(request_type, number_to_process)
+        if not ready_entries:
+            self.stdout.write(
+                self._print_with_timestamp(f"No queued {request_type} requests")
+            )
+            return
+
+        try:
+            _, failed_applications = self.run_requests(
+                [entry.application for entry in ready_entries],
+                ahjo_auth_token,
+                request_type,
+                workers,
+            )
+        except Exception:
+            LOGGER.exception(f"Failed to send the queued {request_type} requests")
+            for entry in ready_entries:
+                entry.mark_failed()
+            return
+
+        failed_ids = {application.pk for application in failed_applications}
+        for entry in ready_entries:
+            if entry.application_id in failed_ids:
+                entry.mark_failed()
+            else:
+                entry.mark_sent()
+
+    def _claim_ready_entries(
+        self, request_type: AhjoRequestType, number_to_claim: int
+    ) -> List[AhjoOutboxEntry]:
+        """
+        Claim entries until the given number of them can be sent now or no entries are
+        due. The entries that can not be sent yet are not due again during the run, so
+        they do not count against the number.
+        """
+        ready_entries = []
+        while len(ready_entries) < number_to_claim:
+            entries = AhjoOutboxEntry.objects.claim(
+                request_type, number_to_claim - len(ready_entries)
+            )
+            if not entries:
+                break
+            ready_entries += self._get_ready_entries(request_type, entries)
+        return ready_entries
+
+    def _get_ready_entries(
+        self, request_type: AhjoRequestType, entries: List[AhjoOutboxEntry]
+    ) -> List[AhjoOutboxEntry]:
+        """
+        Check the claimed entries with the same conditions as send_ahjo_requests uses, but
+        only for the applications of the entries. Return the entries that can be sent now.
+        The entries whose Ahjo status has been superseded by a later status are cancelled,
+        and the rest are postponed until the application is ready for the request.
+        """
+        application_ids = [entry.application_id for entry in entries]
+        applications = {
+            application.pk: application
+            for application in self.get_applications_for_request(request_type).filter(
+                pk__in=application_ids
+            )
+        }
+        latest_ahjo_status_ids = dict(
+            AhjoStatus.objects.filter(application_id__in=application_ids)
+            .order_by("application_id", "-created_at")
+            .distinct("application_id")
+            .values_list("application_id", "id")
+        )
+
+        ready_entries = []
+        for entry in entries:
+            if entry.application_id in applications:
+                entry.application = applications[entry.application_id]
+                ready_entries.append(entry)
+            elif entry.ahjo_status_id != latest_ahjo_status_ids.get(
+                entry.application_id
+            ):
+                entry.mark_cancelled()
+            else:
+                entry.postpone()
+        return ready_entries
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from applications.models import ExportJob
+from applications.services.export_jobs import process_export_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Produce the files of the queued export jobs. Several instances of the command can"
+        " be run at the same time. With --loop the command keeps waiting for new jobs, so it"
+        " can be run as a worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10,
+            help="Number of jobs to process per round",
+        )
+
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep processing new jobs until the command is stopped",
+        )
+
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait for new jobs when there are none, used with --loop",
+        )
+
+        parser.add_argument(
+            "--delete-expired",
+            action="store_true",
+            help="Delete the expired jobs and their files instead of processing jobs",
+        )
+
+    def handle(self, *args, **options):
+        if options["delete_expired"]:
+            count = ExportJob.objects.delete_expired()
+            self.stdout.write(
+                self._print_with_timestamp(f"Deleted {count} export jobs")
+            )
+            return
+
+        while True:
+            processed = self.process_jobs(options["number"])
+            if not options["loop"]:
+                break
+            if not processed:
+                # do not keep an idle connection open between the rounds
+                close_old_connections()
+                time.sleep(options["sleep"])
+
+    def process_jobs(self, number_to_process: int) -> int:
+        jobs = ExportJob.objects.claim(number_to_process)
+        for job in jobs:
+            if process_export_job(job):
+                self.stdout.write(
+                    self._print_with_timestamp(
+                        f"Export job {job.pk} done: {job.file.name}"
+                    )
+                )
+            else:
+                self.stdout.write(
+                    self._print_with_timestamp(
+                        f"Export job {job.pk} failed: {job.error}"
+                    )
+                )
+        return len(jobs)
+
+    def _print_with_timestamp(self, text):
+        return f"{timezone.now()}: {text}"
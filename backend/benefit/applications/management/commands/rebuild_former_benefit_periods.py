@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from applications.models import FormerBenefitPeriod
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the index of the former benefit periods from the accepted applications"
+        " and the previous benefits"
+    )
+
+    def handle(self, *args, **options):
+        count = FormerBenefitPeriod.objects.rebuild()
+        self.stdout.write(f"Rebuilt the index with {count} former benefit periods")
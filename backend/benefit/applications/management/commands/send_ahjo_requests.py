@@ -1,7 +1,7 @@
 import logging
 import time
 from datetime import datetime
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.core.management.base import BaseCommand
@@ -30,6 +30,7 @@ from applications.services.ahjo_integration import (
     send_open_case_request_to_ahjo,
     update_application_summary_record_in_ahjo,
 )
+from applications.services.ahjo_request_dispatcher import AhjoRequestDispatcher
 
 LOGGER = logging.getLogger(__name__)
 
@@ -60,6 +61,13 @@ class Command(BaseCommand):
             help="Run the command without making actual changes",
         )
 
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of requests to send concurrently, defaults to the limit of the request type",
+        )
+
     def get_applications_for_request(
         self, request_type: AhjoRequestType
     ) -> QuerySet[Application]:
@@ -146,7 +154,10 @@ class Command(BaseCommand):
             return
 
         self.run_requests(
-            applications[:number_to_process], ahjo_auth_token, request_type
+            applications[:number_to_process],
+            ahjo_auth_token,
+            request_type,
+            options["workers"],
         )
 
     def run_requests(
@@ -154,7 +165,9 @@ class Command(BaseCommand):
         applications: QuerySet[Application],
         ahjo_auth_token: AhjoToken,
         ahjo_request_type: AhjoRequestType,
-    ) -> None:
+        workers: Optional[int] = None,
+    ) -> Tuple[List[Application], List[Application]]:
+        """Send the requests and return the lists of successful and failed applications."""
         start_time = time.time()
         successful_applications = []
         failed_applications = []
@@ -175,29 +188,34 @@ for {len(applications)} applications"
             ImproperlyConfigured: "Improperly configured error for application",
         }
 
-        for application in applications:
-            counter += 1
-
-            try:
-                sent_application, response_text = request_handler(
-                    application, ahjo_auth_token
-                )
-            except tuple(exception_messages.keys()) as e:
-                LOGGER.error(
-                    f"{exception_messages[type(e)]} {application.application_number}: {e}"
-                )
-                failed_applications.append(application)
-                self._handle_failed_request(counter, application, ahjo_request_type)
-                continue
-
-            if sent_application:
-                successful_applications.append(sent_application)
-                self._handle_successful_request(
-                    counter, sent_application, response_text, ahjo_request_type
-                )
-            else:
-                failed_applications.append(application)
-                self._handle_failed_request(counter, application, ahjo_request_type)
+        # The requests are sent concurrently, but the results are handled here one by one
+        # in the order of the applications.
+        with AhjoRequestDispatcher(
+            ahjo_request_type, ahjo_auth_token, max_workers=workers
+        ) as dispatcher:
+            for application, future in dispatcher.dispatch(
+                request_handler, applications
+            ):
+                counter += 1
+
+                try:
+                    sent_application, response_text = future.result()
+                except tuple(exception_messages.keys()) as e:
+                    LOGGER.error(
+                        f"{exception_messages[type(e)]} {application.application_number}: {e}"
+                    )
+                    failed_applications.append(application)
+                    self._handle_failed_request(counter, application, ahjo_request_type)
+                    continue
+
+                if sent_application:
+                    successful_applications.append(sent_application)
+                    self._handle_successful_request(
+                        counter, sent_application, response_text, ahjo_request_type
+                    )
+                else:
+                    failed_applications.append(application)
+                    self._handle_failed_request(counter, application, ahjo_request_type)
 
         end_time = time.time()
         elapsed_time = end_time - start_time
@@ -208,6 +226,7 @@ for {len(applications)} applications"
             ahjo_request_type,
             elapsed_time,
         )
+        return successful_applications, failed_applications
 
     def _print_results(
         self,
@@ -0,0 +1,90 @@
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from applications.models import (
+    Application,
+    ApplicationLogEntry,
+    ApplicationStatusTimestamps,
+)
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the denormalized application status timestamps to the application"
+        " log entries and rebuild the rows that differ"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report the inconsistent applications, do not fix them",
+        )
+
+    def handle(self, *args, **options):
+        inconsistent = list(_get_inconsistent_status_timestamps())
+
+        if options["check"]:
+            for status_timestamps in inconsistent:
+                self.stdout.write(
+                    f"Inconsistent status timestamps for application {status_timestamps.application_id}"
+                )
+            if inconsistent:
+                raise CommandError(
+                    f"Found {len(inconsistent)} applications with inconsistent status timestamps"
+                )
+            self.stdout.write("Application status timestamps are consistent")
+            return
+
+        with transaction.atomic():
+            ApplicationStatusTimestamps.objects.bulk_create(
+                inconsistent,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["application"],
+                update_fields=list(ApplicationStatusTimestamps.STATUS_TRANSITIONS),
+            )
+        self.stdout.write(
+            f"Updated status timestamps of {len(inconsistent)} applications"
+        )
+
+
+def _get_inconsistent_status_timestamps() -> Iterator[ApplicationStatusTimestamps]:
+    """Compute the status timestamps from the log entries and yield unsaved
+    ApplicationStatusTimestamps objects for every application where they differ from the
+    stored values."""
+    field_names = list(ApplicationStatusTimestamps.STATUS_TRANSITIONS)
+    qs = Application.objects.all()
+    for (
+        field_name,
+        to_statuses,
+    ) in ApplicationStatusTimestamps.STATUS_TRANSITIONS.items():
+        qs = qs.annotate(
+            **{
+                f"log_{field_name}": Subquery(
+                    ApplicationLogEntry.objects.filter(
+                        application=OuterRef("pk"), to_status__in=to_statuses
+                    )
+                    .order_by("-created_at")
+                    .values("created_at")[:1]
+                )
+            }
+        )
+
+    values = qs.order_by("pk").values_list(
+        "pk", *field_names, *[f"log_{field_name}" for field_name in field_names]
+    )
+    for pk, *timestamps in values.iterator(chunk_size=BATCH_SIZE):
+        stored, computed = (
+            timestamps[: len(field_names)],
+            timestamps[len(field_names) :],
+        )
+        if stored != computed:
+            yield ApplicationStatusTimestamps(
+                application_id=pk, **dict(zip(field_names, computed))
+            )
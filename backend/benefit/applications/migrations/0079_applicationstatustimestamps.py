@@ -0,0 +1,136 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The status lists must match ApplicationStatusTimestamps.STATUS_TRANSITIONS
+_SELECT_STATUS_TIMESTAMPS = """
+    MAX(created_at) FILTER (
+        WHERE to_status IN ('rejected', 'accepted', 'cancelled')
+    ) AS handled_at,
+    MAX(created_at) FILTER (
+        WHERE to_status = 'additional_information_needed'
+    ) AS additional_information_requested_at,
+    MAX(created_at) FILTER (WHERE to_status = 'received') AS submitted_at
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION bf_applications_sync_status_timestamps() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Only update existing rows here, so that deleting an application does not
+        -- recreate the row while its log entries are being deleted
+        UPDATE bf_applications_applicationstatustimestamps t
+        SET handled_at = s.handled_at,
+            additional_information_requested_at = s.additional_information_requested_at,
+            submitted_at = s.submitted_at
+        FROM (
+            SELECT {_SELECT_STATUS_TIMESTAMPS}
+            FROM bf_applications_applicationlogentry
+            WHERE application_id = OLD.application_id
+        ) s
+        WHERE t.application_id = OLD.application_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- Serialize concurrent transitions of the same application
+        PERFORM 1 FROM bf_applications_application
+        WHERE id = NEW.application_id FOR NO KEY UPDATE;
+
+        INSERT INTO bf_applications_applicationstatustimestamps (
+            application_id,
+            handled_at,
+            additional_information_requested_at,
+            submitted_at
+        )
+        SELECT NEW.application_id, {_SELECT_STATUS_TIMESTAMPS}
+        FROM bf_applications_applicationlogentry
+        WHERE application_id = NEW.application_id
+        ON CONFLICT (application_id) DO UPDATE
+        SET handled_at = EXCLUDED.handled_at,
+            additional_information_requested_at =
+                EXCLUDED.additional_information_requested_at,
+            submitted_at = EXCLUDED.submitted_at;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bf_applications_applicationlogentry_status_timestamps
+AFTER INSERT OR UPDATE OF application_id, to_status, created_at OR DELETE
+ON bf_applications_applicationlogentry
+FOR EACH ROW EXECUTE FUNCTION bf_applications_sync_status_timestamps();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER bf_applications_applicationlogentry_status_timestamps
+ON bf_applications_applicationlogentry;
+DROP FUNCTION bf_applications_sync_status_timestamps();
+"""
+
+BACKFILL_SQL = f"""
+INSERT INTO bf_applications_applicationstatustimestamps (
+    application_id,
+    handled_at,
+    additional_information_requested_at,
+    submitted_at
+)
+SELECT application_id, {_SELECT_STATUS_TIMESTAMPS}
+FROM bf_applications_applicationlogentry
+GROUP BY application_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0078_ahjostatus_error_from_ahjo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApplicationStatusTimestamps",
+            fields=[
+                (
+                    "application",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="status_timestamps",
+                        serialize=False,
+                        to="applications.application",
+                        verbose_name="application",
+                    ),
+                ),
+                (
+                    "handled_at",
+                    models.DateTimeField(
+                        blank=True, db_index=True, null=True, verbose_name="handled at"
+                    ),
+                ),
+                (
+                    "additional_information_requested_at",
+                    models.DateTimeField(
+                        blank=True,
+                        db_index=True,
+                        null=True,
+                        verbose_name="additional information requested at",
+                    ),
+                ),
+                (
+                    "submitted_at",
+                    models.DateTimeField(
+                        blank=True,
+                        db_index=True,
+                        null=True,
+                        verbose_name="submitted at",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "application status timestamps",
+                "verbose_name_plural": "application status timestamps",
+                "db_table": "bf_applications_applicationstatustimestamps",
+            },
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
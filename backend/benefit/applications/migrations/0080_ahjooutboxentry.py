@@ -0,0 +1,155 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+# The request types for the Ahjo statuses, as in AhjoOutboxEntry.REQUEST_TYPE_FOR_AHJO_STATUS
+REQUEST_TYPE_FOR_AHJO_STATUS = {
+    "submitted_but_not_sent_to_ahjo": "open_case",
+    "case_opened": "send_decision",
+    "new_record_received": "send_decision",
+    "decision_proposal_accepted": "update_application",
+    "signed": "get_decision_details",
+    "scheduled_for_deletion": "delete_application",
+}
+
+
+def enqueue_pending_ahjo_requests(apps, schema_editor):
+    """Queue the requests that the latest Ahjo status of each application calls for."""
+    AhjoStatus = apps.get_model("applications", "AhjoStatus")
+    AhjoOutboxEntry = apps.get_model("applications", "AhjoOutboxEntry")
+    latest_statuses = AhjoStatus.objects.order_by(
+        "application_id", "-created_at"
+    ).distinct("application_id")
+    AhjoOutboxEntry.objects.bulk_create(
+        [
+            AhjoOutboxEntry(
+                application_id=ahjo_status.application_id,
+                ahjo_status_id=ahjo_status.id,
+                request_type=REQUEST_TYPE_FOR_AHJO_STATUS[ahjo_status.status],
+            )
+            for ahjo_status in latest_statuses.iterator()
+            if ahjo_status.status in REQUEST_TYPE_FOR_AHJO_STATUS
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0079_applicationstatustimestamps"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AhjoOutboxEntry",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="time created"
+                    ),
+                ),
+                (
+                    "modified_at",
+                    models.DateTimeField(auto_now=True, verbose_name="time modified"),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "request_type",
+                    models.CharField(
+                        choices=[
+                            ("open_case", "Open case in Ahjo"),
+                            ("delete_application", "Delete application in Ahjo"),
+                            ("update_application", "Update application in Ahjo"),
+                            ("add_records", "Send new records to Ahjo"),
+                            ("send_decision", "Send decision to Ahjo"),
+                            ("get_decision_details", "Get decision details from Ahjo"),
+                            ("subscribe_to_decisions", "Subscribe to decisions API"),
+                        ],
+                        max_length=64,
+                        verbose_name="request type",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("in_progress", "In progress"),
+                            ("sent", "Sent"),
+                            ("cancelled", "Cancelled"),
+                            ("dead", "Failed too many times"),
+                        ],
+                        default="pending",
+                        max_length=64,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="attempts"),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="next attempt at",
+                    ),
+                ),
+                (
+                    "ahjo_status",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The Ahjo status that caused the request to be queued",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="applications.ahjostatus",
+                        verbose_name="ahjo status",
+                    ),
+                ),
+                (
+                    "application",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ahjo_outbox_entries",
+                        to="applications.application",
+                        verbose_name="application",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "ahjo outbox entry",
+                "verbose_name_plural": "ahjo outbox entries",
+                "db_table": "bf_applications_ahjo_outbox_entry",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("state__in", ["pending", "in_progress"])),
+                        fields=["request_type", "next_attempt_at"],
+                        name="bf_ahjo_outbox_queued_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ahjooutboxentry",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("state", "pending")),
+                fields=("application", "request_type"),
+                name="bf_applications_ahjo_outbox_entry_unique_pending",
+            ),
+        ),
+        migrations.RunPython(enqueue_pending_ahjo_requests, migrations.RunPython.noop),
+    ]
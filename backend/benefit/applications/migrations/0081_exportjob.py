@@ -0,0 +1,134 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:41
+
+import applications.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("applications", "0080_ahjooutboxentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="time created"
+                    ),
+                ),
+                (
+                    "modified_at",
+                    models.DateTimeField(auto_now=True, verbose_name="time modified"),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "export_type",
+                    models.CharField(
+                        choices=[
+                            ("applications_csv", "Applications CSV"),
+                            ("talpa_csv", "Applications CSV for Talpa"),
+                            ("applications_csv_pdf", "Applications CSV and PDF files"),
+                            (
+                                "talpa_csv_pdf",
+                                "Applications CSV for Talpa and PDF files",
+                            ),
+                        ],
+                        max_length=64,
+                        verbose_name="export type",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=64,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "file_name",
+                    models.CharField(
+                        help_text="Name of the exported file without the suffix",
+                        max_length=256,
+                        verbose_name="file name",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        upload_to=applications.models.export_job_file_path,
+                        verbose_name="exported file",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="started at"
+                    ),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="completed at"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "applications",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="+",
+                        to="applications.application",
+                        verbose_name="applications",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="created by",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "export job",
+                "verbose_name_plural": "export jobs",
+                "db_table": "bf_applications_export_job",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("state__in", ["pending", "running"])),
+                        fields=["created_at"],
+                        name="bf_export_job_unfinished_idx",
+                    )
+                ],
+            },
+        ),
+    ]
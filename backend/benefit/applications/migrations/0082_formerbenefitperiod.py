@@ -0,0 +1,159 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:23
+
+import common.utils
+from django.db import migrations, models
+import django.db.models.deletion
+
+ACCEPTED = "accepted"
+
+
+def create_former_benefit_periods(apps, schema_editor):
+    Application = apps.get_model("applications", "Application")
+    Employee = apps.get_model("applications", "Employee")
+    FormerBenefitPeriod = apps.get_model("applications", "FormerBenefitPeriod")
+    PreviousBenefit = apps.get_model("calculator", "PreviousBenefit")
+    social_security_number_field = Employee._meta.get_field("social_security_number")
+
+    applications = (
+        Application.objects.filter(
+            status=ACCEPTED,
+            company__isnull=False,
+            start_date__isnull=False,
+            end_date__isnull=False,
+            employee__social_security_number__isnull=False,
+        )
+        .exclude(employee__social_security_number="")
+        .values_list(
+            "pk",
+            "company_id",
+            "employee__social_security_number",
+            "start_date",
+            "end_date",
+        )
+    )
+    periods = [
+        FormerBenefitPeriod(
+            application_id=pk,
+            company_id=company_id,
+            social_security_number_hash=social_security_number_hash,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        for (
+            pk,
+            company_id,
+            social_security_number_hash,
+            start_date,
+            end_date,
+        ) in applications.iterator()
+    ]
+    periods += [
+        FormerBenefitPeriod(
+            previous_benefit_id=previous_benefit.pk,
+            company_id=previous_benefit.company_id,
+            social_security_number_hash=social_security_number_field.get_prep_value(
+                previous_benefit.encrypted_social_security_number
+            ),
+            start_date=previous_benefit.start_date,
+            end_date=previous_benefit.end_date,
+        )
+        for previous_benefit in PreviousBenefit.objects.iterator()
+    ]
+    FormerBenefitPeriod.objects.bulk_create(periods, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("companies", "0006_company_organisation_data_fetched_at"),
+        ("calculator", "0016_change_pay_subsidy_work_time_default"),
+        ("applications", "0081_exportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormerBenefitPeriod",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "social_security_number_hash",
+                    models.CharField(
+                        max_length=66, verbose_name="social security number hash"
+                    ),
+                ),
+                (
+                    "start_date",
+                    models.DateField(verbose_name="benefit start from date"),
+                ),
+                ("end_date", models.DateField(verbose_name="benefit end date")),
+                (
+                    "application",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="former_benefit_period",
+                        to="applications.application",
+                        verbose_name="application",
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="former_benefit_periods",
+                        to="companies.company",
+                        verbose_name="company",
+                    ),
+                ),
+                (
+                    "previous_benefit",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="former_benefit_period",
+                        to="calculator.previousbenefit",
+                        verbose_name="previous benefit",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "former benefit period",
+                "verbose_name_plural": "former benefit periods",
+                "db_table": "bf_applications_formerbenefitperiod",
+                "indexes": [
+                    models.Index(
+                        fields=["social_security_number_hash", "company", "start_date"],
+                        name="former_benefit_period_idx",
+                    )
+                ],
+            },
+            bases=(models.Model, common.utils.DurationMixin),
+        ),
+        migrations.AddConstraint(
+            model_name="formerbenefitperiod",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(
+                        ("application__isnull", False),
+                        ("previous_benefit__isnull", True),
+                    ),
+                    models.Q(
+                        ("application__isnull", True),
+                        ("previous_benefit__isnull", False),
+                    ),
+                    _connector="OR",
+                ),
+                name="former_benefit_period_has_one_source",
+            ),
+        ),
+        migrations.RunPython(create_former_benefit_periods, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0082_formerbenefitperiod"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApplicationChangeHistory",
+            fields=[
+                (
+                    "application",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="change_history",
+                        serialize=False,
+                        to="applications.application",
+                        verbose_name="application",
+                    ),
+                ),
+                (
+                    "handler_change_sets",
+                    models.JSONField(
+                        default=list, verbose_name="change sets made by handlers"
+                    ),
+                ),
+                (
+                    "handler_received_history_id",
+                    models.IntegerField(
+                        blank=True,
+                        null=True,
+                        verbose_name="history id of the received application",
+                    ),
+                ),
+                (
+                    "handler_history_id",
+                    models.IntegerField(
+                        blank=True,
+                        null=True,
+                        verbose_name="history id of the newest processed application record",
+                    ),
+                ),
+                (
+                    "handler_employee_history_id",
+                    models.IntegerField(
+                        blank=True,
+                        null=True,
+                        verbose_name="history id of the newest processed employee record",
+                    ),
+                ),
+                (
+                    "applicant_change_sets",
+                    models.JSONField(
+                        default=list, verbose_name="change sets made by the applicant"
+                    ),
+                ),
+                (
+                    "applicant_log_entry_ids",
+                    models.JSONField(
+                        default=list,
+                        verbose_name="ids of the log entries of the applicant's change sets",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "application change history",
+                "verbose_name_plural": "application change histories",
+                "db_table": "bf_applications_applicationchangehistory",
+            },
+        ),
+    ]
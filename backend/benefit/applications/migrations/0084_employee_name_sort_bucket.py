@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+MAX_CODE_POINT = 0x24F
+
+
+def _get_name_sort_bucket(last_name):
+    if not last_name:
+        return 0
+    return min(ord(last_name.lower()[0]), MAX_CODE_POINT) + 1
+
+
+def set_employee_name_sort_buckets(apps, schema_editor):
+    Employee = apps.get_model("applications", "Employee")
+    employees = []
+    for employee in Employee.objects.only("encrypted_last_name").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        employee.name_sort_bucket = _get_name_sort_bucket(employee.encrypted_last_name)
+        employees.append(employee)
+    Employee.objects.bulk_update(employees, ["name_sort_bucket"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("applications", "0083_applicationchangehistory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="name_sort_bucket",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_employee_name_sort_buckets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["name_sort_bucket"], name="employee_name_sort_bucket_idx"
+            ),
+        ),
+    ]
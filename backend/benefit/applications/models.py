@@ -1,13 +1,14 @@
 import re
-from datetime import date
-from typing import List
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
-from django.db import connection, models
-from django.db.models import Exists, F, JSONField, OuterRef, Prefetch, Subquery
+from django.db import connection, IntegrityError, models, transaction
+from django.db.models import Exists, F, JSONField, OuterRef, Prefetch, Q, Subquery
 from django.db.models.constraints import UniqueConstraint
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from encrypted_fields.fields import EncryptedCharField, SearchField
 from phonenumber_field.modelfields import PhoneNumberField
@@ -16,6 +17,8 @@ from simple_history.models import HistoricalRecords
 from applications.enums import (
     AhjoDecision,
     AhjoDecisionDetails,
+    AhjoOutboxState,
+    AhjoRequestType,
     AhjoStatus as AhjoStatusEnum,
     ApplicationAlterationState,
     ApplicationAlterationType,
@@ -27,6 +30,8 @@ from applications.enums import (
     AttachmentType,
     BenefitType,
     DecisionType,
+    ExportJobState,
+    ExportJobType,
     HandlerRole,
     PaySubsidyGranted,
 )
@@ -36,7 +41,7 @@ from applications.exceptions import (
     BatchTooManyDraftsError,
 )
 from common.localized_iban_field import LocalizedIBANField
-from common.utils import DurationMixin
+from common.utils import DurationMixin, hash_file_content
 from companies.models import Company
 from shared.common.utils import social_security_number_birthdate
 from shared.models.abstract_models import TimeStampedModel, UUIDModel
@@ -82,6 +87,42 @@ def address_property(field_suffix):
     return _address_property_getter
 
 
+class FormerBenefitPeriodSourceMixin:
+    """
+    Mixin for the models whose fields are stored in the FormerBenefitPeriod index. The
+    values of the fields are kept as they were loaded, so that the index is updated only
+    when they change.
+    """
+
+    former_benefit_period_fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._former_benefit_period_values = (
+            instance._get_former_benefit_period_values()
+        )
+        return instance
+
+    def _get_former_benefit_period_values(self) -> dict:
+        # Read from the instance dict, so that the deferred fields are not loaded
+        return {
+            field: self.__dict__.get(field)
+            for field in self.former_benefit_period_fields
+        }
+
+    def update_former_benefit_period_values(self) -> bool:
+        """
+        Keep the current values of the indexed fields.
+
+        :return: Whether the values have changed since they were loaded or last kept.
+        """
+        values = self._get_former_benefit_period_values()
+        changed = values != getattr(self, "_former_benefit_period_values", None)
+        self._former_benefit_period_values = values
+        return changed
+
+
 class ApplicationManager(models.Manager):
     HANDLED_STATUSES = [
         ApplicationStatus.REJECTED,
@@ -98,32 +139,19 @@ class ApplicationManager(models.Manager):
 
     ARCHIVE_THRESHOLD = relativedelta(days=-14)
 
-    def _annotate_with_log_timestamp(self, qs, field_name, to_statuses):
-        subquery = (
-            ApplicationLogEntry.objects.filter(
-                application=OuterRef("pk"), to_status__in=to_statuses
-            )
-            .order_by("-created_at")
-            .values("created_at")[:1]
-        )
-        return qs.annotate(**{field_name: Subquery(subquery)})
-
     def get_queryset(self):
         """
         Annotate the queryset with information about timestamps of past status transitions.
         If multiple transitions to the same status have occurred, then use the latest status transition timestamp.
+        The timestamps are read from the denormalized ApplicationStatusTimestamps table.
         """
         qs = super().get_queryset()
-        qs = self._annotate_with_log_timestamp(qs, "handled_at", self.HANDLED_STATUSES)
-        qs = self._annotate_with_log_timestamp(
-            qs,
-            "additional_information_requested_at",
-            [ApplicationStatus.ADDITIONAL_INFORMATION_NEEDED],
+        return qs.annotate(
+            **{
+                field_name: F(f"status_timestamps__{field_name}")
+                for field_name in ApplicationStatusTimestamps.STATUS_TRANSITIONS
+            }
         )
-        qs = self._annotate_with_log_timestamp(
-            qs, "submitted_at", [ApplicationStatus.RECEIVED]
-        )
-        return qs
 
     def with_non_downloaded_attachments(self):
         """
@@ -248,7 +276,9 @@ class ApplicationManager(models.Manager):
         )
 
 
-class Application(UUIDModel, TimeStampedModel, DurationMixin):
+class Application(
+    FormerBenefitPeriodSourceMixin, UUIDModel, TimeStampedModel, DurationMixin
+):
     """
     Data model for Helsinki benefit applications
 
@@ -262,6 +292,8 @@ class Application(UUIDModel, TimeStampedModel, DurationMixin):
 
     objects = ApplicationManager()
 
+    former_benefit_period_fields = ("status", "company_id", "start_date", "end_date")
+
     BENEFIT_MAX_MONTHS = 12
 
     company = models.ForeignKey(
@@ -541,12 +573,10 @@ class Application(UUIDModel, TimeStampedModel, DurationMixin):
     @property
     def ahjo_rows(self):
         # enable uniform handling of applications with and without a calculation object
-        from calculator.models import CalculationRow
-
         if hasattr(self, "calculation"):
             return self.calculation.ahjo_rows
         else:
-            return CalculationRow.objects.none()
+            return []
 
     @property
     def latest_decision_comment(self):
@@ -594,6 +624,14 @@ class Application(UUIDModel, TimeStampedModel, DurationMixin):
         else:
             return False
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        if self.update_former_benefit_period_values() and (
+            not is_new or self.status == ApplicationStatus.ACCEPTED
+        ):
+            FormerBenefitPeriod.objects.update_for_application(self)
+
     def __str__(self):
         return "{}: {} {} {}-{}".format(
             self.pk, self.company_name, self.status, self.start_date, self.end_date
@@ -667,6 +705,110 @@ class ApplicationLogEntry(UUIDModel, TimeStampedModel):
         ordering = ["application__created_at", "created_at"]
 
 
+class ApplicationStatusTimestamps(models.Model):
+    """
+    Denormalized timestamps of the latest status transitions of an application.
+
+    The rows are maintained by a database trigger on the ApplicationLogEntry table (see
+    migration 0079), so that the values are updated in the same transaction as the log
+    entries, including queryset updates and deletes. Each timestamp is the created_at of
+    the latest log entry transitioning to one of the statuses listed in
+    STATUS_TRANSITIONS. Use the sync_application_status_timestamps management
+    command to rebuild or verify the table.
+    """
+
+    # NOTE: keep in sync with the trigger function in the migrations
+    STATUS_TRANSITIONS = {
+        "handled_at": ApplicationManager.HANDLED_STATUSES,
+        "additional_information_requested_at": [
+            ApplicationStatus.ADDITIONAL_INFORMATION_NEEDED
+        ],
+        "submitted_at": [ApplicationStatus.RECEIVED],
+    }
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="status_timestamps",
+        verbose_name=_("application"),
+    )
+    handled_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name=_("handled at")
+    )
+    additional_information_requested_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("additional information requested at"),
+    )
+    submitted_at = models.DateTimeField(
+        null=True, blank=True, db_index=True, verbose_name=_("submitted at")
+    )
+
+    def __str__(self):
+        return f"Status timestamps of application {self.application_id}"
+
+    class Meta:
+        db_table = "bf_applications_applicationstatustimestamps"
+        verbose_name = _("application status timestamps")
+        verbose_name_plural = _("application status timestamps")
+
+
+class ApplicationChangeHistory(models.Model):
+    """
+    Stored change sets of the application change history, which are computed from the
+    history records of the application and the employee (see
+    applications.services.change_history).
+
+    The change sets made by handlers are appended incrementally: the ids of the newest
+    history records that have been processed are stored, and only the newer records
+    are compared when the change history is read. The change set made by the applicant
+    is stored with the ids of the log entries that it was computed between.
+    """
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="change_history",
+        verbose_name=_("application"),
+    )
+    handler_change_sets = models.JSONField(
+        default=list, verbose_name=_("change sets made by handlers")
+    )
+    handler_received_history_id = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("history id of the received application"),
+    )
+    handler_history_id = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("history id of the newest processed application record"),
+    )
+    handler_employee_history_id = models.IntegerField(
+        null=True,
+        blank=True,
+        verbose_name=_("history id of the newest processed employee record"),
+    )
+    applicant_change_sets = models.JSONField(
+        default=list, verbose_name=_("change sets made by the applicant")
+    )
+    applicant_log_entry_ids = models.JSONField(
+        default=list,
+        verbose_name=_("ids of the log entries of the applicant's change sets"),
+    )
+
+    def __str__(self):
+        return f"Change history of application {self.application_id}"
+
+    class Meta:
+        db_table = "bf_applications_applicationchangehistory"
+        verbose_name = _("application change history")
+        verbose_name_plural = _("application change histories")
+
+
 def validate_decision_date(value):
     """
     Validate batch decision date: allow empty or
@@ -937,7 +1079,9 @@ class ApplicationBasis(UUIDModel, TimeStampedModel):
         verbose_name_plural = _("application bases")
 
 
-class Employee(UUIDModel, TimeStampedModel):
+class Employee(FormerBenefitPeriodSourceMixin, UUIDModel, TimeStampedModel):
+    former_benefit_period_fields = ("encrypted_social_security_number",)
+
     application = models.OneToOneField(
         Application,
         verbose_name=_("application"),
@@ -948,6 +1092,7 @@ class Employee(UUIDModel, TimeStampedModel):
     history = HistoricalRecords(
         table_name="bf_applications_employee_history",
         cascade_delete_history=True,
+        excluded_fields=["name_sort_bucket"],
     )
 
     encrypted_first_name = EncryptedCharField(
@@ -977,6 +1122,11 @@ class Employee(UUIDModel, TimeStampedModel):
         encrypted_field_name="encrypted_social_security_number",
     )
 
+    # The encrypted names cannot be sorted in the database, so the list ordering by the
+    # employee name sorts the employees by this bucket of the last name first, and
+    # decrypts and sorts the names within the buckets. It is kept in sync on save.
+    name_sort_bucket = models.PositiveIntegerField(default=0, editable=False)
+
     phone_number = PhoneNumberField(
         verbose_name=_("phone number"),
         blank=True,
@@ -1051,6 +1201,21 @@ class Employee(UUIDModel, TimeStampedModel):
         # input validation should ensure it's always valid.
         return social_security_number_birthdate(self.social_security_number)
 
+    def save(self, *args, **kwargs):
+        self.name_sort_bucket = get_employee_name_sort_bucket(self.encrypted_last_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            {"last_name", "encrypted_last_name"} & set(update_fields)
+        ):
+            kwargs["update_fields"] = {*update_fields, "name_sort_bucket"}
+        super().save(*args, **kwargs)
+        if (
+            self.update_former_benefit_period_values()
+            and self.application.status == ApplicationStatus.ACCEPTED
+        ):
+            # the social security number of an accepted application is in the index
+            FormerBenefitPeriod.objects.update_for_application(self.application)
+
     def __str__(self):
         return "{} {} ({})".format(self.first_name, self.last_name, self.email)
 
@@ -1058,6 +1223,207 @@ class Employee(UUIDModel, TimeStampedModel):
         db_table = "bf_applications_employee"
         verbose_name = _("employee")
         verbose_name_plural = _("employees")
+        indexes = [
+            models.Index(
+                fields=["name_sort_bucket"], name="employee_name_sort_bucket_idx"
+            ),
+        ]
+
+
+# The buckets of the last names beyond the Latin letters are not told apart
+EMPLOYEE_NAME_SORT_BUCKET_MAX_CODE_POINT = 0x24F
+
+
+def get_employee_name_sort_bucket(last_name: str) -> int:
+    """
+    Return the bucket of the employee in the ordering by the name. The bucket is the code
+    point of the first character of the lowercase last name, so it reveals only the
+    initial of the name, and ordering by it is consistent with ordering by the lowercase
+    names. The employees without a last name are in the first bucket, 0.
+    """
+    if not last_name:
+        return 0
+    return min(ord(last_name.lower()[0]), EMPLOYEE_NAME_SORT_BUCKET_MAX_CODE_POINT) + 1
+
+
+def hash_social_security_number(social_security_number: str) -> str:
+    """
+    Return the blind index of the social security number, which is stored in
+    Employee.social_security_number.
+    """
+    return Employee._meta.get_field("social_security_number").get_prep_value(
+        social_security_number
+    )
+
+
+class FormerBenefitPeriodManager(models.Manager):
+    def update_for_application(self, application: Application):
+        """
+        Store the benefit period of an accepted application, or delete it if the
+        application is not accepted or the employee and the dates are not entered.
+        """
+        employee = getattr(application, "employee", None)
+        social_security_number = employee.social_security_number if employee else None
+        if (
+            application.status == ApplicationStatus.ACCEPTED
+            and application.company_id
+            and social_security_number
+            and application.start_date
+            and application.end_date
+        ):
+            self.update_or_create(
+                application=application,
+                defaults={
+                    "social_security_number_hash": hash_social_security_number(
+                        social_security_number
+                    ),
+                    "company_id": application.company_id,
+                    "start_date": application.start_date,
+                    "end_date": application.end_date,
+                },
+            )
+        else:
+            self.filter(application=application).delete()
+
+    def update_for_previous_benefit(self, previous_benefit):
+        self.update_or_create(
+            previous_benefit=previous_benefit,
+            defaults={
+                "social_security_number_hash": hash_social_security_number(
+                    previous_benefit.social_security_number
+                ),
+                "company_id": previous_benefit.company_id,
+                "start_date": previous_benefit.start_date,
+                "end_date": previous_benefit.end_date,
+            },
+        )
+
+    @transaction.atomic
+    def rebuild(self) -> int:
+        """
+        Rebuild the index from the accepted applications and the previous benefits.
+
+        :return: The number of benefit periods in the index.
+        """
+        previous_benefit_model = self.model._meta.get_field(
+            "previous_benefit"
+        ).related_model
+        applications = (
+            Application.objects.filter(
+                status=ApplicationStatus.ACCEPTED,
+                company__isnull=False,
+                start_date__isnull=False,
+                end_date__isnull=False,
+                employee__social_security_number__isnull=False,
+            )
+            .exclude(employee__social_security_number="")
+            .values_list(
+                "pk",
+                "company_id",
+                # the blind index of the employee is stored as such
+                "employee__social_security_number",
+                "start_date",
+                "end_date",
+            )
+        )
+        periods = [
+            self.model(
+                application_id=pk,
+                company_id=company_id,
+                social_security_number_hash=social_security_number_hash,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            for (
+                pk,
+                company_id,
+                social_security_number_hash,
+                start_date,
+                end_date,
+            ) in applications.iterator()
+        ]
+        periods += [
+            self.model(
+                previous_benefit=previous_benefit,
+                company_id=previous_benefit.company_id,
+                social_security_number_hash=hash_social_security_number(
+                    previous_benefit.social_security_number
+                ),
+                start_date=previous_benefit.start_date,
+                end_date=previous_benefit.end_date,
+            )
+            for previous_benefit in previous_benefit_model.objects.iterator()
+        ]
+        self.all().delete()
+        return len(self.bulk_create(periods, batch_size=1000))
+
+
+class FormerBenefitPeriod(models.Model, DurationMixin):
+    """
+    Index of the benefit periods that have been granted to an employee by a company,
+    used for aggregating the former benefits (see applications.benefit_aggregation).
+
+    There is one row for each accepted application with the employee's social security
+    number and the benefit dates entered, and one row for each PreviousBenefit. The
+    social security number is stored only as the blind index of
+    Employee.social_security_number. The rows are updated when an Application, an
+    Employee or a PreviousBenefit is saved with changes to the indexed fields, and
+    deleted with them. Queryset updates do not update the rows, so the daily jobs run the
+    rebuild_former_benefit_periods management command, which can also be run after
+    updating the benefits in bulk.
+    """
+
+    objects = FormerBenefitPeriodManager()
+
+    social_security_number_hash = models.CharField(
+        max_length=Employee._meta.get_field("social_security_number").max_length,
+        verbose_name=_("social security number hash"),
+    )
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="former_benefit_periods",
+        verbose_name=_("company"),
+    )
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="former_benefit_period",
+        verbose_name=_("application"),
+    )
+    previous_benefit = models.OneToOneField(
+        "calculator.PreviousBenefit",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="former_benefit_period",
+        verbose_name=_("previous benefit"),
+    )
+    start_date = models.DateField(verbose_name=_("benefit start from date"))
+    end_date = models.DateField(verbose_name=_("benefit end date"))
+
+    def __str__(self):
+        return f"Former benefit period {self.start_date}-{self.end_date}"
+
+    class Meta:
+        db_table = "bf_applications_formerbenefitperiod"
+        verbose_name = _("former benefit period")
+        verbose_name_plural = _("former benefit periods")
+        indexes = [
+            models.Index(
+                fields=["social_security_number_hash", "company", "start_date"],
+                name="former_benefit_period_idx",
+            )
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(application__isnull=False, previous_benefit__isnull=True)
+                | Q(application__isnull=True, previous_benefit__isnull=False),
+                name="former_benefit_period_has_one_source",
+            )
+        ]
 
 
 def cleanup_filename(instance, filename):
@@ -1111,6 +1477,13 @@ class Attachment(UUIDModel, TimeStampedModel):
         verbose_name_plural = _("attachments")
         ordering = ["application__created_at", "attachment_type", "created_at"]
 
+    def save(self, *args, **kwargs):
+        if self.attachment_file and not self.attachment_file._committed:
+            # The hash of a new file is computed from the uploaded content before it is
+            # stored, so that the Ahjo payloads do not need to read the file again
+            self.ahjo_hash_value = hash_file_content(self.attachment_file)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return "{} {}".format(self.attachment_type, self.attachment_file.name)
 
@@ -1169,6 +1542,12 @@ class AhjoStatus(TimeStampedModel):
     def __str__(self):
         return self.status
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        if is_new:
+            AhjoOutboxEntry.objects.enqueue_for_ahjo_status(self)
+
     class Meta:
         db_table = "bf_applications_ahjo_status"
         verbose_name = _("ahjo status")
@@ -1178,6 +1557,331 @@ class AhjoStatus(TimeStampedModel):
         UniqueConstraint(fields=["application_id", "status"], name="unique_status")
 
 
+class AhjoOutboxEntryManager(models.Manager):
+    def enqueue_for_ahjo_status(self, ahjo_status: AhjoStatus):
+        """Add the request that the new Ahjo status of an application calls for, if any,
+        to the outbox."""
+        request_type = AhjoOutboxEntry.REQUEST_TYPE_FOR_AHJO_STATUS.get(
+            ahjo_status.status
+        )
+        if request_type is None:
+            return None
+        # There can be only one pending entry per application and request type. If one
+        # already exists, point it to the latest status. The entries that are being sent
+        # are not pending, so a status that arrives meanwhile is queued in a new entry.
+        entry, _ = self.update_or_create(
+            application_id=ahjo_status.application_id,
+            request_type=request_type,
+            state=AhjoOutboxState.PENDING,
+            defaults={"ahjo_status": ahjo_status},
+        )
+        return entry
+
+    def claim(
+        self, request_type: AhjoRequestType, limit: int
+    ) -> List["AhjoOutboxEntry"]:
+        """
+        Claim the pending entries of the request type that are due. The rows are selected
+        with FOR UPDATE SKIP LOCKED, so several workers can claim entries at the same time
+        without getting the same ones. The claimed entries are in progress until they are
+        completed or AhjoOutboxEntry.CLAIM_TIMEOUT has passed, so if the worker dies
+        before completing them, they are claimed again later. A pending entry is not
+        claimed while the previous request of the application is in progress.
+        """
+        now = timezone.now()
+        request_in_progress = self.filter(
+            application_id=OuterRef("application_id"),
+            request_type=request_type,
+            state=AhjoOutboxState.IN_PROGRESS,
+        )
+        with transaction.atomic():
+            entries = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(state=AhjoOutboxState.PENDING) & ~Exists(request_in_progress)
+                    | Q(state=AhjoOutboxState.IN_PROGRESS),
+                    request_type=request_type,
+                    next_attempt_at__lte=now,
+                )
+                .order_by("next_attempt_at")[:limit]
+            )
+            for entry in entries:
+                entry.state = AhjoOutboxState.IN_PROGRESS
+                entry.next_attempt_at = now + AhjoOutboxEntry.CLAIM_TIMEOUT
+            self.filter(pk__in=[entry.pk for entry in entries]).update(
+                state=AhjoOutboxState.IN_PROGRESS,
+                next_attempt_at=now + AhjoOutboxEntry.CLAIM_TIMEOUT,
+                modified_at=now,
+            )
+        return entries
+
+
+class AhjoOutboxEntry(UUIDModel, TimeStampedModel):
+    """
+    A request waiting to be sent to Ahjo. The entries are added when an application gets
+    an Ahjo status that requires a request to be sent, and processed by the
+    process_ahjo_outbox command. Failed requests are retried with an exponential backoff
+    until MAX_ATTEMPTS is reached.
+    """
+
+    REQUEST_TYPE_FOR_AHJO_STATUS = {
+        AhjoStatusEnum.SUBMITTED_BUT_NOT_SENT_TO_AHJO: AhjoRequestType.OPEN_CASE,
+        AhjoStatusEnum.CASE_OPENED: AhjoRequestType.SEND_DECISION_PROPOSAL,
+        AhjoStatusEnum.NEW_RECORDS_RECEIVED: AhjoRequestType.SEND_DECISION_PROPOSAL,
+        AhjoStatusEnum.DECISION_PROPOSAL_ACCEPTED: AhjoRequestType.UPDATE_APPLICATION,
+        AhjoStatusEnum.SIGNED_IN_AHJO: AhjoRequestType.GET_DECISION_DETAILS,
+        AhjoStatusEnum.SCHEDULED_FOR_DELETION: AhjoRequestType.DELETE_APPLICATION,
+    }
+
+    MAX_ATTEMPTS = 8
+    RETRY_BASE_DELAY = timedelta(minutes=15)
+    RETRY_MAX_DELAY = timedelta(days=1)
+    # how long to wait before checking again an application that is not yet ready
+    # for the request, e.g. an application that has not been taken into handling
+    NOT_READY_DELAY = timedelta(minutes=15)
+    CLAIM_TIMEOUT = timedelta(hours=1)
+
+    objects = AhjoOutboxEntryManager()
+
+    application = models.ForeignKey(
+        Application,
+        verbose_name=_("application"),
+        related_name="ahjo_outbox_entries",
+        on_delete=models.CASCADE,
+    )
+    ahjo_status = models.ForeignKey(
+        AhjoStatus,
+        verbose_name=_("ahjo status"),
+        help_text=_("The Ahjo status that caused the request to be queued"),
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    request_type = models.CharField(
+        max_length=64,
+        verbose_name=_("request type"),
+        choices=AhjoRequestType.choices,
+    )
+    state = models.CharField(
+        max_length=64,
+        verbose_name=_("state"),
+        choices=AhjoOutboxState.choices,
+        default=AhjoOutboxState.PENDING,
+    )
+    attempts = models.PositiveIntegerField(verbose_name=_("attempts"), default=0)
+    next_attempt_at = models.DateTimeField(
+        verbose_name=_("next attempt at"), default=timezone.now
+    )
+
+    def get_retry_delay(self, attempts: Optional[int] = None) -> timedelta:
+        """The delay after the latest failed attempt, doubled on each attempt."""
+        if attempts is None:
+            attempts = self.attempts
+        exponent = min(max(attempts - 1, 0), 16)
+        return min(self.RETRY_BASE_DELAY * 2**exponent, self.RETRY_MAX_DELAY)
+
+    def _complete(self, **fields) -> bool:
+        """
+        Update the fields of the claimed entry if it is still in progress. Only the given
+        fields are updated, so the changes that have been made to the entry meanwhile
+        are not overwritten.
+        """
+        updated = AhjoOutboxEntry.objects.filter(
+            pk=self.pk, state=AhjoOutboxState.IN_PROGRESS
+        ).update(modified_at=timezone.now(), **fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        return bool(updated)
+
+    def _release(self, delay: timedelta, **fields) -> bool:
+        """
+        Return the claimed entry to the queue. If a newer request of the same type has
+        been queued for the application while the entry was in progress, the entry is
+        cancelled instead, because the newer entry replaces it.
+        """
+        try:
+            with transaction.atomic():
+                return self._complete(
+                    state=AhjoOutboxState.PENDING,
+                    next_attempt_at=timezone.now() + delay,
+                    **fields,
+                )
+        except IntegrityError:
+            return self._complete(state=AhjoOutboxState.CANCELLED, **fields)
+
+    def mark_sent(self):
+        self._complete(state=AhjoOutboxState.SENT, attempts=self.attempts + 1)
+
+    def mark_failed(self):
+        attempts = self.attempts + 1
+        if attempts >= self.MAX_ATTEMPTS:
+            self._complete(state=AhjoOutboxState.DEAD, attempts=attempts)
+        else:
+            self._release(self.get_retry_delay(attempts=attempts), attempts=attempts)
+
+    def mark_cancelled(self):
+        self._complete(state=AhjoOutboxState.CANCELLED)
+
+    def postpone(self):
+        self._release(self.NOT_READY_DELAY)
+
+    def __str__(self):
+        return f"{self.request_type} for {self.application_id}: {self.state}"
+
+    class Meta:
+        db_table = "bf_applications_ahjo_outbox_entry"
+        verbose_name = _("ahjo outbox entry")
+        verbose_name_plural = _("ahjo outbox entries")
+        ordering = ["created_at"]
+        constraints = [
+            UniqueConstraint(
+                fields=["application", "request_type"],
+                condition=Q(state=AhjoOutboxState.PENDING),
+                name="bf_applications_ahjo_outbox_entry_unique_pending",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["request_type", "next_attempt_at"],
+                condition=Q(
+                    state__in=[AhjoOutboxState.PENDING, AhjoOutboxState.IN_PROGRESS]
+                ),
+                name="bf_ahjo_outbox_queued_idx",
+            )
+        ]
+
+
+def export_job_file_path(instance, filename):
+    # the job id keeps the files of different jobs apart even if their names are the same
+    return f"export_jobs/{instance.pk}/{cleanup_filename(instance, filename)}"
+
+
+class ExportJobManager(models.Manager):
+    def claim(self, limit: int) -> List["ExportJob"]:
+        """
+        Claim the oldest pending jobs and mark them as running. The rows are selected with
+        FOR UPDATE SKIP LOCKED, so several workers can claim jobs at the same time without
+        getting the same ones. Jobs that have been running for longer than
+        ExportJob.RUNNING_TIMEOUT are assumed to belong to a worker that has died, and
+        are claimed again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(state=ExportJobState.PENDING)
+                    | Q(
+                        state=ExportJobState.RUNNING,
+                        started_at__lt=now - ExportJob.RUNNING_TIMEOUT,
+                    )
+                )
+                .order_by("created_at")[:limit]
+            )
+            for job in jobs:
+                job.state = ExportJobState.RUNNING
+                job.started_at = now
+            self.bulk_update(jobs, ["state", "started_at"])
+        return jobs
+
+    def delete_expired(self) -> int:
+        """Delete the jobs older than ExportJob.EXPIRATION together with their files."""
+        expired_jobs = self.filter(created_at__lt=timezone.now() - ExportJob.EXPIRATION)
+        count = 0
+        for job in expired_jobs:
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
+            count += 1
+        return count
+
+
+class ExportJob(UUIDModel, TimeStampedModel):
+    """
+    An export of application data that is produced by the process_export_jobs command
+    instead of the HTTP request that asked for it. The file is downloaded when the job
+    is done, and deleted with the job after EXPIRATION.
+    """
+
+    RUNNING_TIMEOUT = timedelta(hours=1)
+    EXPIRATION = timedelta(days=7)
+
+    objects = ExportJobManager()
+
+    export_type = models.CharField(
+        max_length=64,
+        verbose_name=_("export type"),
+        choices=ExportJobType.choices,
+    )
+    state = models.CharField(
+        max_length=64,
+        verbose_name=_("state"),
+        choices=ExportJobState.choices,
+        default=ExportJobState.PENDING,
+    )
+    created_by = models.ForeignKey(
+        User,
+        verbose_name=_("created by"),
+        related_name="export_jobs",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    applications = models.ManyToManyField(
+        Application,
+        verbose_name=_("applications"),
+        related_name="+",
+        blank=True,
+    )
+    file_name = models.CharField(
+        max_length=256,
+        verbose_name=_("file name"),
+        help_text=_("Name of the exported file without the suffix"),
+    )
+    file = models.FileField(
+        verbose_name=_("exported file"),
+        upload_to=export_job_file_path,
+        null=True,
+        blank=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name=_("started at"), null=True, blank=True
+    )
+    completed_at = models.DateTimeField(
+        verbose_name=_("completed at"), null=True, blank=True
+    )
+    error = models.TextField(verbose_name=_("error"), blank=True)
+
+    def mark_done(self):
+        self.state = ExportJobState.DONE
+        self.completed_at = timezone.now()
+        self.save()
+
+    def mark_failed(self, error: str):
+        self.state = ExportJobState.FAILED
+        self.completed_at = timezone.now()
+        self.error = error
+        self.save()
+
+    def __str__(self):
+        return f"{self.export_type} {self.file_name}: {self.state}"
+
+    class Meta:
+        db_table = "bf_applications_export_job"
+        verbose_name = _("export job")
+        verbose_name_plural = _("export jobs")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(state__in=[ExportJobState.PENDING, ExportJobState.RUNNING]),
+                name="bf_export_job_unfinished_idx",
+            )
+        ]
+
+
 class DecisionProposalTemplateSection(UUIDModel, TimeStampedModel):
     """Model representing a template section of a decision proposal text, usually either the decision
     text or the following justification text.
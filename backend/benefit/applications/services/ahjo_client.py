@@ -139,11 +139,18 @@ class MissingHandlerIdError(AhjoApiClientException):
 
 
 class AhjoApiClient:
-    def __init__(self, ahjo_token: AhjoToken, ahjo_request: AhjoRequest) -> None:
+    def __init__(
+        self,
+        ahjo_token: AhjoToken,
+        ahjo_request: AhjoRequest,
+        session: Optional[requests.Session] = None,
+    ) -> None:
         self._timeout = settings.AHJO_REQUEST_TIMEOUT
         self._ahjo_token = None
         self.ahjo_token = ahjo_token
         self._request = ahjo_request
+        # A shared session keeps the connections to Ahjo alive between the requests
+        self._session = session
 
     @property
     def ahjo_token(self) -> AhjoToken:
@@ -204,7 +211,8 @@ class AhjoApiClient:
             headers = self.prepare_ahjo_headers()
             data = json.dumps(data)
             api_url = self._request.api_url()
-            response = requests.request(
+            send_request = self._session.request if self._session else requests.request
+            response = send_request(
                 method,
                 api_url,
                 headers=headers,
@@ -1,14 +1,17 @@
 import logging
 import os
+import tempfile
 import uuid
 import zipfile
 from collections import defaultdict
-from dataclasses import dataclass
-from io import BytesIO
-from typing import List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
 
 import jinja2
 import pdfkit
+import requests
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.core.files.base import ContentFile
@@ -52,7 +55,8 @@ from companies.models import Company
 @dataclass
 class ExportFileInfo:
     filename: str
-    file_content: bytes
+    # None for PDF files that have not been converted from the HTML content yet
+    file_content: Optional[bytes]
     html_content: str
 
 
@@ -172,11 +176,19 @@ JINJA_TEMPLATES_SINGLE = {
 }
 LOGGER = logging.getLogger(__name__)
 
+# Each conversion runs in its own wkhtmltopdf process
+PDF_CONVERSION_MAX_WORKERS = min(4, os.cpu_count() or 1)
 
-def _get_template(path):
+
+@lru_cache(maxsize=None)
+def _get_template_environment() -> jinja2.Environment:
+    # The environment caches the compiled templates, so it is shared by all exports
     template_loader = jinja2.FileSystemLoader(searchpath=PDF_PATH)
-    env = jinja2.Environment(loader=template_loader, autoescape=True)
-    return env.get_template(path)
+    return jinja2.Environment(loader=template_loader, autoescape=True)
+
+
+def _get_template(path):
+    return _get_template_environment().get_template(path)
 
 
 def _get_granted_as_de_minimis_aid(app):
@@ -306,13 +318,35 @@ def generate_pdf(
             company_name="", attachment_number=attachment_number
         )
     html: str = template.render({**template_config["context"], "apps": apps})
+    # The HTML is converted to PDF in convert_pdf_files(), so that the files of an export
+    # can be converted in parallel
     return ExportFileInfo(
         filename=file_name,
-        file_content=pdfkit.from_string(html, False),
+        file_content=None,
         html_content=html,
     )
 
 
+def _convert_html_to_pdf(html: str) -> bytes:
+    return pdfkit.from_string(html, False)
+
+
+def convert_pdf_files(files: List[ExportFileInfo]) -> Iterator[ExportFileInfo]:
+    """Yield the files in the original order, with the PDF files converted from their HTML
+    content. Several wkhtmltopdf processes are run at the same time, and each PDF is only
+    kept in memory until it has been yielded."""
+    with ThreadPoolExecutor(max_workers=PDF_CONVERSION_MAX_WORKERS) as executor:
+        pdf_contents = executor.map(
+            _convert_html_to_pdf,
+            [f.html_content for f in files if f.file_content is None],
+        )
+        for f in files:
+            if f.file_content is None:
+                yield replace(f, file_content=next(pdf_contents))
+            else:
+                yield f
+
+
 def generate_single_declined_file(
     company: Company, apps: List[Application], attachment_number: int
 ) -> ExportFileInfo:
@@ -365,17 +399,26 @@ def generate_composed_files(
     ]
 
 
-def generate_zip(files: List[ExportFileInfo]) -> bytes:
-    mem_zip = BytesIO()
-
-    with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for f in files:
+def write_zip(files: List[ExportFileInfo], output: BinaryIO) -> None:
+    with zipfile.ZipFile(output, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for f in convert_pdf_files(files):
             zf.writestr(f.filename, f.file_content)
 
-    return mem_zip.getvalue()
+
+def generate_zip(files: List[ExportFileInfo]) -> BinaryIO:
+    """Write the files into a ZIP archive in a temporary file and return the file, positioned
+    at the start. The file is deleted when it is closed."""
+    zip_file = tempfile.TemporaryFile()
+    try:
+        write_zip(files, zip_file)
+    except BaseException:
+        zip_file.close()
+        raise
+    zip_file.seek(0)
+    return zip_file
 
 
-def export_application_batch(batch) -> bytes:
+def export_application_batch(batch) -> BinaryIO:
     apps = (
         batch.applications.select_related("company")
         .select_related("employee")
@@ -468,12 +511,14 @@ def create_status_for_application(application: Application, status: AhjoStatusEn
 
 
 def send_open_case_request_to_ahjo(
-    application: Application, ahjo_token: AhjoToken
+    application: Application,
+    ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[Application, str], Tuple[None, None]]:
     """Open a case in Ahjo."""
 
     ahjo_request = AhjoOpenCaseRequest(application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
 
     pdf_summary = generate_application_attachment(
         application, AttachmentType.PDF_SUMMARY
@@ -489,12 +534,14 @@ def send_open_case_request_to_ahjo(
 
 
 def delete_application_in_ahjo(
-    application: Application, ahjo_token: AhjoToken
+    application: Application,
+    ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[Application, str], None]:
     """Delete/cancel an application in Ahjo."""
 
     ahjo_request = AhjoDeleteCaseRequest(application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
 
     result, response_text = ahjo_client.send_request_to_ahjo(None)
     if result:
@@ -503,14 +550,16 @@ def delete_application_in_ahjo(
 
 
 def update_application_summary_record_in_ahjo(
-    application: Application, ahjo_token: AhjoToken
+    application: Application,
+    ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[Application, str], None]:
     """Update the application summary pdf in Ahjo.
     Should be done just before the decision proposal is sent.
     """
 
     ahjo_request = AhjoUpdateRecordsRequest(application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
 
     pdf_summary = generate_application_attachment(
         application, AttachmentType.PDF_SUMMARY
@@ -527,13 +576,14 @@ def update_application_summary_record_in_ahjo(
 def send_new_attachment_records_to_ahjo(
     application: Application,
     ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[Application, str], None]:
     """Send any new attachments, that have been added after opening a case, to Ahjo."""
 
     # TODO add a check for application status,
     # so that only applications in the correct status have their attachments sent
     ahjo_request = AhjoAddRecordsRequest(application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
 
     attachments = application.attachments.all()
 
@@ -545,12 +595,14 @@ def send_new_attachment_records_to_ahjo(
 
 
 def send_decision_proposal_to_ahjo(
-    application: Application, ahjo_token: AhjoToken
+    application: Application,
+    ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[Application, str], None]:
     """Send a decision proposal and it's XML attachments to Ahjo."""
 
     ahjo_request = AhjoDecisionProposalRequest(application=application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
 
     delete_existing_xml_attachments(application)
 
@@ -599,8 +651,10 @@ def send_subscription_request_to_ahjo(
 
 
 def get_decision_details_from_ahjo(
-    application: Application, ahjo_token: AhjoToken
+    application: Application,
+    ahjo_token: AhjoToken,
+    session: Optional[requests.Session] = None,
 ) -> Union[List, None]:
     ahjo_request = AhjoDecisionDetailsRequest(application)
-    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request)
+    ahjo_client = AhjoApiClient(ahjo_token, ahjo_request, session=session)
     return ahjo_client.send_request_to_ahjo()
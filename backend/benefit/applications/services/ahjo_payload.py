@@ -135,9 +135,12 @@ def _prepare_record_document_dict(attachment: Attachment) -> dict:
     """Prepare a documents dict for a record"""
     # If were running in mock mode, use the local file URI
     file_url = reverse("ahjo_attachment_url", kwargs={"uuid": attachment.id})
-    hash_value = hash_file(attachment.attachment_file)
-    attachment.ahjo_hash_value = hash_value
-    attachment.save()
+    hash_value = attachment.ahjo_hash_value
+    if not hash_value:
+        # The hash is stored on upload, so only the older attachments are hashed here
+        hash_value = hash_file(attachment.attachment_file)
+        attachment.ahjo_hash_value = hash_value
+        attachment.save(update_fields=["ahjo_hash_value"])
     return {
         "FileName": f"{attachment.attachment_file.name}",
         "FormatName": f"{attachment.content_type}",
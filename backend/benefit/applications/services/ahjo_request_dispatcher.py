@@ -0,0 +1,109 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import requests
+from django.conf import settings
+from django.db import connections
+from requests.adapters import HTTPAdapter
+
+from applications.enums import AhjoRequestType
+from applications.models import Application
+from applications.services.ahjo_authentication import AhjoToken
+
+LOGGER = logging.getLogger(__name__)
+
+# The maximum number of requests of each type that are in progress at the same time.
+# Opening a case and sending a decision proposal generate the attachments before the
+# request is sent, so they are kept lower than the other request types.
+AHJO_REQUEST_TYPE_MAX_WORKERS = {
+    AhjoRequestType.OPEN_CASE: 4,
+    AhjoRequestType.SEND_DECISION_PROPOSAL: 4,
+    AhjoRequestType.ADD_RECORDS: 6,
+    AhjoRequestType.UPDATE_APPLICATION: 4,
+    AhjoRequestType.GET_DECISION_DETAILS: 8,
+    AhjoRequestType.DELETE_APPLICATION: 6,
+}
+
+
+def get_max_workers(request_type: AhjoRequestType) -> int:
+    """Return the number of concurrent requests allowed for the request type, capped by the
+    AHJO_REQUEST_MAX_WORKERS setting."""
+    return max(
+        1,
+        min(
+            AHJO_REQUEST_TYPE_MAX_WORKERS.get(request_type, 1),
+            settings.AHJO_REQUEST_MAX_WORKERS,
+        ),
+    )
+
+
+class AhjoRequestDispatcher:
+    """Send the requests of one request type to Ahjo using a bounded pool of threads.
+
+    All requests share one keep-alive session. The request handler of each application is run
+    in a worker thread, and the results are returned in the same order as the applications
+    were given, so the database updates done after a successful request stay in order.
+    """
+
+    def __init__(
+        self,
+        request_type: AhjoRequestType,
+        ahjo_token: AhjoToken,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.request_type = request_type
+        self.ahjo_token = ahjo_token
+        self.max_workers = max_workers or get_max_workers(request_type)
+        self.session = requests.Session()
+        # keep one connection per worker in the pool instead of discarding them
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_workers,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self) -> "AhjoRequestDispatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _send(
+        self, request_handler: Callable, application: Application
+    ) -> Tuple[Optional[Application], object]:
+        try:
+            return request_handler(application, self.ahjo_token, session=self.session)
+        finally:
+            # each worker thread has its own database connection
+            connections.close_all()
+
+    def dispatch(
+        self, request_handler: Callable, applications: Iterable[Application]
+    ) -> Iterator[Tuple[Application, Future]]:
+        """Start sending the requests and yield (application, future) tuples in the order of
+        the applications. Calling future.result() returns the result of the request handler,
+        or raises the exception raised by it."""
+        LOGGER.debug(
+            f"Sending {self.request_type} requests to Ahjo with {self.max_workers} workers"
+        )
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"ahjo-{self.request_type}",
+        )
+        try:
+            futures = [
+                (
+                    application,
+                    executor.submit(self._send, request_handler, application),
+                )
+                for application in applications
+            ]
+            yield from futures
+        finally:
+            # if the caller stops early, do not start the requests that are still queued
+            executor.shutdown(wait=True, cancel_futures=True)
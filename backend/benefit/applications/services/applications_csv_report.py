@@ -1,15 +1,27 @@
 from typing import List
 
+from django.db.models import Prefetch, QuerySet
 from django.utils import translation
 
-from applications.enums import ApplicationBatchStatus, ApplicationOrigin, BenefitType
+from applications.enums import (
+    ApplicationBatchStatus,
+    ApplicationOrigin,
+    ApplicationStatus,
+    BenefitType,
+)
+from applications.models import ApplicationLogEntry
 from applications.services.csv_export_base import (
     CsvColumn,
     CsvExportBase,
     get_organization_type,
-    nested_queryset_attr,
 )
 
+DECISION_STATUSES = [
+    ApplicationStatus.ACCEPTED,
+    ApplicationStatus.CANCELLED,
+    ApplicationStatus.REJECTED,
+]
+
 
 def csv_default_column(*args, **kwargs):
     # define a default value, as the application csv export needs to be able to handle
@@ -19,6 +31,15 @@ def csv_default_column(*args, **kwargs):
     return CsvColumn(*args, **kwargs)
 
 
+def get_latest_decision_comment(application):
+    if hasattr(application, "decision_log_entries"):
+        # prefetched by ApplicationsCsvService, latest first
+        if application.decision_log_entries:
+            return application.decision_log_entries[0].comment
+        return None
+    return application.latest_decision_comment
+
+
 def get_export_notes(application):
     """
     Report situations where the data does not fit in the fixed number of CSV columns.
@@ -26,13 +47,13 @@ def get_export_notes(application):
     """
     notes = []
     if (
-        application.de_minimis_aid_set.count()
+        len(application.csv_de_minimis_aids)
         > ApplicationsCsvService.MAX_DE_MINIMIS_AIDS
     ):
         notes.append("osa de minimis -tuista puuttuu raportilta")
-    if application.pay_subsidies.count() > ApplicationsCsvService.MAX_PAY_SUBSIDIES:
+    if len(application.csv_pay_subsidies) > ApplicationsCsvService.MAX_PAY_SUBSIDIES:
         notes.append("osa palkkatuista puuttuu raportilta")
-    if application.ahjo_rows.count() > ApplicationsCsvService.MAX_AHJO_ROWS:
+    if len(application.csv_ahjo_rows) > ApplicationsCsvService.MAX_AHJO_ROWS:
         notes.append("osa Ahjo-riveistä puuttuu raportilta")
     return ", ".join(notes)
 
@@ -57,7 +78,7 @@ def format_bool(value):
 
 def current_ahjo_row_field_getter(field_name):
     def getter(item):
-        if rows := list(item.ahjo_rows):
+        if rows := item.csv_ahjo_rows:
             if item.application_row_idx - 1 < len(rows):
                 # application_row_idx is 1-based
                 return getattr(rows[item.application_row_idx - 1], field_name)
@@ -66,6 +87,30 @@ def current_ahjo_row_field_getter(field_name):
     return getter
 
 
+def ahjo_row_field_getter(idx, field_name):
+    def getter(item):
+        if idx < len(item.csv_ahjo_rows):
+            return getattr(item.csv_ahjo_rows[idx], field_name)
+        return ""
+
+    return getter
+
+
+def related_list_field_getter(list_name, idx, field_name, default_value=""):
+    """
+    Like nested_queryset_attr, but reads a list of related objects that get_row_items has
+    stored in the item, so that the related manager is not created again for every cell.
+    """
+
+    def getter(item):
+        related_objects = getattr(item, list_name)
+        if idx < len(related_objects):
+            return getattr(related_objects[idx], field_name)
+        return default_value
+
+    return getter
+
+
 def get_benefit_type_label(benefit_type) -> str:
     return str(BenefitType(benefit_type).label)
 
@@ -274,7 +319,7 @@ class ApplicationsCsvService(CsvExportBase):
                 default_value=None,
             ),
             csv_default_column(
-                "Hyväksymisen/hylkäyksen/peruutuksen syy", "latest_decision_comment"
+                "Hyväksymisen/hylkäyksen/peruutuksen syy", get_latest_decision_comment
             ),
             csv_default_column("Päättäjän nimike", "batch.decision_maker_title"),
             csv_default_column("Päättäjän nimi", "batch.decision_maker_name"),
@@ -293,7 +338,7 @@ class ApplicationsCsvService(CsvExportBase):
             csv_default_column("Hyväksyjän nimi P2P", "batch.p2p_checker_name"),
             # In case there are multiple rows per application, always have the nth ahjo row
             # in the same column.
-            # The row data here comes from calculation.ahjo_rows[application_row_idx - 1]
+            # The row data here comes from csv_ahjo_rows[application_row_idx - 1]
             CsvColumn(
                 "Siirrettävä Ahjo-rivi / tyyppi",
                 current_ahjo_row_field_getter("row_type"),
@@ -325,27 +370,27 @@ class ApplicationsCsvService(CsvExportBase):
                 [
                     CsvColumn(
                         f"Ahjo-rivi {idx + 1} / tyyppi",
-                        nested_queryset_attr("ahjo_rows", idx, "row_type"),
+                        ahjo_row_field_getter(idx, "row_type"),
                     ),
                     CsvColumn(
                         f"Ahjo-rivi {idx + 1} / teksti",
-                        nested_queryset_attr("ahjo_rows", idx, "description_fi"),
+                        ahjo_row_field_getter(idx, "description_fi"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / määrä eur yht",
-                        nested_queryset_attr("ahjo_rows", idx, "amount"),
+                        ahjo_row_field_getter(idx, "amount"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / määrä eur kk",
-                        nested_queryset_attr("ahjo_rows", idx, "monthly_amount"),
+                        ahjo_row_field_getter(idx, "monthly_amount"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / alkupäivä",
-                        nested_queryset_attr("ahjo_rows", idx, "start_date"),
+                        ahjo_row_field_getter(idx, "start_date"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / päättymispäivä",
-                        nested_queryset_attr("ahjo_rows", idx, "end_date"),
+                        ahjo_row_field_getter(idx, "end_date"),
                     ),
                 ]
             )
@@ -354,26 +399,30 @@ class ApplicationsCsvService(CsvExportBase):
                 [
                     csv_default_column(
                         f"Palkkatuki {idx + 1} / alkupäivä",
-                        nested_queryset_attr("pay_subsidies", idx, "start_date"),
+                        related_list_field_getter(
+                            "csv_pay_subsidies", idx, "start_date"
+                        ),
                     ),
                     csv_default_column(
                         f"Palkkatuki {idx + 1} / päättymispäivä",
-                        nested_queryset_attr("pay_subsidies", idx, "end_date"),
+                        related_list_field_getter("csv_pay_subsidies", idx, "end_date"),
                     ),
                     csv_default_column(
                         f"Palkkatuki {idx + 1} / palkkatukiprosentti",
-                        nested_queryset_attr(
-                            "pay_subsidies", idx, "pay_subsidy_percent"
+                        related_list_field_getter(
+                            "csv_pay_subsidies", idx, "pay_subsidy_percent"
                         ),
                     ),
                     csv_default_column(
                         f"Palkkatuki {idx + 1} / työaikaprosentti",
-                        nested_queryset_attr("pay_subsidies", idx, "work_time_percent"),
+                        related_list_field_getter(
+                            "csv_pay_subsidies", idx, "work_time_percent"
+                        ),
                     ),
                     CsvColumn(
                         f"Palkkatuki {idx + 1} / vamma tai sairaus?",
-                        nested_queryset_attr(
-                            "pay_subsidies", idx, "disability_or_illness", None
+                        related_list_field_getter(
+                            "csv_pay_subsidies", idx, "disability_or_illness", None
                         ),
                         format_bool,
                     ),
@@ -385,15 +434,19 @@ class ApplicationsCsvService(CsvExportBase):
                 [
                     CsvColumn(
                         f"De minimis {idx + 1} / myöntäjä",
-                        nested_queryset_attr("de_minimis_aid_set", idx, "granter"),
+                        related_list_field_getter(
+                            "csv_de_minimis_aids", idx, "granter"
+                        ),
                     ),
                     csv_default_column(
                         f"De minimis {idx + 1} / määrä",
-                        nested_queryset_attr("de_minimis_aid_set", idx, "amount"),
+                        related_list_field_getter("csv_de_minimis_aids", idx, "amount"),
                     ),
                     csv_default_column(
                         f"De minimis {idx + 1} / myönnetty",
-                        nested_queryset_attr("de_minimis_aid_set", idx, "granted_at"),
+                        related_list_field_getter(
+                            "csv_de_minimis_aids", idx, "granted_at"
+                        ),
                     ),
                 ]
             )
@@ -419,12 +472,52 @@ class ApplicationsCsvService(CsvExportBase):
         ]
         return [col for col in columns if col.heading not in sensitive_col_headings]
 
+    # The related objects that the columns read. They are fetched together with the
+    # applications, so that the number of queries does not depend on the number of
+    # applications, and the columns are resolved from the fetched objects.
+    SELECT_RELATED = ["company", "employee", "batch", "calculation"]
+    PREFETCH_RELATED = [
+        "calculation__rows",
+        "pay_subsidies",
+        "de_minimis_aid_set",
+        Prefetch(
+            "log_entries",
+            queryset=ApplicationLogEntry.objects.filter(
+                to_status__in=DECISION_STATUSES
+            ).order_by("-created_at"),
+            to_attr="decision_log_entries",
+        ),
+    ]
+    # The prefetches are done for each chunk of applications
+    CHUNK_SIZE = 500
+
     def get_applications(self):
+        if isinstance(self.applications, QuerySet):
+            return self.applications.select_related(
+                *self.SELECT_RELATED
+            ).prefetch_related(*self.PREFETCH_RELATED)
         return self.applications
 
+    def _iterate_applications(self):
+        applications = self.get_applications()
+        if isinstance(applications, QuerySet):
+            return applications.iterator(chunk_size=self.CHUNK_SIZE)
+        return applications
+
+    def _has_applications(self) -> bool:
+        applications = self.get_applications()
+        if isinstance(applications, QuerySet):
+            return applications.exists()
+        return bool(applications)
+
     def get_row_items(self):
         with translation.override("fi"):
-            for application in self.get_applications():
+            for application in self._iterate_applications():
+                application.csv_ahjo_rows = application.ahjo_rows
+                application.csv_pay_subsidies = list(application.pay_subsidies.all())
+                application.csv_de_minimis_aids = list(
+                    application.de_minimis_aid_set.all()
+                )
                 # for applications with multiple ahjo rows, output the same number of rows.
                 # If no Ahjo rows (calculation incomplete), always output just one row.
                 if self.prune_data_for_talpa:
@@ -433,7 +526,7 @@ class ApplicationsCsvService(CsvExportBase):
                     yield application
                     continue
                 for application_row_idx, unused in enumerate(
-                    application.ahjo_rows or [None]
+                    application.csv_ahjo_rows or [None]
                 ):
                     # The CSV output is easier to process in PowerBI
                     # if the rows belonging to the same application are numbered.
@@ -444,7 +537,7 @@ class ApplicationsCsvService(CsvExportBase):
                     yield application
 
     def get_csv_cell_list_lines_generator(self):
-        if self.get_applications():
+        if self._has_applications():
             yield from super().get_csv_cell_list_lines_generator()
         else:
             header_row = self._get_header_row()
@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta
 
+from django.db import transaction
 from django.db.models import Q
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from simple_history.models import ModelChange
+from simple_history.signals import post_create_historical_record
 
 from applications.enums import ApplicationStatus
 from applications.models import (
     Application,
+    ApplicationChangeHistory,
     ApplicationLogEntry,
     Attachment,
     DeMinimisAid,
@@ -223,21 +227,10 @@ def _filter_and_format_changes(
     )
 
 
-def get_application_change_history_made_by_handler(application: Application) -> list:
-    """
-    Get application change history between the point when application is received and
-    the current time. If the application has been in status
-    additional_information_needed, changes made then are not included.
-    This solution should work for getting changes made by handler.
-
-    NOTE: The same de minimis aid restriction here, so they are not tracked.
-    Also, changes made when application status is additional_information_needed are
-    not tracked, even if they are made by handler.
-    """
-
+def _get_handler_application_history(application: Application):
     # Get all edits made by staff users and the first edit which is queried as RECEIVED for some reason
     staff_users = User.objects.all().filter(is_staff=True).values_list("id", flat=True)
-    application_history = (
+    return (
         application.history.filter(
             history_user_id__in=list(staff_users),
             status__in=[
@@ -247,12 +240,29 @@ def get_application_change_history_made_by_handler(application: Application) ->
         | application.history.filter(status=ApplicationStatus.RECEIVED)[:1]
     )
 
+
+def _get_handler_change_sets(
+    application: Application, application_history: list, employee_base_record=None
+) -> tuple:
+    """
+    Compute the change sets between the consecutive application history records,
+    which are ordered from the newest to the oldest. The employee history records are
+    compared within the merge threshold of the application changes. If
+    employee_base_record is given, only the employee records newer than it are
+    compared to it and to each other.
+
+    :return: A tuple of a list of (new history record, change set or None) tuples, the
+    newest first, and the list of the compared employee history records.
+    """
     application_diffs = []
 
     for i in range(0, len(application_history) - 1):
         diff = application_history[i].diff_against(application_history[i + 1])
         application_diffs.append(diff)
 
+    if not application_diffs:
+        return [], []
+
     app_diff_dates = [diff.new_record.history_date for diff in application_diffs]
 
     # create Q objects for each datetime in the list
@@ -263,6 +273,10 @@ def get_application_change_history_made_by_handler(application: Application) ->
         q_objects |= Q(history_date__range=(start_date, end_date))
 
     employee_history = application.employee.history.filter(q_objects)
+    if employee_base_record:
+        employee_history = list(
+            employee_history.filter(history_date__gt=employee_base_record.history_date)
+        ) + [employee_base_record]
     employee_diffs = []
     for i in range(0, len(employee_history) - 1):
         diff = employee_history[i].diff_against(employee_history[i + 1])
@@ -284,17 +298,208 @@ def get_application_change_history_made_by_handler(application: Application) ->
 
         return change_set if len(change_set["changes"]) > 0 else None
 
-    change_sets = list(
-        filter(
-            None,
-            map(
-                lambda app_diff: create_change_set(app_diff, employee_diffs),
-                application_diffs,
-            ),
-        )
+    return [
+        (app_diff.new_record, create_change_set(app_diff, employee_diffs))
+        for app_diff in application_diffs
+    ], list(employee_history)
+
+
+def get_application_change_history_made_by_handler(application: Application) -> list:
+    """
+    Get application change history between the point when application is received and
+    the current time. If the application has been in status
+    additional_information_needed, changes made then are not included.
+    This solution should work for getting changes made by handler.
+
+    NOTE: The same de minimis aid restriction here, so they are not tracked.
+    Also, changes made when application status is additional_information_needed are
+    not tracked, even if they are made by handler.
+    """
+    change_sets, _ = _get_handler_change_sets(
+        application, list(_get_handler_application_history(application))
     )
+    return [change_set for _, change_set in change_sets if change_set]
+
+
+def _dump_change_set(change_set: dict) -> dict:
+    return {**change_set, "date": change_set["date"].isoformat()}
+
 
-    return change_sets
+def _load_change_set(change_set: dict) -> dict:
+    return {**change_set, "date": datetime.fromisoformat(change_set["date"])}
+
+
+def _compare_new_handler_history(
+    application: Application, change_history: ApplicationChangeHistory
+) -> tuple:
+    """
+    Compare the application history records that are newer than the stored change sets
+    made by handlers. If the received record or the stored base records have changed,
+    the stored handler change sets of change_history are cleared, so that the history
+    is compared from the beginning.
+
+    :return: A tuple of the new (history record, change set or None) tuples, the newest
+    first, the compared employee history records and the history id of the received
+    application.
+    """
+    received_history_id = (
+        application.history.filter(status=ApplicationStatus.RECEIVED)
+        .values_list("history_id", flat=True)
+        .first()
+    )
+    base_record = employee_base_record = None
+    if change_history.handler_received_history_id == received_history_id:
+        if change_history.handler_history_id is not None:
+            base_record = application.history.filter(
+                history_id=change_history.handler_history_id
+            ).first()
+        if change_history.handler_employee_history_id is not None:
+            employee_base_record = application.employee.history.filter(
+                history_id=change_history.handler_employee_history_id
+            ).first()
+    if base_record is None or (
+        change_history.handler_employee_history_id is not None
+        and employee_base_record is None
+    ):
+        # the history has changed, so it is compared from the beginning
+        base_record = employee_base_record = None
+        change_history.handler_change_sets = []
+        change_history.handler_history_id = None
+        change_history.handler_employee_history_id = None
+
+    application_history = _get_handler_application_history(application)
+    if base_record:
+        application_history = list(
+            application_history.filter(history_date__gt=base_record.history_date)
+        ) + [base_record]
+    change_sets, employee_history = _get_handler_change_sets(
+        application, list(application_history), employee_base_record
+    )
+    return change_sets, employee_history, received_history_id
+
+
+def _get_applicant_log_entry_ids(application: Application) -> list:
+    application_log_entries = ApplicationLogEntry.objects.filter(
+        application=application
+    )
+    return [
+        str(log_entry_id)
+        for log_entry_id in (
+            application_log_entries.filter(from_status="handling")
+            .filter(to_status="additional_information_needed")
+            .values_list("id", flat=True)
+            .last(),
+            application_log_entries.filter(from_status="additional_information_needed")
+            .filter(to_status="handling")
+            .values_list("id", flat=True)
+            .last(),
+        )
+        if log_entry_id
+    ]
+
+
+def update_application_change_history(application_id) -> None:
+    """
+    Store the new change sets of the application. This is run after the transaction
+    that wrote the history records of the application or its employee has been
+    committed, so the employee records and the change reason written in the same
+    transaction are included in the change sets.
+    """
+    application = Application.objects.filter(pk=application_id).first()
+    if application is None:
+        return
+    with transaction.atomic():
+        ApplicationChangeHistory.objects.get_or_create(application=application)
+        # The row is locked, so that concurrent updates do not store the same change sets
+        change_history = ApplicationChangeHistory.objects.select_for_update().get(
+            application=application
+        )
+
+        (
+            change_sets,
+            employee_history,
+            received_history_id,
+        ) = _compare_new_handler_history(application, change_history)
+        if change_sets:
+            newest_record = change_sets[0][0]
+            change_history.handler_change_sets = [
+                _dump_change_set(change_set)
+                for _, change_set in change_sets
+                if change_set
+            ] + change_history.handler_change_sets
+            change_history.handler_received_history_id = received_history_id
+            change_history.handler_history_id = newest_record.history_id
+            change_history.handler_employee_history_id = next(
+                (
+                    record.history_id
+                    for record in employee_history
+                    if record.history_date
+                    <= newest_record.history_date
+                    + timedelta(seconds=merge_threshold_in_seconds)
+                ),
+                change_history.handler_employee_history_id,
+            )
+
+        applicant_log_entry_ids = _get_applicant_log_entry_ids(application)
+        if applicant_log_entry_ids != change_history.applicant_log_entry_ids:
+            change_history.applicant_change_sets = [
+                _dump_change_set(change_set)
+                for change_set in get_application_change_history_made_by_applicant(
+                    application
+                )
+            ]
+            change_history.applicant_log_entry_ids = applicant_log_entry_ids
+
+        change_history.save()
+
+
+@receiver(post_create_historical_record)
+def _schedule_change_history_update(sender, instance, history_instance, **kwargs):
+    if isinstance(instance, Application):
+        application = instance
+    elif isinstance(instance, Employee):
+        application = instance.application
+    else:
+        return
+    # The drafts have no change history
+    if application.status == ApplicationStatus.DRAFT:
+        return
+    application_id = application.pk
+    transaction.on_commit(lambda: update_application_change_history(application_id))
+
+
+def get_application_change_history(application: Application) -> dict:
+    """
+    Get the change history made by handlers and by the applicant from the stored
+    change sets, which are updated when the application is saved. Only the history
+    that is newer than the stored change sets is compared, and nothing is stored.
+    """
+    change_history = ApplicationChangeHistory.objects.filter(
+        application=application
+    ).first() or ApplicationChangeHistory(application=application)
+
+    change_sets, _, _ = _compare_new_handler_history(application, change_history)
+
+    if _get_applicant_log_entry_ids(application) == (
+        change_history.applicant_log_entry_ids
+    ):
+        applicant_change_sets = [
+            _load_change_set(change_set)
+            for change_set in change_history.applicant_change_sets
+        ]
+    else:
+        applicant_change_sets = get_application_change_history_made_by_applicant(
+            application
+        )
+
+    return {
+        "handler": [change_set for _, change_set in change_sets if change_set]
+        + [
+            _load_change_set(change_set)
+            for change_set in change_history.handler_change_sets
+        ],
+        "applicant": applicant_change_sets,
+    }
 
 
 def get_application_change_history_for_applicant_from_audit_log(
@@ -4,12 +4,14 @@ import decimal
 import operator
 from dataclasses import dataclass
 from io import StringIO
-from typing import Any, Callable, Generator, List, Union
+from typing import Any, Callable, Generator, List, TextIO, Union
 
 from applications.enums import OrganizationType
 
 NO_DEFAULT_VALUE = object()
 
+CSV_CELL_TYPES = (str, int, decimal.Decimal, datetime.date)
+
 
 @dataclass
 class CsvColumn:
@@ -52,6 +54,49 @@ def nested_queryset_attr(
     return getter
 
 
+def compile_csv_column(column: CsvColumn) -> Callable[[Any], Any]:
+    """
+    Return a function that returns the cell value of the column for an item. The data source,
+    default value and formatter of the column are resolved once, so that the function does
+    as little work as possible for each cell.
+    Notes:
+    * If cell_data_source is callable, then each item is passed as a paremeter to it,
+      and the resulting value is used to construct the CSV cell value
+    * if cell_data_source is a string, then it is treated as a dotted attribute reference (like "x" or "a.b")
+      and the corresponding attribute should be found in the item
+    """
+    has_default_value = column.default_value is not NO_DEFAULT_VALUE
+    default_value = column.default_value
+    formatter = column.formatter
+
+    if callable(column.cell_data_source):
+        get_value = column.cell_data_source
+    elif has_default_value:
+        attr_getter = operator.attrgetter(column.cell_data_source)
+
+        def get_value(item):
+            try:
+                return attr_getter(item)
+            except AttributeError:
+                return None
+
+    else:
+        get_value = operator.attrgetter(column.cell_data_source)
+
+    def get_cell(item):
+        cell_value = get_value(item)
+        if cell_value is None and has_default_value:
+            cell_value = default_value
+        if formatter:
+            # most common case: a dotted property like company.name
+            cell_value = formatter(cell_value)
+        if not isinstance(cell_value, CSV_CELL_TYPES):
+            raise ValueError("Invalid type in CSV export")
+        return cell_value
+
+    return get_cell
+
+
 class CsvExportBase:
     """
     Common code for CSV export interfaces.
@@ -59,7 +104,7 @@ class CsvExportBase:
     Classes deriving from CsvExportBase need to define:
     * CSV_COLUMNS: a list of CsvColumn objects
     * get_row_items: a function that returns a sequence of any objects. These objects
-      must be compatible with the CsvColumn.cell_data_source (see get_csv_cell_list_lines_generator)
+      must be compatible with the CsvColumn.cell_data_source (see compile_csv_column)
     """
 
     CSV_DELIMITER = ";"
@@ -74,49 +119,49 @@ class CsvExportBase:
             f.write(csv_string)
 
     def get_csv_string(self, remove_quotes: bool = False) -> str:
-        return "".join(  # Lines end with '\r\n' already so no need to add newlines here
-            self.get_csv_string_lines_generator(
-                remove_quotes=remove_quotes, add_bom=True
-            )
+        output = StringIO()
+        self.write_csv(output, remove_quotes=remove_quotes, add_bom=True)
+        return output.getvalue()
+
+    def write_csv(
+        self, output: TextIO, remove_quotes: bool = False, add_bom: bool = False
+    ) -> None:
+        """
+        Write the CSV lines to a text stream with a single csv.writer.writerows() call.
+        See get_csv_string_lines_generator() for the parameters.
+        """
+        if add_bom:
+            output.write("\ufeff")
+        self._get_csv_writer(output, remove_quotes).writerows(
+            self._check_line_lengths(self.get_csv_cell_list_lines_generator())
         )
 
+    def _get_csv_writer(self, output: TextIO, remove_quotes: bool):
+        quoting = csv.QUOTE_NONE if remove_quotes else csv.QUOTE_NONNUMERIC
+        return csv.writer(output, delimiter=self.CSV_DELIMITER, quoting=quoting)
+
+    @staticmethod
+    def _check_line_lengths(lines):
+        line_length = None
+        for line in lines:
+            if line_length is None:
+                line_length = len(line)
+            assert len(line) == line_length, "Each CSV line must have same column count"
+            yield line
+
     def get_csv_cell_list_lines_generator(
         self,
     ) -> Generator[List[Union[str, int, decimal.Decimal, datetime.date]], None, None]:
         """
-        Iterate through the objects returned by get_row_items. Use the CsvColumn objects in CSV_COLUMNS to
-        construct a CSV row from each item. Notes:
-        * If cell_data_source is callable, then each item is passed as a paremeter to it,
-          and the resulting value is used to construct the CSV cell value
-        * if cell_data_source is a string, then it is treated as a dotted attribute reference (like "x" or "a.b")
-          and the corresponding attribute should be found in the item
+        Iterate through the objects returned by get_row_items. The CsvColumn objects in
+        CSV_COLUMNS are compiled once per export (see compile_csv_column), and the compiled
+        columns are used to construct a CSV row from each item.
         """
-        yield self._get_header_row()
+        columns = self.CSV_COLUMNS
+        yield [col.heading for col in columns]
+        cell_getters = [compile_csv_column(column) for column in columns]
         for item in self.get_row_items():
-            line = []
-            for column in self.CSV_COLUMNS:
-                if callable(column.cell_data_source):
-                    cell_value = column.cell_data_source(item)
-                else:
-                    cell_value = None
-                    try:
-                        cell_value = operator.attrgetter(column.cell_data_source)(item)
-                    except AttributeError:
-                        if column.default_value is NO_DEFAULT_VALUE:
-                            raise
-
-                if cell_value is None and column.default_value is not NO_DEFAULT_VALUE:
-                    cell_value = column.default_value
-
-                if column.formatter:
-                    # most common case: a dotted property like company.name
-                    cell_value = column.formatter(cell_value)
-                if not isinstance(
-                    cell_value, (str, int, decimal.Decimal, datetime.date)
-                ):
-                    raise ValueError("Invalid type in CSV export")
-                line.append(cell_value)
-            yield line
+            yield [get_cell(item) for get_cell in cell_getters]
 
     def get_csv_string_lines_generator(
         self, remove_quotes: bool = False, add_bom: bool = False
@@ -128,21 +173,14 @@ class CsvExportBase:
         Passing remove_quotes=True will disable quoting of values as it is required by the Talpa integration.
         Passing add_bom=True will add a BOM (Byte Order Mark) at the beginning of the file.
         """
-        quoting = csv.QUOTE_NONE if remove_quotes else csv.QUOTE_NONNUMERIC
-
         io = StringIO()
-        csv_writer = csv.writer(io, delimiter=self.CSV_DELIMITER, quoting=quoting)
-        line_length_set = set()
+        csv_writer = self._get_csv_writer(io, remove_quotes)
 
         # Add BOM as the first item in the generator
         if add_bom:
             yield "\ufeff"
 
-        for line in self.get_csv_cell_list_lines_generator():
-            line_length_set.add(len(line))
-            assert (
-                len(line_length_set) == 1
-            ), "Each CSV line must have same column count"
+        for line in self._check_line_lengths(self.get_csv_cell_list_lines_generator()):
             csv_writer.writerow(line)
             yield io.getvalue()
             # Reset StringIO object
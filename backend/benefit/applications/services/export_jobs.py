@@ -0,0 +1,125 @@
+import io
+import logging
+import tempfile
+from typing import BinaryIO, List
+
+from django.core.files import File
+from django.db.models import QuerySet
+
+from applications.enums import ExportJobType
+from applications.models import Application, ExportJob
+from applications.services.ahjo_integration import (
+    ExportFileInfo,
+    prepare_csv_file,
+    prepare_pdf_files,
+    write_zip,
+)
+from applications.services.applications_csv_report import ApplicationsCsvService
+from users.models import User
+
+LOGGER = logging.getLogger(__name__)
+
+APPLICATION_ORDERING = "application_number"
+
+# Export types that produce a ZIP archive with the CSV file and the decision PDF files
+CSV_PDF_EXPORT_TYPES = [ExportJobType.APPLICATIONS_CSV_PDF, ExportJobType.TALPA_CSV_PDF]
+
+TALPA_EXPORT_TYPES = [ExportJobType.TALPA_CSV, ExportJobType.TALPA_CSV_PDF]
+
+
+def create_export_job(
+    export_type: ExportJobType,
+    queryset: QuerySet[Application],
+    user: User,
+    file_name: str,
+) -> ExportJob:
+    """Queue an export of the applications in the queryset. The applications are stored
+    with the job, so the export contains the same applications even if they change before
+    the job is processed."""
+    job = ExportJob.objects.create(
+        export_type=export_type,
+        created_by=user if user.is_authenticated else None,
+        file_name=str(file_name),
+    )
+    job.applications.set(queryset.values_list("pk", flat=True))
+    return job
+
+
+def get_export_job_queryset(job: ExportJob) -> QuerySet[Application]:
+    return (
+        Application.objects.filter(pk__in=job.applications.values("pk"))
+        .select_related("company", "employee", "batch", "calculation")
+        .prefetch_related(
+            "pay_subsidies", "training_compensations", "calculation__rows"
+        )
+        .order_by(APPLICATION_ORDERING)
+    )
+
+
+def write_csv(
+    queryset: QuerySet[Application],
+    output: BinaryIO,
+    prune_data_for_talpa: bool = False,
+    remove_quotes: bool = False,
+    prune_sensitive_data: bool = True,
+) -> None:
+    csv_service = ApplicationsCsvService(
+        queryset, prune_data_for_talpa, prune_sensitive_data
+    )
+    text_output = io.TextIOWrapper(
+        output, encoding=csv_service.FILE_ENCODING, newline=""
+    )
+    csv_service.write_csv(text_output, remove_quotes)
+    # leave the binary file open for the caller
+    text_output.detach()
+
+
+def write_csv_pdf_zip(
+    queryset: QuerySet[Application],
+    output: BinaryIO,
+    file_name: str,
+    prune_data_for_talpa: bool = False,
+) -> None:
+    csv_file = prepare_csv_file(queryset, prune_data_for_talpa, file_name)
+    pdf_files: List[ExportFileInfo] = prepare_pdf_files(queryset)
+    write_zip([csv_file] + pdf_files, output)
+
+
+def run_export_job(job: ExportJob) -> None:
+    """Produce the file of the job into a temporary file and save it to the storage."""
+    queryset = get_export_job_queryset(job)
+    prune_data_for_talpa = job.export_type in TALPA_EXPORT_TYPES
+
+    with tempfile.TemporaryFile() as output:
+        if job.export_type in CSV_PDF_EXPORT_TYPES:
+            suffix = "zip"
+            write_csv_pdf_zip(queryset, output, job.file_name, prune_data_for_talpa)
+        else:
+            suffix = "csv"
+            write_csv(
+                queryset,
+                output,
+                prune_data_for_talpa,
+                remove_quotes=prune_data_for_talpa,
+            )
+        output.seek(0)
+        job.file.save(f"{job.file_name}.{suffix}", File(output), save=False)
+    job.mark_done()
+
+
+def process_export_job(job: ExportJob) -> bool:
+    """
+    Run a claimed job and record the outcome. Return True if the export succeeded.
+
+    The export is not run in a transaction, because rendering the PDF files and storing
+    the file can take minutes. Only the state transitions of the job are saved.
+    """
+    try:
+        run_export_job(job)
+    except Exception as e:
+        LOGGER.exception(f"Export job {job.pk} failed")
+        if job.file:
+            job.file.delete(save=False)
+        job.mark_failed(str(e))
+        return False
+    return True
@@ -1,4 +1,3 @@
-import io
 import os
 import uuid
 import zipfile
@@ -39,6 +38,7 @@ from applications.services.ahjo_integration import (
     generate_composed_files,
     generate_single_approved_file,
     generate_single_declined_file,
+    generate_zip,
     get_application_for_ahjo,
     REJECTED_TITLE,
 )
@@ -252,8 +252,7 @@ def test_export_application_batch(application_batch):
         DecidedApplicationFactory.create(status=ApplicationStatus.CANCELLED)
     )
     zip_file = export_application_batch(application_batch)
-    file_like_object = io.BytesIO(zip_file)
-    archive = zipfile.ZipFile(file_like_object)
+    archive = zipfile.ZipFile(zip_file)
     assert (
         len(archive.infolist())
         == application_batch.applications.exclude(
@@ -264,6 +263,27 @@ def test_export_application_batch(application_batch):
     reseed(777)
 
 
+@patch("applications.services.ahjo_integration.pdfkit.from_string")
+def test_generate_zip_converts_pdf_files_in_order(mock_pdf_convert):
+    mock_pdf_convert.side_effect = lambda html, output_path: f"pdf {html}".encode()
+    files = [
+        ExportFileInfo(filename=f"file_{i}.pdf", file_content=None, html_content=str(i))
+        for i in range(10)
+    ]
+    csv_file = ExportFileInfo(
+        filename="export.csv", file_content=b"csv", html_content=""
+    )
+
+    with generate_zip([csv_file] + files) as zip_file:
+        archive = zipfile.ZipFile(zip_file)
+        assert archive.namelist() == ["export.csv"] + [f.filename for f in files]
+        assert archive.read("export.csv") == b"csv"
+        for i, f in enumerate(files):
+            assert archive.read(f.filename) == f"pdf {i}".encode()
+    # the CSV file is not converted
+    assert mock_pdf_convert.call_count == len(files)
+
+
 @patch("applications.services.ahjo_integration.pdfkit.from_string")
 def test_multiple_benefit_per_application(mock_pdf_convert):
     mock_pdf_convert.return_value = {}
@@ -0,0 +1,280 @@
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from applications.enums import (
+    AhjoOutboxState,
+    AhjoRequestType,
+    AhjoStatus as AhjoStatusEnum,
+    ApplicationStatus,
+)
+from applications.models import AhjoOutboxEntry, AhjoStatus
+from applications.services.ahjo_authentication import AhjoToken
+
+
+@pytest.fixture
+def outbox_application(handling_application):
+    handling_application.handled_by_ahjo_automation = True
+    handling_application.ahjo_case_id = None
+    handling_application.save()
+    AhjoStatus.objects.create(
+        application=handling_application,
+        status=AhjoStatusEnum.SUBMITTED_BUT_NOT_SENT_TO_AHJO,
+    )
+    return handling_application
+
+
+def _call_process_ahjo_outbox(request_type, **options):
+    out = StringIO()
+    call_command(
+        "process_ahjo_outbox", request_type=request_type, stdout=out, **options
+    )
+    return out.getvalue()
+
+
+def _claim(entry):
+    AhjoOutboxEntry.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+    assert AhjoOutboxEntry.objects.claim(entry.request_type, 1) == [entry]
+    entry.refresh_from_db()
+
+
+def test_ahjo_status_enqueues_request(outbox_application):
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+    assert entry.request_type == AhjoRequestType.OPEN_CASE
+    assert entry.state == AhjoOutboxState.PENDING
+    assert entry.ahjo_status == outbox_application.ahjo_status.latest()
+
+    # statuses that do not require a request are not queued
+    AhjoStatus.objects.create(
+        application=outbox_application,
+        status=AhjoStatusEnum.REQUEST_TO_OPEN_CASE_SENT,
+    )
+    AhjoStatus.objects.create(
+        application=outbox_application, status=AhjoStatusEnum.CASE_OPENED
+    )
+    new_records_received = AhjoStatus.objects.create(
+        application=outbox_application, status=AhjoStatusEnum.NEW_RECORDS_RECEIVED
+    )
+    # only one pending entry per request type, pointing to the latest status
+    assert list(
+        AhjoOutboxEntry.objects.filter(application=outbox_application)
+        .order_by("created_at")
+        .values_list("request_type", "ahjo_status")
+    ) == [
+        (AhjoRequestType.OPEN_CASE, entry.ahjo_status_id),
+        (AhjoRequestType.SEND_DECISION_PROPOSAL, new_records_received.id),
+    ]
+
+
+def test_ahjo_outbox_claim(outbox_application):
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+
+    assert AhjoOutboxEntry.objects.claim(AhjoRequestType.DELETE_APPLICATION, 10) == []
+    assert AhjoOutboxEntry.objects.claim(AhjoRequestType.OPEN_CASE, 10) == [entry]
+    # claimed entries are not due again until the claim times out
+    assert AhjoOutboxEntry.objects.claim(AhjoRequestType.OPEN_CASE, 10) == []
+    entry.refresh_from_db()
+    assert entry.state == AhjoOutboxState.IN_PROGRESS
+    assert entry.next_attempt_at > timezone.now() + timedelta(minutes=30)
+
+    AhjoOutboxEntry.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now())
+    assert AhjoOutboxEntry.objects.claim(AhjoRequestType.OPEN_CASE, 10) == [entry]
+
+
+def test_ahjo_outbox_status_queued_while_in_progress(outbox_application):
+    AhjoStatus.objects.create(
+        application=outbox_application, status=AhjoStatusEnum.CASE_OPENED
+    )
+    (entry,) = AhjoOutboxEntry.objects.claim(AhjoRequestType.SEND_DECISION_PROPOSAL, 1)
+    new_records_received = AhjoStatus.objects.create(
+        application=outbox_application, status=AhjoStatusEnum.NEW_RECORDS_RECEIVED
+    )
+    new_entry = AhjoOutboxEntry.objects.get(
+        application=outbox_application,
+        request_type=AhjoRequestType.SEND_DECISION_PROPOSAL,
+        state=AhjoOutboxState.PENDING,
+    )
+    assert new_entry.ahjo_status == new_records_received
+    # the new entry waits until the request in progress is completed
+    assert (
+        AhjoOutboxEntry.objects.claim(AhjoRequestType.SEND_DECISION_PROPOSAL, 1) == []
+    )
+
+    entry.mark_sent()
+    entry.refresh_from_db()
+    assert entry.state == AhjoOutboxState.SENT
+    assert entry.ahjo_status.status == AhjoStatusEnum.CASE_OPENED
+    assert AhjoOutboxEntry.objects.claim(AhjoRequestType.SEND_DECISION_PROPOSAL, 1) == [
+        new_entry
+    ]
+
+
+def test_ahjo_outbox_failed_entry_superseded_while_in_progress(outbox_application):
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+    _claim(entry)
+    # the entry was enqueued again while it was being sent
+    AhjoStatus.objects.create(
+        application=outbox_application,
+        status=AhjoStatusEnum.SUBMITTED_BUT_NOT_SENT_TO_AHJO,
+    )
+
+    entry.mark_failed()
+    entry.refresh_from_db()
+    assert entry.state == AhjoOutboxState.CANCELLED
+    assert entry.attempts == 1
+    assert AhjoOutboxEntry.objects.filter(
+        application=outbox_application, state=AhjoOutboxState.PENDING
+    ).exists()
+
+
+def test_ahjo_outbox_retry_backoff(outbox_application):
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+    delays = []
+    for _ in range(AhjoOutboxEntry.MAX_ATTEMPTS - 1):
+        _claim(entry)
+        entry.mark_failed()
+        assert entry.state == AhjoOutboxState.PENDING
+        delays.append(entry.get_retry_delay())
+    assert delays[:3] == [
+        AhjoOutboxEntry.RETRY_BASE_DELAY,
+        AhjoOutboxEntry.RETRY_BASE_DELAY * 2,
+        AhjoOutboxEntry.RETRY_BASE_DELAY * 4,
+    ]
+    assert entry.next_attempt_at > timezone.now() + delays[-1] - timedelta(minutes=1)
+
+    _claim(entry)
+    entry.mark_failed()
+    entry.refresh_from_db()
+    assert entry.state == AhjoOutboxState.DEAD
+    assert entry.attempts == AhjoOutboxEntry.MAX_ATTEMPTS
+
+    entry.attempts = 100
+    assert entry.get_retry_delay() == AhjoOutboxEntry.RETRY_MAX_DELAY
+
+
+@pytest.mark.parametrize("succeeds", [True, False])
+@patch("applications.management.commands.process_ahjo_outbox.get_token")
+@patch(
+    "applications.management.commands.send_ahjo_requests.send_open_case_request_to_ahjo"
+)
+def test_process_ahjo_outbox(
+    mock_send_request, mock_get_token, outbox_application, succeeds
+):
+    mock_get_token.return_value = MagicMock(AhjoToken)
+    guid = str(uuid.uuid4())
+    mock_send_request.return_value = (
+        (outbox_application, f"{{{guid}}}") if succeeds else (None, None)
+    )
+
+    _call_process_ahjo_outbox(AhjoRequestType.OPEN_CASE)
+
+    mock_send_request.assert_called_once()
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+    assert entry.attempts == 1
+    if succeeds:
+        assert entry.state == AhjoOutboxState.SENT
+        outbox_application.refresh_from_db()
+        assert str(outbox_application.ahjo_case_guid) == guid
+    else:
+        assert entry.state == AhjoOutboxState.PENDING
+        assert entry.next_attempt_at > timezone.now()
+
+    # nothing is due, so nothing is sent
+    assert "No queued open_case requests" in _call_process_ahjo_outbox(
+        AhjoRequestType.OPEN_CASE
+    )
+    mock_send_request.assert_called_once()
+
+
+@pytest.mark.parametrize("superseded", [True, False])
+@patch("applications.management.commands.process_ahjo_outbox.get_token")
+@patch(
+    "applications.management.commands.send_ahjo_requests.send_open_case_request_to_ahjo"
+)
+def test_process_ahjo_outbox_application_not_ready(
+    mock_send_request, mock_get_token, outbox_application, superseded
+):
+    mock_get_token.return_value = MagicMock(AhjoToken)
+    if superseded:
+        # the case has already been opened in some other way
+        ahjo_status = AhjoStatus.objects.create(
+            application=outbox_application,
+            status=AhjoStatusEnum.REQUEST_TO_OPEN_CASE_SENT,
+        )
+        # the time is frozen in the tests
+        AhjoStatus.objects.filter(pk=ahjo_status.pk).update(
+            created_at=timezone.now() + timedelta(minutes=1)
+        )
+    else:
+        # the application is not in handling yet
+        outbox_application.status = ApplicationStatus.RECEIVED
+        outbox_application.save()
+
+    _call_process_ahjo_outbox(AhjoRequestType.OPEN_CASE)
+
+    mock_send_request.assert_not_called()
+    entry = AhjoOutboxEntry.objects.get(
+        application=outbox_application, request_type=AhjoRequestType.OPEN_CASE
+    )
+    assert entry.attempts == 0
+    if superseded:
+        assert entry.state == AhjoOutboxState.CANCELLED
+    else:
+        assert entry.state == AhjoOutboxState.PENDING
+        assert entry.next_attempt_at > timezone.now()
+
+
+@patch("applications.management.commands.process_ahjo_outbox.get_token")
+@patch(
+    "applications.management.commands.send_ahjo_requests.send_open_case_request_to_ahjo"
+)
+def test_process_ahjo_outbox_request_error(
+    mock_send_request, mock_get_token, outbox_application
+):
+    mock_get_token.return_value = MagicMock(AhjoToken)
+
+    with patch(
+        "applications.management.commands.process_ahjo_outbox.Command.run_requests",
+        side_effect=RuntimeError,
+    ):
+        _call_process_ahjo_outbox(AhjoRequestType.OPEN_CASE)
+
+    entry = AhjoOutboxEntry.objects.get(application=outbox_application)
+    assert entry.state == AhjoOutboxState.PENDING
+    assert entry.attempts == 1
+    assert entry.next_attempt_at > timezone.now()
+
+
+@patch("applications.management.commands.process_ahjo_outbox.get_token")
+@patch(
+    "applications.management.commands.send_ahjo_requests.send_open_case_request_to_ahjo"
+)
+def test_process_ahjo_outbox_skips_entries_not_ready(
+    mock_send_request, mock_get_token, outbox_application, received_application
+):
+    mock_get_token.return_value = MagicMock(AhjoToken)
+    mock_send_request.return_value = (outbox_application, f"{{{uuid.uuid4()}}}")
+    AhjoStatus.objects.create(
+        application=received_application,
+        status=AhjoStatusEnum.SUBMITTED_BUT_NOT_SENT_TO_AHJO,
+    )
+    # the entry of the application that is not in handling yet is due first
+    AhjoOutboxEntry.objects.filter(application=received_application).update(
+        next_attempt_at=timezone.now() - timedelta(hours=1)
+    )
+
+    _call_process_ahjo_outbox(AhjoRequestType.OPEN_CASE, number=1)
+
+    mock_send_request.assert_called_once()
+    assert (
+        AhjoOutboxEntry.objects.get(application=outbox_application).state
+        == AhjoOutboxState.SENT
+    )
+    not_ready_entry = AhjoOutboxEntry.objects.get(application=received_application)
+    assert not_ready_entry.state == AhjoOutboxState.PENDING
+    assert not_ready_entry.attempts == 0
@@ -1,4 +1,6 @@
+import hashlib
 import uuid
+from unittest import mock
 
 import pytest
 from django.core.files.base import ContentFile
@@ -159,6 +161,45 @@ def test_prepare_record_document_dict(decided_application, settings):
     assert want == got
 
 
+def test_attachment_hash_is_stored_on_upload(decided_application):
+    content = b"%PDF-1.4 attachment content"
+    attachment = Attachment.objects.create(
+        application=decided_application,
+        attachment_type=AttachmentType.EMPLOYMENT_CONTRACT,
+        content_type="application/pdf",
+        attachment_file=ContentFile(content, "contract.pdf"),
+    )
+
+    expected_hash = hashlib.sha256(content).hexdigest()
+    assert attachment.ahjo_hash_value == expected_hash
+    assert attachment.attachment_file.read() == content
+
+    with mock.patch("applications.services.ahjo_payload.hash_file") as hash_file_mock:
+        document_dict = _prepare_record_document_dict(attachment)
+    assert document_dict["HashValue"] == expected_hash
+    hash_file_mock.assert_not_called()
+
+    # the hash is updated when the file is replaced
+    attachment.attachment_file = ContentFile(b"new content", "contract.pdf")
+    attachment.save()
+    assert attachment.ahjo_hash_value == hashlib.sha256(b"new content").hexdigest()
+
+
+def test_prepare_record_document_dict_hashes_attachment_without_hash(
+    decided_application,
+):
+    attachment = decided_application.attachments.first()
+    Attachment.objects.filter(pk=attachment.pk).update(ahjo_hash_value=None)
+    attachment.refresh_from_db()
+
+    document_dict = _prepare_record_document_dict(attachment)
+
+    expected_hash = hash_file(attachment.attachment_file)
+    assert document_dict["HashValue"] == expected_hash
+    attachment.refresh_from_db()
+    assert attachment.ahjo_hash_value == expected_hash
+
+
 def test_prepare_case_records(decided_application, settings):
     settings.DEBUG = True
     application = decided_application
@@ -1,3 +1,6 @@
+import random
+import threading
+import time
 from datetime import datetime, timezone
 from unittest.mock import patch
 
@@ -20,6 +23,10 @@ from applications.services.ahjo_client import (
     AhjoUpdateRecordsRequest,
     MissingHandlerIdError,
 )
+from applications.services.ahjo_request_dispatcher import (
+    AhjoRequestDispatcher,
+    get_max_workers,
+)
 
 API_CASES_BASE = "/cases"
 
@@ -237,3 +244,70 @@ def test_requests_exceptions(
         )
         client.send_request_to_ahjo()
         mock_logger.error.assert_called()
+
+
+def test_ahjo_api_client_uses_session(application_with_ahjo_case_id, dummy_token):
+    handler = application_with_ahjo_case_id.calculation.handler
+    handler.ad_username = "test"
+    handler.save()
+    ahjo_request = AhjoUpdateRecordsRequest(application_with_ahjo_case_id)
+    session = requests.Session()
+    client = AhjoApiClient(dummy_token, ahjo_request, session=session)
+
+    with requests_mock.Mocker() as m, patch.object(
+        session, "request", wraps=session.request
+    ) as mock_session_request:
+        m.register_uri(
+            ahjo_request.request_method, ahjo_request.api_url(), text="{guid}"
+        )
+        assert client.send_request_to_ahjo({"foo": "bar"}) == (
+            application_with_ahjo_case_id,
+            "{guid}",
+        )
+        mock_session_request.assert_called_once()
+
+
+def test_ahjo_request_dispatcher(dummy_token):
+    lock = threading.Lock()
+    in_progress = 0
+    max_in_progress = 0
+    sessions = set()
+
+    def request_handler(application, ahjo_token, session=None):
+        nonlocal in_progress, max_in_progress
+        with lock:
+            in_progress += 1
+            max_in_progress = max(max_in_progress, in_progress)
+            sessions.add(session)
+        time.sleep(random.uniform(0.005, 0.02))
+        with lock:
+            in_progress -= 1
+        if application == 3:
+            raise ValueError("failed")
+        return application, f"response {application}"
+
+    with AhjoRequestDispatcher(
+        AhjoRequestType.OPEN_CASE, dummy_token, max_workers=3
+    ) as dispatcher:
+        results = []
+        for application, future in dispatcher.dispatch(request_handler, range(10)):
+            try:
+                results.append(future.result())
+            except ValueError:
+                results.append((application, None))
+
+    # the results are returned in the order of the applications
+    assert results == [(i, None) if i == 3 else (i, f"response {i}") for i in range(10)]
+    assert 1 < max_in_progress <= 3
+    assert sessions == {dispatcher.session}
+
+
+def test_ahjo_request_dispatcher_max_workers(settings):
+    settings.AHJO_REQUEST_MAX_WORKERS = 100
+    assert get_max_workers(AhjoRequestType.SEND_DECISION_PROPOSAL) < get_max_workers(
+        AhjoRequestType.GET_DECISION_DETAILS
+    )
+    settings.AHJO_REQUEST_MAX_WORKERS = 2
+    assert get_max_workers(AhjoRequestType.GET_DECISION_DETAILS) == 2
+    settings.AHJO_REQUEST_MAX_WORKERS = 0
+    assert get_max_workers(AhjoRequestType.GET_DECISION_DETAILS) == 1
@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest import mock
 from urllib.parse import urlencode
 
 import pytest
@@ -6,10 +7,14 @@ from dateutil.relativedelta import relativedelta
 from django.core.management import call_command
 from rest_framework.reverse import reverse
 
-from applications.api.v1.search_views import SearchPattern, SubsidyInEffect
+from applications.api.v1.search_views import (
+    HandlerApplicationListSerializer,
+    SearchPattern,
+    SubsidyInEffect,
+)
 from applications.enums import ApplicationBatchStatus, ApplicationStatus
 from applications.models import ArchivalApplication
-from applications.tests.factories import ApplicationBatchFactory
+from applications.tests.factories import ApplicationBatchFactory, ApplicationFactory
 from applications.tests.test_command_import_archival_applications import (
     ImportArchivalApplicationsTestUtility,
 )
@@ -126,6 +131,26 @@ def test_search_with_results(
     assert data["matches"][0]["application_number"] == application.application_number
 
 
+def test_search_by_name_serializes_only_matches(handler_api_client, application):
+    application = setup_application_data(application, False)
+    ApplicationFactory.create_batch(3)
+    params = urlencode({"q": "nimi:mikro tietokoneinen matriisi-artikkeli"})
+
+    with mock.patch(
+        "applications.api.v1.search_views.HandlerApplicationListSerializer",
+        wraps=HandlerApplicationListSerializer,
+    ) as serializer_mock:
+        response = handler_api_client.get(f"{api_url}?{params}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["detected_pattern"] == f"{SearchPattern.ALL} {SearchPattern.IN_MEMORY}"
+    assert [match["id"] for match in data["matches"]] == [str(application.id)]
+    assert [score["score"] for score in data["score"]] == [100]
+    # the applications are not serialized for matching the names
+    assert [len(call.args[0]) for call in serializer_mock.call_args_list] == [1]
+
+
 @pytest.mark.parametrize(
     "q, detected_pattern, subsidy_in_effect, archived",
     [
@@ -313,3 +338,92 @@ def test_search_archival_application(handler_api_client, q, detected_pattern):
         assert match["employee"]["last_name"] == searched_app.employee_last_name
         assert match["company"]["business_id"] == searched_app.company.business_id
         assert match["company"]["name"] == searched_app.company.name
+
+
+def _get_all_pages(handler_api_client, params):
+    pages = []
+    cursor = None
+    while True:
+        page_params = {**params, **({"cursor": cursor} if cursor else {})}
+        response = handler_api_client.get(f"{api_url}?{urlencode(page_params)}")
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = pages[-1]["next"]
+        if cursor is None:
+            return pages
+
+
+def test_search_pagination(handler_api_client):
+    applications = ApplicationFactory.create_batch(3)
+    ImportArchivalApplicationsTestUtility.create_companies_for_archival_applications()
+    call_command("import_archival_applications", filename="test.xlsx", production=True)
+
+    pages = _get_all_pages(handler_api_client, {"q": "", "limit": 2})
+
+    assert [len(page["matches"]) for page in pages] == [2, 2, 1]
+    assert {page["count"] for page in pages} == {5}
+    # the applications are followed by the archival applications
+    matched_ids = [match["id"] for page in pages for match in page["matches"]]
+    assert set(matched_ids[:3]) == {str(application.id) for application in applications}
+    assert set(matched_ids[3:]) == {
+        str(pk) for pk in ArchivalApplication.objects.values_list("pk", flat=True)
+    }
+
+
+def test_search_result_limit(handler_api_client, application):
+    setup_application_data(application, False)
+    ApplicationFactory.create_batch(2, company=application.company)
+
+    with mock.patch("applications.api.v1.search_views.SEARCH_RESULT_LIMIT", 2):
+        response = handler_api_client.get(
+            f"{api_url}?{urlencode({'q': '0877830', 'limit': 10})}"
+        )
+
+    data = response.json()
+    assert response.status_code == 200
+    assert data["count"] == 3
+    assert len(data["matches"]) == 2
+    assert data["next"] is not None
+
+
+def test_search_without_page_returns_first_page(handler_api_client, application):
+    setup_application_data(application, False)
+    ApplicationFactory.create_batch(2, company=application.company)
+
+    with mock.patch("applications.api.v1.search_views.SEARCH_RESULT_LIMIT", 2):
+        response = handler_api_client.get(f"{api_url}?{urlencode({'q': '0877830'})}")
+        data = response.json()
+        assert response.status_code == 200
+        assert data["count"] == 3
+        assert len(data["matches"]) == 2
+        assert data["next"] is not None
+
+        response = handler_api_client.get(
+            f"{api_url}?{urlencode({'q': '0877830', 'cursor': data['next']})}"
+        )
+
+    data = response.json()
+    assert response.status_code == 200
+    assert len(data["matches"]) == 1
+    assert data["next"] is None
+
+
+def test_search_scores_are_paginated(handler_api_client):
+    for application in ApplicationFactory.create_batch(3):
+        application.employee.first_name = "Mikro Tietokoneinen"
+        application.employee.last_name = "Matriisi-Artikkeli"
+        application.employee.save()
+
+    pages = _get_all_pages(
+        handler_api_client,
+        {"q": "nimi:mikro tietokoneinen matriisi-artikkeli", "limit": 2},
+    )
+
+    assert [len(page["matches"]) for page in pages] == [2, 1]
+    assert [len(page["score"]) for page in pages] == [2, 1]
+
+
+@pytest.mark.parametrize("params", [{"cursor": "invalid"}, {"limit": "0"}])
+def test_search_with_invalid_page(handler_api_client, params):
+    response = handler_api_client.get(f"{api_url}?{urlencode({'q': '', **params})}")
+    assert response.status_code == 400
@@ -6,7 +6,7 @@ from io import StringIO
 from unittest.mock import MagicMock, patch
 
 import pytest
-from django.core.management import call_command
+from django.core.management import call_command, CommandError
 from django.utils import timezone
 
 from applications.enums import (
@@ -15,7 +15,12 @@ from applications.enums import (
     AhjoStatus as AhjoStatusEnum,
     ApplicationStatus,
 )
-from applications.models import AhjoSetting, Application, Attachment
+from applications.models import (
+    AhjoSetting,
+    Application,
+    ApplicationStatusTimestamps,
+    Attachment,
+)
 from applications.services.ahjo_authentication import AhjoToken
 from applications.tests.factories import CancelledApplicationFactory
 
@@ -144,6 +149,31 @@ def test_delete_draft_applications_older_than_180_days(
     )
 
 
+def test_sync_application_status_timestamps(decided_application):
+    handled_at = Application.objects.get(pk=decided_application.pk).handled_at
+    assert handled_at is not None
+
+    out = StringIO()
+    call_command("sync_application_status_timestamps", check=True, stdout=out)
+    assert "Application status timestamps are consistent" in out.getvalue()
+
+    ApplicationStatusTimestamps.objects.all().delete()
+    assert Application.objects.get(pk=decided_application.pk).handled_at is None
+
+    out = StringIO()
+    with pytest.raises(CommandError):
+        call_command("sync_application_status_timestamps", check=True, stdout=out)
+    assert (
+        f"Inconsistent status timestamps for application {decided_application.pk}"
+        in out.getvalue()
+    )
+
+    out = StringIO()
+    call_command("sync_application_status_timestamps", stdout=out)
+    assert "Updated status timestamps of 1 applications" in out.getvalue()
+    assert Application.objects.get(pk=decided_application.pk).handled_at == handled_at
+
+
 def test_user_is_notified_of_upcoming_application_deletion(drafts_about_to_be_deleted):
     out = StringIO()
     call_command(
@@ -12,7 +12,9 @@ import faker
 import pytest
 from dateutil.relativedelta import relativedelta
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 from PIL import Image
 from rest_framework.reverse import reverse
@@ -38,7 +40,18 @@ from applications.enums import (
     OrganizationType,
     PaySubsidyGranted,
 )
-from applications.models import Application, ApplicationLogEntry, Attachment, Employee
+from applications.models import (
+    Application,
+    ApplicationLogEntry,
+    Attachment,
+    Employee,
+    get_employee_name_sort_bucket,
+)
+from applications.services.change_history import (
+    get_application_change_history,
+    get_application_change_history_made_by_applicant,
+    get_application_change_history_made_by_handler,
+)
 from applications.tests.conftest import *  # noqa
 from applications.tests.factories import (
     ApplicationBatchFactory,
@@ -61,6 +74,7 @@ from messages.automatic_messages import (
     get_additional_information_email_notification_subject,
 )
 from shared.audit_log import models as audit_models
+from shared.audit_log.viewsets import AuditLoggingModelViewSet
 from shared.service_bus.enums import YtjOrganizationCode
 from terms.models import TermsOfServiceApproval
 from terms.tests.conftest import *  # noqa
@@ -117,7 +131,10 @@ def test_applications_unauthorized(
     mock_get_organisation_roles_and_create_company,
 ):
     response = api_client.get(reverse(view_name))
-    assert len(response.data) == 0
+    items = response.data
+    if view_name == "v1:applicant-application-simplified-application-list":
+        items = items["results"]
+    assert len(items) == 0
     assert response.status_code == 200
 
 
@@ -213,26 +230,26 @@ def test_applications_simple_list_as_handler(handler_api_client, received_applic
     response = handler_api_client.get(
         reverse("v1:handler-application-simplified-application-list")
     )
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
     assert response.status_code == 200
     for key in BaseApplicationViewSet.EXCLUDE_FIELDS_FROM_SIMPLE_LIST:
-        assert key not in response.data[0]
+        assert key not in response.data["results"][0]
     for key in ["calculation", "handled_at"]:
         # handler-only fields must still be found
-        assert key in response.data[0]
+        assert key in response.data["results"][0]
 
 
 def test_applications_simple_list_as_applicant(api_client, received_application):
     response = api_client.get(
         reverse("v1:applicant-application-simplified-application-list")
     )
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
     assert response.status_code == 200
     for key in BaseApplicationViewSet.EXCLUDE_FIELDS_FROM_SIMPLE_LIST:
-        assert key not in response.data
+        assert key not in response.data["results"]
     for key in ["calculation", "handled_at"]:
         # handler-specific fields must not appear
-        assert key not in response.data[0]
+        assert key not in response.data["results"][0]
 
 
 @pytest.mark.parametrize(
@@ -253,12 +270,12 @@ def test_applications_simple_list_exclude_more(
         reverse("v1:handler-application-simplified-application-list")
         + f"?exclude_fields={','.join(exclude_fields)}"
     )
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
     assert response.status_code == 200
     for key in exclude_fields:
-        assert key not in response.data[0]
+        assert key not in response.data["results"][0]
     for key in BaseApplicationViewSet.EXCLUDE_FIELDS_FROM_SIMPLE_LIST:
-        assert key not in response.data[0]
+        assert key not in response.data["results"][0]
 
 
 def test_applications_simple_list_filter(
@@ -268,10 +285,10 @@ def test_applications_simple_list_filter(
         reverse("v1:handler-application-simplified-application-list")
         + "?status=handling"
     )
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
     for key in BaseApplicationViewSet.EXCLUDE_FIELDS_FROM_SIMPLE_LIST:
-        assert key not in response.data
-    assert response.data[0]["status"] == "handling"
+        assert key not in response.data["results"]
+    assert response.data["results"][0]["status"] == "handling"
     assert response.status_code == 200
 
 
@@ -318,21 +335,21 @@ def test_applications_filter_archived_for_applicant(
         {"archived_for_applicant": "true", "order_by": "application_number"},
     )
 
-    assert len(response.data) == 2
-    assert response.data[0]["id"] == str(apps[1].id)
-    assert response.data[1]["id"] == str(apps[2].id)
-    assert response.data[0]["archived_for_applicant"]
-    assert response.data[1]["archived_for_applicant"]
+    assert len(response.data["results"]) == 2
+    assert response.data["results"][0]["id"] == str(apps[1].id)
+    assert response.data["results"][1]["id"] == str(apps[2].id)
+    assert response.data["results"][0]["archived_for_applicant"]
+    assert response.data["results"][1]["archived_for_applicant"]
 
     response = api_client.get(
         reverse("v1:applicant-application-simplified-application-list"),
         {"archived_for_applicant": "false", "order_by": "application_number"},
     )
-    assert len(response.data) == 4
-    assert response.data[0]["id"] == str(apps[0].id)
-    assert response.data[1]["id"] == str(apps[3].id)
-    assert response.data[2]["id"] == str(apps[4].id)
-    assert response.data[3]["id"] == str(apps[5].id)
+    assert len(response.data["results"]) == 4
+    assert response.data["results"][0]["id"] == str(apps[0].id)
+    assert response.data["results"][1]["id"] == str(apps[3].id)
+    assert response.data["results"][2]["id"] == str(apps[4].id)
+    assert response.data["results"][3]["id"] == str(apps[5].id)
 
 
 @pytest.mark.parametrize("url_func", [get_detail_url, get_handler_detail_url])
@@ -728,6 +745,124 @@ def test_application_put_edit_fields(api_client, application):
     assert audit_event["operation"] == "UPDATE"
 
 
+def test_application_put_audit_log_changes(api_client, application):
+    data = ApplicantApplicationSerializer(application).data
+    data["company_contact_person_phone_number"] = "+358505658789"
+
+    # the history records of the update must be newer than the existing ones
+    with freeze_time("2021-06-05"), mock.patch(
+        "simple_history.manager.HistoryManager.latest"
+    ) as history_latest_mock, mock.patch.object(
+        Application.history.model, "prev_record", new_callable=mock.PropertyMock
+    ) as prev_record_mock:
+        response = api_client.put(get_detail_url(application), data)
+
+    assert response.status_code == 200
+    # the changes are computed from the history record saved by the update and the
+    # state of the application before it, without querying the history
+    history_latest_mock.assert_not_called()
+    prev_record_mock.assert_not_called()
+    audit_event = audit_models.AuditLogEntry.objects.last().message["audit_event"]
+    assert audit_event["operation"] == "UPDATE"
+    assert any(
+        change.startswith("company_contact_person_phone_number changed from")
+        and change.endswith("to +358505658789")
+        for change in audit_event["target"]["changes"]
+    )
+
+
+def _get_query_count(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    "client_fixture, application_fixture, get_url",
+    [
+        ("api_client", "application", get_detail_url),
+        ("handler_api_client", "handling_application", get_handler_detail_url),
+    ],
+)
+def test_application_retrieve_audit_log_reuses_fetched_target(
+    request, client_fixture, application_fixture, get_url
+):
+    client = request.getfixturevalue(client_fixture)
+    application = request.getfixturevalue(application_fixture)
+    url = get_url(application)
+    client.get(url)
+
+    query_count = _get_query_count(client, url)
+    with mock.patch.object(
+        AuditLoggingModelViewSet, "_get_fetched_instance", return_value=None
+    ):
+        # looking the target up again costs at least one query
+        assert _get_query_count(client, url) > query_count
+
+    audit_event = audit_models.AuditLogEntry.objects.last().message["audit_event"]
+    assert audit_event["target"] == {"id": str(application.id), "type": "Application"}
+
+
+PRELOADED_LIST_FIELDS = [
+    "id",
+    "ahjo_status",
+    "ahjo_error",
+    "calculated_benefit_amount",
+    "applicant_terms_in_effect",
+    "status_last_changed_at",
+    "warnings",
+    "former_benefit_info",
+]
+
+
+def _create_applications_with_ahjo_statuses(count):
+    applications = DecidedApplicationFactory.create_batch(count)
+    for application in applications:
+        earlier_status = application.ahjo_status.create(
+            status=AhjoStatus.DECISION_PROPOSAL_SENT
+        )
+        application.ahjo_status.filter(pk=earlier_status.pk).update(
+            created_at=earlier_status.created_at - timedelta(days=1)
+        )
+        application.ahjo_status.create(
+            status=AhjoStatus.DETAILS_RECEIVED_FROM_AHJO,
+            error_from_ahjo=[{"message": "error"}],
+        )
+    return applications
+
+
+@pytest.mark.parametrize(
+    "view_name",
+    [
+        "v1:handler-application-list",
+        "v1:handler-application-simplified-application-list",
+    ],
+)
+def test_handler_application_list_preloads_values(
+    handler_api_client, applicant_terms, view_name
+):
+    url = reverse(view_name) + "?fields=" + ",".join(PRELOADED_LIST_FIELDS)
+    _create_applications_with_ahjo_statuses(1)
+    query_count = _get_query_count(handler_api_client, url)
+
+    applications = _create_applications_with_ahjo_statuses(3)
+
+    assert _get_query_count(handler_api_client, url) == query_count
+    response = handler_api_client.get(url)
+    items = response.data
+    if view_name == "v1:handler-application-simplified-application-list":
+        items = items["results"]
+    listed = {item["id"]: item for item in items}
+    for application in applications:
+        detail = handler_api_client.get(get_handler_detail_url(application)).data
+        assert listed[str(application.pk)] == {
+            field: detail[field] for field in PRELOADED_LIST_FIELDS
+        }
+        assert detail["ahjo_status"] == AhjoStatus.DETAILS_RECEIVED_FROM_AHJO
+        assert detail["applicant_terms_in_effect"]["id"] == str(applicant_terms.pk)
+
+
 def test_application_put_edit_employee(api_client, application):
     """
     modify existing application
@@ -2274,7 +2409,7 @@ def test_handler_application_default_ordering(handler_api_client):
     response = handler_api_client.get(
         reverse("v1:handler-application-simplified-application-list")
     )
-    returned_application_ids = [elem["id"] for elem in response.data]
+    returned_application_ids = [elem["id"] for elem in response.data["results"]]
     assert expected_application_ids == returned_application_ids
 
 
@@ -2299,7 +2434,9 @@ def test_handler_application_order_by(handler_api_client):
     )
 
     expected_application_values = _get_expected_sorting_values(key, False)
-    returned_application_values = _map_application_data_by_key(response.data, key)
+    returned_application_values = _map_application_data_by_key(
+        response.data["results"], key
+    )
     assert expected_application_values == returned_application_values
 
     # Now swap the order
@@ -2309,10 +2446,81 @@ def test_handler_application_order_by(handler_api_client):
     )
 
     expected_application_values = _get_expected_sorting_values(key, True)
-    returned_application_values = _map_application_data_by_key(response.data, key)
+    returned_application_values = _map_application_data_by_key(
+        response.data["results"], key
+    )
     assert expected_application_values == returned_application_values
 
 
+@pytest.mark.parametrize("order_by", ["employee_name", "-employee_name"])
+def test_handler_application_order_by_employee_name(handler_api_client, order_by):
+    _create_random_applications()
+    names = [("Aho", "Ville"), ("aho", "anna"), ("Öhman", "Eero"), ("Ahonen", "")]
+    for application, (last_name, first_name) in zip(Application.objects.all(), names):
+        application.employee.last_name = last_name
+        application.employee.first_name = first_name
+        application.employee.save()
+
+    def _get_name_key(employee):
+        return employee["last_name"].lower(), employee["first_name"].lower()
+
+    response = handler_api_client.get(
+        reverse("v1:handler-application-simplified-application-list"),
+        {"order_by": order_by},
+    )
+
+    assert response.status_code == 200
+    returned_names = [
+        _get_name_key(item["employee"]) for item in response.data["results"]
+    ]
+    assert len(returned_names) == Application.objects.count()
+    assert returned_names == sorted(returned_names, reverse=order_by.startswith("-"))
+
+
+def test_employee_name_sort_bucket(application):
+    employee = application.employee
+    employee.last_name = "Öhman"
+    employee.save()
+    assert employee.name_sort_bucket == get_employee_name_sort_bucket("öhman")
+
+    employee.last_name = "aho"
+    employee.save(update_fields=["last_name", "encrypted_last_name"])
+    employee.refresh_from_db()
+    assert employee.name_sort_bucket == get_employee_name_sort_bucket("Aho")
+    assert 0 < employee.name_sort_bucket < get_employee_name_sort_bucket("Öhman")
+    assert get_employee_name_sort_bucket("") == 0
+
+
+@pytest.mark.parametrize("order_by", ["application_number", "-employee_name"])
+def test_handler_application_simplified_list_pages(handler_api_client, order_by):
+    _create_random_applications()
+    url = reverse("v1:handler-application-simplified-application-list")
+    params = {"order_by": order_by}
+    expected_ids = [
+        item["id"] for item in handler_api_client.get(url, params).data["results"]
+    ]
+
+    returned_ids = []
+    cursor = None
+    while True:
+        response = handler_api_client.get(
+            url, {**params, "limit": 4, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == 200
+        assert response.data["count"] == len(expected_ids)
+        assert len(response.data["results"]) <= 4
+        returned_ids += [item["id"] for item in response.data["results"]]
+        if not (cursor := response.data["next"]):
+            break
+
+    assert returned_ids == expected_ids
+
+    response = handler_api_client.get(url, {"cursor": "invalid"})
+    assert response.status_code == 400
+    response = handler_api_client.get(url, {"limit": 0})
+    assert response.status_code == 400
+
+
 def test_handler_application_exlude_batched(handler_api_client):
     batch = ApplicationBatchFactory()
     apps = [DecidedApplicationFactory(), DecidedApplicationFactory()]
@@ -2321,7 +2529,7 @@ def test_handler_application_exlude_batched(handler_api_client):
         reverse("v1:handler-application-simplified-application-list"),
         {"exclude_batched": "1"},
     )
-    assert len(response.data) == 2
+    assert len(response.data["results"]) == 2
 
     apps[0].batch = batch
     apps[0].save()
@@ -2330,7 +2538,7 @@ def test_handler_application_exlude_batched(handler_api_client):
         reverse("v1:handler-application-simplified-application-list"),
         {"exclude_batched": "1"},
     )
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
 
 
 def test_handler_application_filter_archived(handler_api_client):
@@ -2343,8 +2551,8 @@ def test_handler_application_filter_archived(handler_api_client):
     response = handler_api_client.get(
         reverse("v1:handler-application-simplified-application-list")
     )
-    assert len(response.data) == 2
-    for response_app in response.data:
+    assert len(response.data["results"]) == 2
+    for response_app in response.data["results"]:
         assert response_app["id"] in [str(apps[0].id), str(apps[1].id)]
         assert not response_app["archived"]
 
@@ -2352,9 +2560,9 @@ def test_handler_application_filter_archived(handler_api_client):
         reverse("v1:handler-application-simplified-application-list"),
         {"filter_archived": "1"},
     )
-    assert len(response.data) == 1
-    assert response.data[0]["id"] == str(apps[2].id)
-    assert response.data[0]["archived"]
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["id"] == str(apps[2].id)
+    assert response.data["results"][0]["archived"]
 
 
 def test_application_pdf_print(api_client, application):
@@ -2493,7 +2701,7 @@ def test_application_history_change_sets_for_handler(
             payload = HandlerApplicationSerializer(application).data
             payload["action"] = ApplicationActions.HANDLER_ALLOW_APPLICATION_EDIT
             response = handler_api_client.put(
-                get_handler_detail_url(application),
+                get_handler_detail_url(application) + "?include=changes",
                 {**payload, **application_payload},
             )
             assert response.status_code == 200
@@ -2532,6 +2740,64 @@ def test_application_history_change_sets_for_handler(
                 )
 
 
+def _get_replayed_change_history(application):
+    return {
+        "handler": get_application_change_history_made_by_handler(application),
+        "applicant": get_application_change_history_made_by_applicant(application),
+    }
+
+
+def test_application_change_history_is_stored_incrementally(
+    request, handler_api_client, application, django_capture_on_commit_callbacks
+):
+    add_attachments_to_application(request, application)
+    for application_status in [ApplicationStatus.RECEIVED, ApplicationStatus.HANDLING]:
+        application.refresh_from_db()
+        payload = HandlerApplicationSerializer(application).data
+        payload["status"] = application_status
+        with mock.patch(
+            "terms.models.ApplicantTermsApproval.terms_approval_needed",
+            return_value=False,
+        ), django_capture_on_commit_callbacks(execute=True):
+            response = handler_api_client.put(
+                get_handler_detail_url(application), payload
+            )
+        assert response.status_code == 200
+    assert "changes" not in response.data
+
+    url = get_handler_detail_url(application) + "?include=changes"
+    with freeze_time("2024-01-01") as frozen_datetime:
+        for last_name in ["Lastname1", "Lastname2", "Lastname3"]:
+            frozen_datetime.tick(delta=timedelta(seconds=10))
+            application.refresh_from_db()
+            payload = HandlerApplicationSerializer(application).data
+            payload["action"] = ApplicationActions.HANDLER_ALLOW_APPLICATION_EDIT
+            payload["employee"]["last_name"] = last_name
+            payload["change_reason"] = f"Changed to {last_name}"
+            with django_capture_on_commit_callbacks(execute=True):
+                response = handler_api_client.put(url, payload)
+            assert response.status_code == 200
+            assert response.data["changes"] == _get_replayed_change_history(application)
+
+    # all the change sets have been stored, so the history is not compared again
+    with mock.patch(
+        "simple_history.models.HistoricalChanges.diff_against"
+    ) as diff_against_mock, CaptureQueriesContext(connection) as context:
+        changes = get_application_change_history(application)
+    diff_against_mock.assert_not_called()
+    # reading the change history does not write anything
+    assert not any(
+        query["sql"].startswith(("INSERT", "UPDATE"))
+        for query in context.captured_queries
+    )
+
+    assert changes == _get_replayed_change_history(application)
+    assert len(changes["handler"]) == 4
+    assert changes["handler"][0]["reason"] == "Changed to Lastname3"
+    application.change_history.refresh_from_db()
+    assert len(application.change_history.handler_change_sets) == 4
+
+
 def test_application_handler_change(api_client, handler_api_client, application):
     response = api_client.patch(
         reverse("v1:handler-application-change-handler", kwargs={"pk": application.id}),
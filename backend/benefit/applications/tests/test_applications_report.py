@@ -4,21 +4,32 @@ from collections import defaultdict
 from datetime import date, datetime, timezone
 from decimal import Decimal
 from typing import Dict, List
+from unittest import mock
+from unittest.mock import patch, PropertyMock
 from zipfile import ZipFile
 
 import pytest
 from dateutil.relativedelta import relativedelta
-from django.http import HttpResponse, StreamingHttpResponse
+from django.db import connection
+from django.http import FileResponse, StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
+from applications.api.v1.application_views import HandlerApplicationViewSet
 from applications.enums import (
     AhjoDecision,
     ApplicationStatus,
     BenefitType,
     PaySubsidyGranted,
 )
-from applications.models import AhjoSetting, ApplicationAlteration, ApplicationBatch
+from applications.models import (
+    AhjoSetting,
+    Application,
+    ApplicationAlteration,
+    ApplicationBatch,
+)
+from applications.services.applications_csv_report import ApplicationsCsvService
 from applications.tests.common import (
     check_csv_cell_list_lines_generator,
     check_csv_string_lines_generator,
@@ -26,8 +37,10 @@ from applications.tests.common import (
 from applications.tests.conftest import *  # noqa
 from applications.tests.conftest import split_lines_at_semicolon
 from applications.tests.factories import DecidedApplicationFactory, DeMinimisAidFactory
-from calculator.tests.factories import PaySubsidyFactory
+from calculator.enums import RowType
+from calculator.tests.factories import CalculationRowFactory, PaySubsidyFactory
 from common.tests.conftest import *  # noqa
+from common.tests.conftest import reseed
 from companies.tests.conftest import *  # noqa
 from helsinkibenefit.tests.conftest import *  # noqa
 from terms.tests.conftest import *  # noqa
@@ -93,8 +106,8 @@ def _get_csv(
     response = handler_api_client.get(url)
     assert response.status_code == 200
     if from_zip:
-        assert isinstance(response, HttpResponse)
-        csv_content: bytes = _get_csv_from_zip(response.content)
+        assert isinstance(response, FileResponse)
+        csv_content: bytes = _get_csv_from_zip(response.getvalue())
     else:
         assert isinstance(response, StreamingHttpResponse)
         csv_content: bytes = response.getvalue()
@@ -106,7 +119,8 @@ def _get_csv(
 def _get_csv_pdf_zip(handler_api_client: APIClient, url: str) -> ZipFile:
     response = handler_api_client.get(url)
     assert response.status_code == 200
-    return ZipFile(io.BytesIO(response.content))
+    assert isinstance(response, FileResponse)
+    return ZipFile(io.BytesIO(response.getvalue()))
 
 
 def _create_applications_for_export():
@@ -200,6 +214,54 @@ def test_applications_csv_export_new_applications(handler_api_client):
     assert ApplicationBatch.objects.all().count() == 2
 
 
+@pytest.mark.parametrize(
+    "url_path,expected_decision",
+    [
+        (
+            "export_new_accepted_applications_csv_pdf/",
+            AhjoDecision.DECIDED_ACCEPTED,
+        ),
+        (
+            "export_new_rejected_applications_csv_pdf/",
+            AhjoDecision.DECIDED_REJECTED,
+        ),
+    ],
+)
+def test_export_new_applications_creates_batch(
+    handler_api_client, url_path, expected_decision
+):
+    # Test flaking if no reseed is used
+    reseed(12345)
+    (
+        application1,
+        application2,
+        application3,
+        _,
+    ) = _create_applications_for_export()
+    ApplicationBatch.objects.all().delete()
+    expected_applications = {
+        AhjoDecision.DECIDED_ACCEPTED: {application1.pk, application2.pk},
+        AhjoDecision.DECIDED_REJECTED: {application3.pk},
+    }[expected_decision]
+
+    # the ordering of the handler queryset must not prevent updating the batch
+    with mock.patch.object(
+        HandlerApplicationViewSet,
+        "_csv_pdf_response",
+        return_value=StreamingHttpResponse([]),
+    ):
+        response = handler_api_client.get(
+            reverse("v1:handler-application-list") + url_path
+        )
+
+    assert response.status_code == 200
+    batch = ApplicationBatch.objects.get()
+    assert batch.proposal_for_decision == expected_decision
+    assert {application.pk for application in batch.applications.all()} == (
+        expected_applications
+    )
+
+
 def test_application_alteration_csv_export(
     application_alteration, handler_api_client, decided_application
 ):
@@ -645,6 +707,75 @@ def test_applications_csv_string_lines_generator(applications_csv_service):
     )
 
 
+def test_applications_csv_query_count_does_not_depend_on_applications():
+    def get_query_count(applications):
+        csv_service = ApplicationsCsvService(
+            Application.objects.filter(
+                pk__in=[application.pk for application in applications]
+            ).order_by("application_number")
+        )
+        with CaptureQueriesContext(connection) as context:
+            csv_lines = split_lines_at_semicolon(csv_service.get_csv_string())
+        # a row per Ahjo row of each application, and the header
+        assert len(csv_lines) == 3 * len(applications) + 1
+        return len(context.captured_queries)
+
+    applications = DecidedApplicationFactory.create_batch(
+        5, status=ApplicationStatus.ACCEPTED
+    )
+    for application in applications:
+        # Several related objects of each kind, so that a query per related object is
+        # caught as well as a query per application
+        DeMinimisAidFactory.create_batch(3, application=application)
+        application.pay_subsidies.all().delete()
+        PaySubsidyFactory.create_batch(3, application=application)
+        application.calculation.rows.all().delete()
+        for start_month in [1, 4, 7]:
+            CalculationRowFactory(
+                calculation=application.calculation,
+                row_type=RowType.HELSINKI_BENEFIT_MONTHLY_EUR,
+            )
+            CalculationRowFactory(
+                calculation=application.calculation,
+                row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR,
+                start_date=date(2024, start_month, 1),
+                end_date=date(2024, start_month + 2, 28),
+            )
+        assert len(application.calculation.ahjo_rows) == 3
+    query_count = get_query_count(applications[:1])
+
+    assert get_query_count(applications) == query_count
+
+
+@pytest.mark.parametrize("prune_data_for_talpa", [False, True])
+def test_applications_csv_export_of_prefetched_applications(prune_data_for_talpa):
+    """
+    Export 10 000 rows from prefetched applications. The export must not make any
+    queries, and the columns must be compiled only once.
+    """
+    row_count = 10_000
+    DecidedApplicationFactory.create_batch(2, status=ApplicationStatus.ACCEPTED)
+    prefetched_applications = list(
+        ApplicationsCsvService(Application.objects.all()).get_applications()
+    )
+    csv_service = ApplicationsCsvService(
+        prefetched_applications * (row_count // len(prefetched_applications)),
+        prune_data_for_talpa,
+    )
+
+    with patch.object(
+        ApplicationsCsvService,
+        "CSV_COLUMNS",
+        new_callable=PropertyMock,
+        return_value=csv_service.CSV_COLUMNS,
+    ) as mock_csv_columns, CaptureQueriesContext(connection) as context:
+        csv_string = csv_service.get_csv_string(prune_data_for_talpa)
+
+    assert len(csv_string.splitlines()) == row_count + 1
+    assert mock_csv_columns.call_count == 1
+    assert context.captured_queries == []
+
+
 def test_applications_csv_two_ahjo_rows(applications_csv_service_with_one_application):
     application = applications_csv_service_with_one_application.get_applications()[0]
     application.pay_subsidies.all().delete()
@@ -1,15 +1,28 @@
 import itertools
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import translation
 
 from applications.api.v1.serializers.application import ApplicantApplicationSerializer
-from applications.enums import BenefitType, PaySubsidyGranted
-from applications.models import Application
+from applications.benefit_aggregation import FormerBenefitPeriodLookup
+from applications.enums import ApplicationStatus, BenefitType, PaySubsidyGranted
+from applications.models import (
+    Application,
+    FormerBenefitPeriod,
+    hash_social_security_number,
+)
 from applications.tests.conftest import *  # noqa
-from applications.tests.factories import DecidedApplicationFactory
+from applications.tests.factories import (
+    DecidedApplicationFactory,
+    HandlingApplicationFactory,
+)
 from applications.tests.test_applications_api import get_handler_detail_url
 from calculator.models import PreviousBenefit
 from calculator.tests.factories import PreviousBenefitFactory
@@ -413,3 +426,131 @@ def test_application_with_previously_accepted_applications_and_previous_benefits
             assert len(response.data["warnings"]["former_benefits"]) == 1
         else:
             assert "former_benefits" not in response.data["warnings"]
+
+
+def _get_former_benefit_periods(application):
+    return list(
+        FormerBenefitPeriod.objects.filter(
+            social_security_number_hash=hash_social_security_number(
+                application.employee.social_security_number
+            ),
+            company=application.company,
+        ).values_list("application", "previous_benefit", "start_date", "end_date")
+    )
+
+
+def test_former_benefit_periods_are_updated(handling_application):
+    assert _get_former_benefit_periods(handling_application) == []
+
+    handling_application.status = ApplicationStatus.ACCEPTED
+    handling_application.save()
+    assert _get_former_benefit_periods(handling_application) == [
+        (
+            handling_application.pk,
+            None,
+            handling_application.start_date,
+            handling_application.end_date,
+        )
+    ]
+
+    previous_benefit = PreviousBenefitFactory(
+        company=handling_application.company,
+        social_security_number=handling_application.employee.social_security_number,
+    )
+    assert (
+        None,
+        previous_benefit.pk,
+        previous_benefit.start_date,
+        previous_benefit.end_date,
+    ) in _get_former_benefit_periods(handling_application)
+
+    previous_benefit.delete()
+    handling_application.status = ApplicationStatus.CANCELLED
+    handling_application.save()
+    assert _get_former_benefit_periods(handling_application) == []
+
+
+def test_former_benefit_periods_follow_the_employee(decided_application):
+    old_social_security_number = decided_application.employee.social_security_number
+    decided_application.employee.social_security_number = "260778-323Y"
+    decided_application.employee.save()
+
+    assert not FormerBenefitPeriod.objects.filter(
+        social_security_number_hash=hash_social_security_number(
+            old_social_security_number
+        )
+    ).exists()
+    assert len(_get_former_benefit_periods(decided_application)) == 1
+
+
+def test_former_benefit_periods_are_updated_only_on_changes(decided_application):
+    application = Application.objects.get(pk=decided_application.pk)
+    application.archived = True
+
+    with mock.patch.object(
+        FormerBenefitPeriod.objects, "update_for_application"
+    ) as update_mock:
+        application.save()
+        application.employee.save()
+        update_mock.assert_not_called()
+
+        application.end_date += timedelta(days=1)
+        application.save()
+        update_mock.assert_called_once_with(application)
+
+
+def test_rebuild_former_benefit_periods(decided_application):
+    PreviousBenefitFactory(
+        company=decided_application.company,
+        social_security_number=decided_application.employee.social_security_number,
+    )
+    periods = sorted(_get_former_benefit_periods(decided_application), key=str)
+    FormerBenefitPeriod.objects.all().delete()
+
+    call_command("rebuild_former_benefit_periods", stdout=StringIO())
+
+    assert sorted(_get_former_benefit_periods(decided_application), key=str) == periods
+
+
+def test_former_benefit_period_lookup_is_one_query(handling_application):
+    applications = [handling_application] + HandlingApplicationFactory.create_batch(
+        2, company=handling_application.company
+    )
+    for application in applications:
+        DecidedApplicationFactory(
+            company=application.company,
+            employee__social_security_number=application.employee.social_security_number,
+        )
+
+    with CaptureQueriesContext(connection) as context:
+        lookup = FormerBenefitPeriodLookup(applications)
+
+    assert len(context.captured_queries) == 1
+    for application in applications:
+        assert application in lookup
+        assert len(lookup.get_periods_for_application(application)) == 1
+        assert lookup.get_periods_for_application(application) == list(
+            FormerBenefitPeriodLookup.get_periods(
+                application.company, application.employee.social_security_number
+            )
+        )
+
+
+def test_former_benefit_info_without_social_security_number(
+    handler_api_client, handling_application
+):
+    handling_application.employee.social_security_number = ""
+    handling_application.employee.save()
+
+    assert handling_application not in FormerBenefitPeriodLookup([handling_application])
+    assert (
+        FormerBenefitPeriodLookup([handling_application]).get_periods_for_application(
+            handling_application
+        )
+        == []
+    )
+    response = handler_api_client.get(get_handler_detail_url(handling_application))
+
+    assert response.status_code == 200
+    assert response.data["former_benefit_info"]["months_used"] is None
+    assert "former_benefits" not in response.data["warnings"]
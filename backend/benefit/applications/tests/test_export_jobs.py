@@ -0,0 +1,203 @@
+import io
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from zipfile import ZipFile
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+from applications.enums import ApplicationStatus, ExportJobState, ExportJobType
+from applications.models import ApplicationBatch, ExportJob
+from applications.tests.conftest import *  # noqa
+from applications.tests.factories import DecidedApplicationFactory
+from common.tests.conftest import *  # noqa
+from helsinkibenefit.tests.conftest import *  # noqa
+
+
+@pytest.fixture(autouse=True)
+def export_media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _process_export_jobs(**options):
+    out = StringIO()
+    call_command("process_export_jobs", stdout=out, **options)
+    return out.getvalue()
+
+
+def _get_export_job(handler_api_client, job_id):
+    response = handler_api_client.get(
+        reverse("v1:export-job-detail", kwargs={"pk": job_id})
+    )
+    assert response.status_code == 200
+    return response.data
+
+
+def _download(handler_api_client, job_id):
+    return handler_api_client.get(
+        reverse("v1:export-job-download", kwargs={"pk": job_id})
+    )
+
+
+def test_export_csv_async(handler_api_client):
+    accepted = DecidedApplicationFactory.create_batch(
+        2, status=ApplicationStatus.ACCEPTED
+    )
+    DecidedApplicationFactory(status=ApplicationStatus.REJECTED)
+    url = reverse("v1:handler-application-list") + "export_csv/?status=accepted"
+
+    response = handler_api_client.get(url + "&async=true")
+
+    assert response.status_code == 202
+    assert response.data["state"] == ExportJobState.PENDING
+    assert response.data["export_type"] == ExportJobType.APPLICATIONS_CSV
+    assert response.data["download_url"] is None
+    job = ExportJob.objects.get(pk=response.data["id"])
+    assert set(job.applications.all()) == set(accepted)
+    # the file is not ready yet
+    assert _download(handler_api_client, job.pk).status_code == 409
+
+    assert "done" in _process_export_jobs()
+
+    job_data = _get_export_job(handler_api_client, job.pk)
+    assert job_data["state"] == ExportJobState.DONE
+    assert job_data["download_url"].endswith(
+        reverse("v1:export-job-download", kwargs={"pk": job.pk})
+    )
+    response = _download(handler_api_client, job.pk)
+    assert response.status_code == 200
+    assert response["Content-Disposition"].startswith("attachment; filename=")
+    assert response["Content-Disposition"].endswith('.csv"')
+    # the file is the same as the synchronous export produces
+    assert response.getvalue() == handler_api_client.get(url).getvalue()
+
+
+@patch("applications.services.ahjo_integration.pdfkit.from_string")
+def test_export_new_accepted_applications_csv_pdf_async(
+    mock_pdf_convert, handler_api_client
+):
+    mock_pdf_convert.return_value = b"pdf"
+    DecidedApplicationFactory.create_batch(2, status=ApplicationStatus.ACCEPTED)
+
+    response = handler_api_client.get(
+        reverse("v1:handler-application-list")
+        + "export_new_accepted_applications_csv_pdf/?async=1"
+    )
+
+    assert response.status_code == 202
+    assert response.data["export_type"] == ExportJobType.TALPA_CSV_PDF
+    # the batch is created when the job is created
+    batch = ApplicationBatch.objects.get()
+    job = ExportJob.objects.get(pk=response.data["id"])
+    assert set(job.applications.all()) == set(batch.applications.all())
+
+    _process_export_jobs()
+
+    response = _download(handler_api_client, job.pk)
+    assert response.status_code == 200
+    archive = ZipFile(io.BytesIO(response.getvalue()))
+    # 2 accepted PDFs + 2 composed PDFs + 1 CSV
+    assert len(archive.namelist()) == 5
+    assert f"{job.file_name}.csv" in archive.namelist()
+
+
+@patch("applications.services.export_jobs.write_csv")
+def test_export_job_failure(mock_write_csv, handler_api_client, decided_application):
+    mock_write_csv.side_effect = Exception("Export failed")
+    response = handler_api_client.get(
+        reverse("v1:handler-application-list") + "export_csv/?async=true"
+    )
+
+    assert "failed: Export failed" in _process_export_jobs()
+
+    job_data = _get_export_job(handler_api_client, response.data["id"])
+    assert job_data["state"] == ExportJobState.FAILED
+    assert job_data["error"] == "Export failed"
+    assert job_data["download_url"] is None
+    assert _download(handler_api_client, response.data["id"]).status_code == 409
+
+
+@patch("applications.services.export_jobs.write_csv")
+def test_export_job_is_not_run_in_a_transaction(
+    mock_write_csv, handler_api_client, decided_application
+):
+    # the test itself runs in a transaction, so only the blocks opened by the job count
+    test_atomic_blocks = len(connection.atomic_blocks)
+    export_atomic_blocks = []
+    mock_write_csv.side_effect = lambda *args, **kwargs: export_atomic_blocks.append(
+        len(connection.atomic_blocks)
+    )
+    handler_api_client.get(
+        reverse("v1:handler-application-list") + "export_csv/?async=true"
+    )
+
+    assert "done" in _process_export_jobs()
+
+    assert export_atomic_blocks == [test_atomic_blocks]
+
+
+def test_export_jobs_are_visible_to_their_creator(
+    handler_api_client, decided_application, bf_user
+):
+    own_job = ExportJob.objects.create(
+        export_type=ExportJobType.APPLICATIONS_CSV,
+        created_by=handler_api_client.handler._force_user,
+        file_name="own",
+    )
+    ExportJob.objects.create(
+        export_type=ExportJobType.APPLICATIONS_CSV,
+        created_by=bf_user,
+        file_name="other",
+    )
+
+    response = handler_api_client.get(reverse("v1:export-job-list"))
+
+    assert response.status_code == 200
+    assert [job["id"] for job in response.data] == [str(own_job.pk)]
+
+
+def test_export_job_claim():
+    pending = ExportJob.objects.create(
+        export_type=ExportJobType.APPLICATIONS_CSV, file_name="pending"
+    )
+    running = ExportJob.objects.create(
+        export_type=ExportJobType.APPLICATIONS_CSV,
+        file_name="running",
+        state=ExportJobState.RUNNING,
+        started_at=timezone.now(),
+    )
+
+    assert ExportJob.objects.claim(10) == [pending]
+    pending.refresh_from_db()
+    assert pending.state == ExportJobState.RUNNING
+    assert ExportJob.objects.claim(10) == []
+
+    # a job whose worker has died is claimed again
+    ExportJob.objects.filter(pk=running.pk).update(
+        started_at=timezone.now() - ExportJob.RUNNING_TIMEOUT - timedelta(minutes=1)
+    )
+    assert ExportJob.objects.claim(10) == [running]
+
+
+def test_delete_expired_export_jobs(handler_api_client, decided_application):
+    response = handler_api_client.get(
+        reverse("v1:handler-application-list") + "export_csv/?async=true"
+    )
+    _process_export_jobs()
+    job = ExportJob.objects.get(pk=response.data["id"])
+    storage = job.file.storage
+    file_name = job.file.name
+    assert storage.exists(file_name)
+
+    assert "Deleted 0 export jobs" in _process_export_jobs(delete_expired=True)
+    ExportJob.objects.filter(pk=job.pk).update(
+        created_at=timezone.now() - ExportJob.EXPIRATION - timedelta(days=1)
+    )
+    assert "Deleted 1 export jobs" in _process_export_jobs(delete_expired=True)
+
+    assert not ExportJob.objects.exists()
+    assert not storage.exists(file_name)
@@ -1,10 +1,15 @@
-from datetime import date
+from datetime import date, datetime, timezone
 
 import pytest
 
-from applications.enums import AhjoDecision, ApplicationBatchStatus
+from applications.enums import AhjoDecision, ApplicationBatchStatus, ApplicationStatus
 from applications.exceptions import BatchCompletionRequiredFieldsError
-from applications.models import Application, ApplicationBatch, Employee
+from applications.models import (
+    Application,
+    ApplicationBatch,
+    ApplicationStatusTimestamps,
+    Employee,
+)
 from applications.tests.factories import BaseApplicationBatchFactory
 from applications.tests.test_application_batch_api import (
     fill_as_valid_batch_completion_and_save,
@@ -184,3 +189,43 @@ def test_encrypted_searchable_social_security_number(employee):
     assert employee.social_security_number == ""
     assert Employee.objects.filter(social_security_number=initial_ssn).count() == 0
     assert Employee.objects.filter(social_security_number="").count() == 1
+
+
+def test_application_status_timestamps_follow_log_entries(application):
+    assert Application.objects.get(pk=application.pk).submitted_at is None
+
+    received = application.log_entries.create(
+        from_status=ApplicationStatus.DRAFT, to_status=ApplicationStatus.RECEIVED
+    )
+    application.log_entries.create(
+        from_status=ApplicationStatus.RECEIVED, to_status=ApplicationStatus.HANDLING
+    )
+    accepted = application.log_entries.create(
+        from_status=ApplicationStatus.HANDLING, to_status=ApplicationStatus.ACCEPTED
+    )
+    application = Application.objects.get(pk=application.pk)
+    assert application.submitted_at == received.created_at
+    assert application.handled_at == accepted.created_at
+    assert application.additional_information_requested_at is None
+
+    # queryset updates bypass the ORM, but are handled by the database trigger
+    application.log_entries.filter(pk=accepted.pk).update(
+        created_at=datetime(2022, 1, 1, tzinfo=timezone.utc)
+    )
+    assert Application.objects.get(pk=application.pk).handled_at == datetime(
+        2022, 1, 1, tzinfo=timezone.utc
+    )
+
+    accepted.delete()
+    assert Application.objects.get(pk=application.pk).handled_at is None
+    assert Application.objects.filter(handled_at__isnull=True).count() == 1
+
+
+def test_application_status_timestamps_deleted_with_application(application):
+    application.log_entries.create(
+        from_status=ApplicationStatus.DRAFT, to_status=ApplicationStatus.RECEIVED
+    )
+    assert ApplicationStatusTimestamps.objects.count() == 1
+
+    application.delete()
+    assert ApplicationStatusTimestamps.objects.count() == 0
@@ -1,3 +1,4 @@
+import decimal
 from typing import Union
 
 from dateutil.relativedelta import relativedelta
@@ -14,6 +15,7 @@ from calculator.models import (
     STATE_AID_MAX_PERCENTAGE_CHOICES,
     TrainingCompensation,
 )
+from calculator.rules import HelsinkiBenefitCalculator
 from users.api.v1.serializers import UserSerializer
 from users.models import User
 
@@ -365,3 +367,146 @@ class CalculationSearchSerializer(serializers.ModelSerializer):
             "start_date",
             "end_date",
         ]
+
+
+class CalculationPreviewPaySubsidySerializer(serializers.ModelSerializer):
+    work_time_percent = serializers.DecimalField(
+        max_digits=PaySubsidy.work_time_percent.field.max_digits,
+        decimal_places=PaySubsidy.work_time_percent.field.decimal_places,
+        min_value=1,
+        max_value=100,
+        required=False,
+    )
+
+    class Meta:
+        model = PaySubsidy
+        fields = [
+            "start_date",
+            "end_date",
+            "pay_subsidy_percent",
+            "work_time_percent",
+            "disability_or_illness",
+        ]
+
+
+class CalculationPreviewTrainingCompensationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TrainingCompensation
+        fields = [
+            "start_date",
+            "end_date",
+            "monthly_amount",
+        ]
+
+
+class CalculationPreviewSerializer(serializers.ModelSerializer):
+    """
+    Source data of a calculation that is run without saving anything, e.g. to try out
+    different date ranges and pay subsidies before updating the actual calculation.
+    """
+
+    benefit_type = serializers.ChoiceField(choices=BenefitType.choices)
+    override_monthly_benefit_amount = serializers.DecimalField(
+        allow_null=True,
+        required=False,
+        max_digits=Calculation.override_monthly_benefit_amount.field.max_digits,
+        decimal_places=Calculation.override_monthly_benefit_amount.field.decimal_places,
+        min_value=0,
+        help_text="manually override the monthly benefit amount",
+    )
+    pay_subsidies = CalculationPreviewPaySubsidySerializer(many=True, required=False)
+    training_compensations = CalculationPreviewTrainingCompensationSerializer(
+        many=True, required=False
+    )
+
+    def validate(self, data):
+        start_date, end_date = data.get("start_date"), data.get("end_date")
+        if start_date is not None and end_date is not None:
+            if end_date < start_date:
+                raise serializers.ValidationError(
+                    {"end_date": _("End date cannot be before start date")}
+                )
+            if (
+                start_date
+                + relativedelta(months=CalculationSerializer.CALCULATION_MAX_MONTHS)
+                <= end_date
+            ):
+                raise serializers.ValidationError(
+                    {"end_date": _("Date range too large")}
+                )
+        return data
+
+    def get_calculator(self) -> HelsinkiBenefitCalculator:
+        """
+        Build unsaved Calculation, PaySubsidy and TrainingCompensation objects from the
+        validated data and return a calculator that uses them.
+        """
+        data = dict(self.validated_data)
+        application = Application(benefit_type=data.pop("benefit_type"))
+        pay_subsidies = [
+            PaySubsidy(application=application, ordering=ordering, **item)
+            for ordering, item in enumerate(data.pop("pay_subsidies", []))
+        ]
+        training_compensations = [
+            TrainingCompensation(application=application, ordering=ordering, **item)
+            for ordering, item in enumerate(data.pop("training_compensations", []))
+        ]
+        calculation = Calculation(application=application, **data)
+        calculation.calculator = HelsinkiBenefitCalculator.get_calculator(
+            calculation,
+            pay_subsidies=pay_subsidies,
+            training_compensations=training_compensations,
+        )
+        return calculation.calculator
+
+    class Meta:
+        model = Calculation
+        fields = [
+            "monthly_pay",
+            "vacation_money",
+            "other_expenses",
+            "start_date",
+            "end_date",
+            "state_aid_max_percentage",
+            "override_monthly_benefit_amount",
+            "benefit_type",
+            "pay_subsidies",
+            "training_compensations",
+        ]
+
+
+class CalculationPreviewRowSerializer(CalculationRowSerializer):
+    # The rows are not saved, so round the amounts the same way the database would
+    amount = serializers.DecimalField(
+        max_digits=CalculationRow.amount.field.max_digits,
+        decimal_places=CalculationRow.amount.field.decimal_places,
+        rounding=decimal.ROUND_HALF_UP,
+        read_only=True,
+    )
+
+    class Meta(CalculationRowSerializer.Meta):
+        fields = [
+            "row_type",
+            "ordering",
+            "description_fi",
+            "amount",
+            "description_type",
+            "start_date",
+            "end_date",
+        ]
+        read_only_fields = fields
+
+
+class CalculationPreviewResultSerializer(serializers.Serializer):
+    calculated_benefit_amount = serializers.DecimalField(
+        max_digits=Calculation.calculated_benefit_amount.field.max_digits,
+        decimal_places=Calculation.calculated_benefit_amount.field.decimal_places,
+        allow_null=True,
+        read_only=True,
+        help_text="The benefit amount, or null if the source data is not complete",
+    )
+    rows = CalculationPreviewRowSerializer(
+        many=True,
+        read_only=True,
+        help_text="Calculation rows, generated by the calculator but not saved",
+    )
@@ -1,8 +1,14 @@
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema
 from rest_framework import filters as drf_filters
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from calculator.api.v1.serializers import PreviousBenefitSerializer
+from calculator.api.v1.serializers import (
+    CalculationPreviewResultSerializer,
+    CalculationPreviewSerializer,
+    PreviousBenefitSerializer,
+)
 from calculator.models import PreviousBenefit
 from common.permissions import BFIsHandler
 from shared.audit_log.viewsets import AuditLoggingModelViewSet
@@ -33,3 +39,29 @@ class PreviousBenefitViewSet(AuditLoggingModelViewSet):
     ]
     filterset_class = PreviousBenefitFilter
     search_fields = ["company__name", "social_security_number"]
+
+
+class CalculationPreviewView(APIView):
+    permission_classes = [BFIsHandler]
+
+    @extend_schema(
+        request=CalculationPreviewSerializer,
+        responses=CalculationPreviewResultSerializer,
+        description=(
+            "Run the calculator against the posted source data and return the resulting"
+            " rows. Nothing is saved to the database."
+        ),
+    )
+    def post(self, request):
+        serializer = CalculationPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        calculator = serializer.get_calculator()
+        calculated_benefit_amount = calculator.calculate_rows()
+        return Response(
+            CalculationPreviewResultSerializer(
+                {
+                    "calculated_benefit_amount": calculated_benefit_amount,
+                    "rows": calculator.rows,
+                }
+            ).data
+        )
@@ -0,0 +1,18 @@
+import multiprocessing
+
+from django.core.management import call_command
+from django_extensions.management.jobs import BaseJob
+
+"""
+Job to recalculate all calculations that can still be changed by the handlers.
+
+Run manually with "python manage.py runjob calculator recalculate_calculations"
+after the calculation rules have changed.
+"""
+
+
+class Job(BaseJob):
+    help = "Recalculate all open calculations using all available CPUs."
+
+    def execute(self):
+        call_command("recalculate_calculations", workers=multiprocessing.cpu_count())
@@ -0,0 +1,167 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Union
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from calculator.models import Calculation
+from calculator.rules import HelsinkiBenefitCalculator
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RecalculationResult(NamedTuple):
+    calculation_id: str
+    application_number: int
+    old_amount: Optional[Decimal]
+    new_amount: Optional[Decimal]
+    error: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.error is None and self.old_amount != self.new_amount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculate the calculations of all applications whose calculation can still be"
+        " changed by the handlers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes, 1 runs the recalculation in this process",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Number of calculations recalculated by a worker at a time",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the calculations whose benefit amount would change",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        chunks = _get_calculation_id_chunks(options["chunk_size"])
+        total = sum(len(chunk) for chunk in chunks)
+
+        if not total:
+            self.stdout.write("No calculations to recalculate")
+            return
+
+        start_time = time.time()
+        results = []
+        if options["workers"] > 1:
+            # The forked workers must open database connections of their own
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                futures = [
+                    executor.submit(recalculate_chunk, chunk, dry_run)
+                    for chunk in chunks
+                ]
+                for future in as_completed(futures):
+                    results.extend(future.result())
+        else:
+            for chunk in chunks:
+                results.extend(recalculate_chunk(chunk, dry_run))
+        elapsed_time = time.time() - start_time
+
+        self._print_results(results, dry_run, elapsed_time)
+
+    def _print_results(
+        self, results: List[RecalculationResult], dry_run: bool, elapsed_time: float
+    ):
+        changed = sorted(
+            (result for result in results if result.changed),
+            key=lambda result: result.application_number,
+        )
+        failed = [result for result in results if result.error is not None]
+
+        for result in changed:
+            self.stdout.write(
+                f"Application {result.application_number}: {result.old_amount} -> {result.new_amount}"
+            )
+        for result in failed:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Failed to recalculate application {result.application_number}: {result.error}"
+                )
+            )
+
+        verb = "Would change" if dry_run else "Changed"
+        self.stdout.write(
+            f"{verb} the benefit amount of {len(changed)} of {len(results)} calculations"
+        )
+        self.stdout.write(
+            f"Recalculated {len(results) - len(failed)} calculations in"
+            f" {elapsed_time:.2f} seconds"
+            f" ({len(results) / max(elapsed_time, 0.001):.1f} calculations per second)"
+        )
+
+
+def _get_calculation_id_chunks(chunk_size: int) -> List[List[str]]:
+    ids = list(
+        Calculation.objects.filter(
+            application__status__in=HelsinkiBenefitCalculator.CALCULATION_ALLOWED_STATUSES
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    return [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+
+def recalculate_chunk(
+    calculation_ids: List[str], dry_run: bool
+) -> List[RecalculationResult]:
+    calculations = (
+        Calculation.objects.filter(id__in=calculation_ids)
+        .select_related("application", "application__employee")
+        .prefetch_related(
+            "application__pay_subsidies", "application__training_compensations"
+        )
+        .order_by("id")
+    )
+    return [_recalculate(calculation, dry_run) for calculation in calculations]
+
+
+def _recalculate(calculation: Calculation, dry_run: bool) -> RecalculationResult:
+    old_amount = calculation.calculated_benefit_amount
+    try:
+        new_amount: Union[Decimal, None]
+        if dry_run:
+            try:
+                new_amount = calculation.init_calculator().calculate_rows()
+            finally:
+                calculation.calculator = None
+        else:
+            calculation.calculate()
+            new_amount = calculation.calculated_benefit_amount
+    except Exception as e:
+        LOGGER.error(f"Failed to recalculate calculation {calculation.id}: {e}")
+        return RecalculationResult(
+            str(calculation.id),
+            calculation.application.application_number,
+            old_amount,
+            None,
+            str(e),
+        )
+    return RecalculationResult(
+        str(calculation.id),
+        calculation.application.application_number,
+        old_amount,
+        new_amount,
+    )
@@ -9,7 +9,12 @@ from django.utils.translation import gettext_lazy as _
 from encrypted_fields.fields import EncryptedCharField, SearchField
 from simple_history.models import HistoricalRecords
 
-from applications.models import Application, PAY_SUBSIDY_PERCENT_CHOICES
+from applications.models import (
+    Application,
+    FormerBenefitPeriod,
+    FormerBenefitPeriodSourceMixin,
+    PAY_SUBSIDY_PERCENT_CHOICES,
+)
 from calculator.enums import DescriptionType, RowType
 from common.exceptions import BenefitAPIException
 from common.utils import (
@@ -138,20 +143,27 @@ class Calculation(UUIDModel, TimeStampedModel, DurationMixin):
 
     @property
     def ahjo_rows(self):
-        rows = SalaryBenefitSubTotalRow.objects.filter(
-            calculation=self, row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
-        )
-
-        if rows.count() > 0:
-            return rows
-        if self.override_monthly_benefit_amount is not None:
-            return ManualOverrideTotalRow.objects.filter(
-                calculation=self, row_type=RowType.HELSINKI_BENEFIT_TOTAL_EUR
-            )
+        # The rows are picked from self.rows, so that prefetched rows are not queried again
+        rows = list(self.rows.all())
+        total_rows = [
+            row
+            for row in rows
+            if row.row_type == RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
+        ]
+        if total_rows:
+            row_class = SalaryBenefitSubTotalRow
         else:
-            return SalaryBenefitTotalRow.objects.filter(
-                calculation=self, row_type=RowType.HELSINKI_BENEFIT_TOTAL_EUR
+            total_rows = [
+                row
+                for row in rows
+                if row.row_type == RowType.HELSINKI_BENEFIT_TOTAL_EUR
+            ]
+            row_class = (
+                ManualOverrideTotalRow
+                if self.override_monthly_benefit_amount is not None
+                else SalaryBenefitTotalRow
             )
+        return [row_class.from_row(row, self) for row in total_rows]
 
     history = HistoricalRecords(table_name="bf_calculator_calculator_history")
 
@@ -338,12 +350,21 @@ class PaySubsidy(UUIDModel, TimeStampedModel, DurationMixin):
         ordering = ["application__created_at", "ordering"]
 
 
-class PreviousBenefit(UUIDModel, TimeStampedModel, DurationMixin):
+class PreviousBenefit(
+    FormerBenefitPeriodSourceMixin, UUIDModel, TimeStampedModel, DurationMixin
+):
     """
     Used to record benefits that have been granted before the Helsinki benefit system
     was taken to use. Up to two years of info is needed for the calculations.
     """
 
+    former_benefit_period_fields = (
+        "company_id",
+        "encrypted_social_security_number",
+        "start_date",
+        "end_date",
+    )
+
     company = models.ForeignKey(
         Company,
         verbose_name=_("company"),
@@ -374,6 +395,11 @@ class PreviousBenefit(UUIDModel, TimeStampedModel, DurationMixin):
 
     history = HistoricalRecords(table_name="bf_calculator_previousbenefit_history")
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.update_former_benefit_period_values():
+            FormerBenefitPeriod.objects.update_for_previous_benefit(self)
+
     def __str__(self):
         return (
             f"PreviousBenefit  {self.start_date}-{self.end_date} for"
@@ -470,6 +496,18 @@ class CalculationRow(UUIDModel, TimeStampedModel, DurationMixin):
             f"{self.amount if self.row_type != RowType.DESCRIPTION else ''}"
         )
 
+    @classmethod
+    def from_row(cls, row: "CalculationRow", calculation: Calculation):
+        """Return the row as an instance of this proxy model without fetching it again."""
+        field_names = [field.attname for field in cls._meta.concrete_fields]
+        proxy_row = cls.from_db(
+            row._state.db,
+            field_names,
+            [getattr(row, field_name) for field_name in field_names],
+        )
+        proxy_row.calculation = calculation
+        return proxy_row
+
     def update_row(self):
         self.amount = self.calculate_amount()
         self.description_fi = self.apply_description_template()
@@ -698,19 +736,16 @@ class SalaryBenefitMonthlyRow(CalculationRow):
 class TotalRowMixin:
     @property
     def monthly_amount(self):
-        # For each total row, there needs to be a row that defines the monthly amount
-        row = (
-            self.calculation.rows.filter(
-                ordering__lt=self.ordering,
-                row_type=RowType.HELSINKI_BENEFIT_MONTHLY_EUR,
-            )
-            .order_by("-ordering")
-            .first()
-        )
-        assert (
-            row is not None
-        ), "Application logic error - misconstructed application rows"
-        return row.amount
+        # For each total row, there needs to be a row that defines the monthly amount.
+        # The rows of the calculation are used, so that prefetched rows are not queried.
+        monthly_rows = [
+            row
+            for row in self.calculation.rows.all()
+            if row.row_type == RowType.HELSINKI_BENEFIT_MONTHLY_EUR
+            and row.ordering < self.ordering
+        ]
+        assert monthly_rows, "Application logic error - misconstructed application rows"
+        return max(monthly_rows, key=lambda row: row.ordering).amount
 
 
 class SalaryBenefitTotalRow(CalculationRow, TotalRowMixin):
@@ -761,12 +796,11 @@ class SalaryBenefitSumSubTotalsRow(CalculationRow):
     description_fi_template = "Helsinki-lisä yhteensä"
 
     def calculate_amount(self):
+        calculator = self.calculation.calculator
         return sum(
             [
-                row.amount
-                for row in self.calculation.rows.all().filter(
-                    row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
-                )
+                calculator.get_stored_amount(row)
+                for row in calculator.get_rows(RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR)
             ]
         )
 
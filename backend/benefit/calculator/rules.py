@@ -2,9 +2,10 @@ import collections
 import datetime
 import decimal
 import logging
-from typing import Union
+from typing import Optional, Union
 
 from django.db import transaction
+from simple_history.utils import bulk_create_with_history
 
 from applications.enums import ApplicationStatus, BenefitType
 from calculator.enums import DescriptionType, RowType
@@ -25,9 +26,10 @@ from calculator.models import (
     SalaryCostsRow,
     StateAidMaxMonthlyRow,
     TotalDeductionsMonthlyRow,
+    TrainingCompensation,
     TrainingCompensationMonthlyRow,
 )
-from common.utils import pairwise
+from common.utils import pairwise, to_decimal
 
 LOGGER = logging.getLogger(__name__)
 BenefitSubRange = collections.namedtuple(
@@ -37,9 +39,21 @@ BenefitSubRange = collections.namedtuple(
 
 
 class HelsinkiBenefitCalculator:
-    def __init__(self, calculation: Calculation):
+    def __init__(
+        self,
+        calculation: Calculation,
+        pay_subsidies: Optional[list[PaySubsidy]] = None,
+        training_compensations: Optional[list[TrainingCompensation]] = None,
+    ):
         self.calculation = calculation
+        # By default the pay subsidies and training compensations of the application are
+        # used. They can be given explicitly to calculate with unsaved source data.
+        self._pay_subsidies = pay_subsidies
+        self._training_compensations = training_compensations
         self._row_counter = 0
+        # The rows are built in memory and written to the database in a single
+        # bulk_create after all of them have been calculated.
+        self._rows = []
 
     def _get_change_days(
         self, pay_subsidies, training_compensations, start_date, end_date
@@ -52,6 +66,17 @@ class HelsinkiBenefitCalculator:
                 change_days.add(item.end_date + datetime.timedelta(days=1))
         return change_days
 
+    @staticmethod
+    def _sorted_by_start_date(items):
+        # same order as order_by("start_date") in PostgreSQL: nulls last
+        return sorted(
+            items,
+            key=lambda item: (
+                item.start_date is None,
+                item.start_date or datetime.date.min,
+            ),
+        )
+
     def _get_item_in_effect(
         self, items: list[PaySubsidy], day: datetime.date
     ) -> Union[PaySubsidy, None]:
@@ -68,16 +93,26 @@ class HelsinkiBenefitCalculator:
         return None
 
     @staticmethod
-    def get_calculator(calculation: Calculation):
+    def get_calculator(calculation: Calculation, **kwargs):
         # in future, one might use e.g. application date to determine the correct calculator
         if calculation.override_monthly_benefit_amount is not None:
-            return ManualOverrideCalculator(calculation)
+            return ManualOverrideCalculator(calculation, **kwargs)
         elif calculation.application.benefit_type == BenefitType.SALARY_BENEFIT:
-            return SalaryBenefitCalculator2023(calculation)
+            return SalaryBenefitCalculator2023(calculation, **kwargs)
         elif calculation.application.benefit_type == BenefitType.EMPLOYMENT_BENEFIT:
-            return EmployeeBenefitCalculator2021(calculation)
+            return EmployeeBenefitCalculator2021(calculation, **kwargs)
         else:
-            return DummyBenefitCalculator(calculation)
+            return DummyBenefitCalculator(calculation, **kwargs)
+
+    def get_pay_subsidies(self):
+        if self._pay_subsidies is not None:
+            return self._pay_subsidies
+        return self.calculation.application.pay_subsidies.all()
+
+    def get_training_compensations(self):
+        if self._training_compensations is not None:
+            return self._training_compensations
+        return self.calculation.application.training_compensations.all()
 
     def get_sub_total_ranges(self):
         """return a list of BenefitSubRange(start_date, end_date, pay_subsidy, training_compensation)
@@ -88,11 +123,13 @@ class HelsinkiBenefitCalculator:
             raise ValueError(
                 "Cannot get sub total range of calculation start_date or end_date"
             )
+        # sort in Python so that prefetched pay subsidies and training compensations
+        # can be used without extra queries
         pay_subsidies = PaySubsidy.merge_compatible_subsidies(
-            list(self.calculation.application.pay_subsidies.order_by("start_date"))
+            self._sorted_by_start_date(self.get_pay_subsidies())
         )
-        training_compensations = list(
-            self.calculation.application.training_compensations.order_by("start_date")
+        training_compensations = self._sorted_by_start_date(
+            self.get_training_compensations()
         )
         change_days = self._get_change_days(
             pay_subsidies,
@@ -125,17 +162,25 @@ class HelsinkiBenefitCalculator:
 
         return ranges
 
+    def get_rows(self, row_type: RowType) -> list[CalculationRow]:
+        """Return the rows of the given type created so far in this calculation."""
+        return [row for row in self._rows if row.row_type == row_type]
+
     def get_amount(self, row_type: RowType, default=None):
         # This function is used by the various CalculationRow to retrieve a previously calculated value
-        row = (
-            self.calculation.rows.order_by("-ordering")
-            .filter(row_type=row_type)
-            .first()
-        )
-        if not row and default is not None:
+        rows = self.get_rows(row_type)
+        if not rows and default is not None:
             return default
-        assert row, f"Internal error, {row_type} not found"
-        return row.amount
+        assert rows, f"Internal error, {row_type} not found"
+        return self.get_stored_amount(rows[-1])
+
+    @staticmethod
+    def get_stored_amount(row: CalculationRow):
+        """Return the amount of the row rounded the same way as the database rounds it
+        when the row is saved, so that the results do not depend on whether the rows
+        have been persisted yet."""
+        field = CalculationRow._meta.get_field("amount")
+        return to_decimal(field.to_python(row.amount), field.decimal_places)
 
     # if calculation is enabled for non-handler users, need to change this
     # locked applications (transferred to Ahjo) should never be re-calculated.
@@ -155,18 +200,32 @@ class HelsinkiBenefitCalculator:
             return False
         return True
 
+    @property
+    def rows(self) -> list[CalculationRow]:
+        """The rows created by the latest calculate_rows() call, not necessarily saved."""
+        return list(self._rows)
+
+    def calculate_rows(self):
+        """
+        Create the calculation rows in memory, without touching the CalculationRow objects
+        stored in the database. Return the total benefit amount, or None if the calculation
+        can not be done with the current data.
+        """
+        self._rows = []
+        self._row_counter = 0
+        if not self.can_calculate():
+            return None
+        self.create_rows()
+        return self.get_amount(RowType.HELSINKI_BENEFIT_TOTAL_EUR)
+
     @transaction.atomic
     def calculate(self):
         if self.calculation.application.status in self.CALCULATION_ALLOWED_STATUSES:
             self.calculation.rows.all().delete()
-            if self.can_calculate():
-                self.create_rows()
-                # the total benefit amount is stored in Calculation model, for easier processing.
-                self.calculation.calculated_benefit_amount = self.get_amount(
-                    RowType.HELSINKI_BENEFIT_TOTAL_EUR
-                )
-            else:
-                self.calculation.calculated_benefit_amount = None
+            # the total benefit amount is stored in Calculation model, for easier processing.
+            self.calculation.calculated_benefit_amount = self.calculate_rows()
+            if self._rows:
+                bulk_create_with_history(self._rows, CalculationRow)
             self.calculation.save()
 
     def _create_row(self, row_class: CalculationRow, **kwargs):
@@ -175,7 +234,7 @@ class HelsinkiBenefitCalculator:
         )
         self._row_counter += 1
         row.update_row()
-        row.save()
+        self._rows.append(row)
         return row
 
     def create_rows(self):
@@ -225,7 +284,7 @@ class SalaryBenefitCalculator2023(HelsinkiBenefitCalculator):
             ]
         ):
             return False
-        for pay_subsidy in self.calculation.application.pay_subsidies.all():
+        for pay_subsidy in self.get_pay_subsidies():
             if not all([pay_subsidy.start_date, pay_subsidy.end_date]):
                 return False
         return True
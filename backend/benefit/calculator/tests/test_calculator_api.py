@@ -1,10 +1,12 @@
 import copy
 import decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from unittest import mock
 
 import factory
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from applications.api.v1.serializers.application import (
     ApplicantApplicationSerializer,
@@ -24,6 +26,8 @@ from applications.tests.test_applications_api import (
     get_handler_detail_url,
 )
 from calculator.api.v1.serializers import CalculationSerializer
+from calculator.enums import RowType
+from calculator.models import CalculationRow
 from calculator.tests.factories import CalculationFactory, PaySubsidyFactory
 from common.tests.conftest import get_client_user
 from common.utils import duration_in_months, to_decimal
@@ -691,3 +695,137 @@ def test_application_calculation_rows_id_exists(
     assert response.status_code == 200
     assert len(response.data["calculation"]["rows"]) > 1
     assert "id" in response.data["calculation"]["rows"][0].keys()
+
+
+CALCULATION_PREVIEW_URL = "/v1/calculator/preview/"
+
+
+def _get_calculation_preview_data(application):
+    calculation = application.calculation
+    return {
+        "monthly_pay": str(calculation.monthly_pay),
+        "vacation_money": str(calculation.vacation_money),
+        "other_expenses": str(calculation.other_expenses),
+        "start_date": str(calculation.start_date),
+        "end_date": str(calculation.end_date),
+        "state_aid_max_percentage": calculation.state_aid_max_percentage,
+        "override_monthly_benefit_amount": None,
+        "benefit_type": application.benefit_type,
+        "pay_subsidies": [
+            {
+                "start_date": str(pay_subsidy.start_date),
+                "end_date": str(pay_subsidy.end_date),
+                "pay_subsidy_percent": pay_subsidy.pay_subsidy_percent,
+                "work_time_percent": str(pay_subsidy.work_time_percent),
+                "disability_or_illness": pay_subsidy.disability_or_illness,
+            }
+            for pay_subsidy in application.pay_subsidies.all()
+        ],
+        "training_compensations": [
+            {
+                "start_date": str(training_compensation.start_date),
+                "end_date": str(training_compensation.end_date),
+                "monthly_amount": str(training_compensation.monthly_amount),
+            }
+            for training_compensation in application.training_compensations.all()
+        ],
+    }
+
+
+def test_calculation_preview(handler_api_client, handling_application):
+    handling_application.benefit_type = BenefitType.SALARY_BENEFIT
+    handling_application.save()
+    calculation = handling_application.calculation
+    calculation.start_date = date(2022, 1, 1)
+    calculation.end_date = date(2022, 6, 30)
+    calculation.state_aid_max_percentage = 50
+    calculation.save()
+    handling_application.pay_subsidies.all().delete()
+    for ordering, (start_date, end_date, percent) in enumerate(
+        [
+            (date(2022, 1, 1), date(2022, 2, 28), 50),
+            (date(2022, 3, 1), date(2022, 4, 30), 50),
+            (date(2022, 5, 1), date(2022, 6, 30), 100),
+        ]
+    ):
+        handling_application.pay_subsidies.create(
+            start_date=start_date,
+            end_date=end_date,
+            pay_subsidy_percent=percent,
+            ordering=ordering,
+        )
+    handling_application.training_compensations.create(
+        start_date=date(2022, 2, 1),
+        end_date=date(2022, 3, 31),
+        monthly_amount=decimal.Decimal("300.00"),
+        ordering=0,
+    )
+    data = _get_calculation_preview_data(handling_application)
+    row_ids = set(calculation.rows.values_list("id", flat=True))
+
+    with CaptureQueriesContext(connection) as context:
+        response = handler_api_client.post(CALCULATION_PREVIEW_URL, data)
+
+    assert response.status_code == 200
+    assert not [
+        query
+        for query in context.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+    assert set(calculation.rows.values_list("id", flat=True)) == row_ids
+
+    # the preview must match the rows created by the actual calculation
+    calculation.calculate()
+    calculation.refresh_from_db()
+    assert decimal.Decimal(response.data["calculated_benefit_amount"]) == (
+        calculation.calculated_benefit_amount
+    )
+    assert response.data["rows"] == [
+        {
+            "row_type": row.row_type,
+            "ordering": row.ordering,
+            "description_fi": row.description_fi,
+            "amount": str(row.amount),
+            "description_type": row.description_type,
+            "start_date": row.start_date and str(row.start_date),
+            "end_date": row.end_date and str(row.end_date),
+        }
+        for row in calculation.rows.order_by("ordering")
+    ]
+    # the two compatible 50% pay subsidies are merged, so the sub ranges are only
+    # split by the training compensation and the 100% pay subsidy
+    assert [row["row_type"] for row in response.data["rows"]].count(
+        RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
+    ) == 4
+
+
+def test_calculation_preview_incomplete_data(handler_api_client, handling_application):
+    data = _get_calculation_preview_data(handling_application)
+    data["start_date"] = None
+    row_count = CalculationRow.objects.count()
+
+    response = handler_api_client.post(CALCULATION_PREVIEW_URL, data)
+
+    assert response.status_code == 200
+    assert response.data["calculated_benefit_amount"] is None
+    assert response.data["rows"] == []
+    assert CalculationRow.objects.count() == row_count
+
+
+def test_calculation_preview_invalid_date_range(
+    handler_api_client, handling_application
+):
+    data = _get_calculation_preview_data(handling_application)
+    data["start_date"], data["end_date"] = data["end_date"], data["start_date"]
+
+    response = handler_api_client.post(CALCULATION_PREVIEW_URL, data)
+
+    assert response.status_code == 400
+    assert "end_date" in response.data
+
+
+def test_calculation_preview_as_applicant(api_client, handling_application):
+    response = api_client.post(
+        CALCULATION_PREVIEW_URL, _get_calculation_preview_data(handling_application)
+    )
+    assert response.status_code == 403
@@ -1,11 +1,15 @@
 from datetime import date
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from applications.enums import ApplicationStatus, BenefitType
 from applications.tests.conftest import *  # noqa
+from calculator.enums import RowType
 from calculator.models import (
     Calculation,
+    CalculationRow,
     PaySubsidy,
     PreviousBenefit,
     TrainingCompensation,
@@ -250,3 +254,57 @@ def test_calculation_required_fields(
     else:
         assert handling_application.calculation.calculated_benefit_amount is None
         assert handling_application.calculation.rows.count() == 0
+
+
+def test_calculation_rows_are_created_in_bulk(handling_application):
+    calculation = handling_application.calculation
+    calculation.start_date = date(2022, 1, 1)
+    calculation.end_date = date(2022, 6, 30)
+    calculation.save()
+    handling_application.pay_subsidies.all().delete()
+    for ordering, (start_date, end_date, percent) in enumerate(
+        [
+            (date(2022, 1, 1), date(2022, 2, 28), 50),
+            (date(2022, 3, 1), date(2022, 4, 30), 70),
+            (date(2022, 5, 1), date(2022, 6, 30), 100),
+        ]
+    ):
+        handling_application.pay_subsidies.create(
+            start_date=start_date,
+            end_date=end_date,
+            pay_subsidy_percent=percent,
+            ordering=ordering,
+        )
+    handling_application.benefit_type = BenefitType.SALARY_BENEFIT
+    handling_application.save()
+
+    with CaptureQueriesContext(connection) as context:
+        calculation.calculate()
+
+    row_inserts = [
+        query
+        for query in context.captured_queries
+        if query["sql"].startswith('INSERT INTO "bf_calculator_calculationrow"')
+    ]
+    assert len(row_inserts) == 1
+    rows = list(calculation.rows.order_by("ordering"))
+    assert [row.ordering for row in rows] == list(range(len(rows)))
+    assert (
+        len(
+            [
+                row
+                for row in rows
+                if row.row_type == RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
+            ]
+        )
+        == 3
+    )
+    assert calculation.calculated_benefit_amount == sum(
+        row.amount
+        for row in rows
+        if row.row_type == RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
+    )
+    # the bulk created rows must have their history records too
+    assert CalculationRow.history.filter(
+        id__in=[row.id for row in rows]
+    ).count() == len(rows)
@@ -0,0 +1,49 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+
+from applications.enums import ApplicationStatus
+from applications.tests.conftest import *  # noqa
+from calculator.models import Calculation
+from helsinkibenefit.tests.conftest import *  # noqa
+
+
+def test_recalculate_calculations(handling_application, decided_application):
+    calculation = handling_application.calculation
+    expected_amount = calculation.calculated_benefit_amount
+    assert expected_amount is not None
+    Calculation.objects.filter(
+        pk__in=[calculation.pk, decided_application.calculation.pk]
+    ).update(calculated_benefit_amount=Decimal("1.00"))
+
+    out = StringIO()
+    call_command("recalculate_calculations", dry_run=True, stdout=out)
+    output = out.getvalue()
+    assert (
+        f"Application {handling_application.application_number}: 1.00 -> {expected_amount}"
+        in output
+    )
+    # decided applications must never be recalculated
+    assert f"Application {decided_application.application_number}:" not in output
+    assert "Would change the benefit amount of 1 of 1 calculations" in output
+    calculation.refresh_from_db()
+    assert calculation.calculated_benefit_amount == Decimal("1.00")
+
+    out = StringIO()
+    call_command("recalculate_calculations", chunk_size=1, stdout=out)
+    output = out.getvalue()
+    assert "Changed the benefit amount of 1 of 1 calculations" in output
+    assert "Recalculated 1 calculations in" in output
+    calculation.refresh_from_db()
+    assert calculation.calculated_benefit_amount == expected_amount
+    assert calculation.rows.count() > 0
+    decided_application.calculation.refresh_from_db()
+    assert decided_application.calculation.calculated_benefit_amount == Decimal("1.00")
+
+
+def test_recalculate_calculations_nothing_to_do(decided_application):
+    assert decided_application.status == ApplicationStatus.ACCEPTED
+    out = StringIO()
+    call_command("recalculate_calculations", stdout=out)
+    assert "No calculations to recalculate" in out.getvalue()
@@ -4,6 +4,7 @@ import random
 import factory.random
 import pytest
 from django.contrib.auth.models import Permission
+from django.core.cache import cache
 from django.utils.translation import activate
 from freezegun import freeze_time
 from langdetect import DetectorFactory
@@ -25,6 +26,7 @@ def setup_test_environment(settings):
     settings.LANGUAGE_CODE = "fi"
     settings.DISABLE_TOS_APPROVAL_CHECK = False
     settings.NEXT_PUBLIC_MOCK_FLAG = False
+    cache.clear()
     factory.random.reseed_random("777")
     DetectorFactory.seed = 0
     random.seed(777)
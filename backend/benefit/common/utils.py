@@ -432,15 +432,18 @@ def get_date_range_end_with_days360(start_date: date, n_months: int):
 
 def hash_file(file: File) -> str:
     """Hash attachment file"""
-    # Create a new SHA256 hash object
-    sha256 = hashlib.sha256()
-
     with file.open() as f:
-        # Read and update hash in chunks for efficiency
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256.update(chunk)
+        return hash_file_content(f)
+
 
-        # Return the hexadecimal representation of the hash
+def hash_file_content(file: File) -> str:
+    """
+    Hash the content of a file that is open, e.g. an uploaded file that has not been
+    stored yet. The file is read from the start and it is left open.
+    """
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
     return sha256.hexdigest()
 
 
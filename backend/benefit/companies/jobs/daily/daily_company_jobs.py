@@ -0,0 +1,9 @@
+from django.core.management import call_command
+from django_extensions.management.jobs import DailyJob
+
+
+class Job(DailyJob):
+    help = "Refresh the organisation data of the companies that is about to go stale."
+
+    def execute(self):
+        call_command("refresh_organisation_data")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from companies.services import get_companies_to_refresh, refresh_organisation_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the organisation data of the companies from Palveluväylä and YRTTI"
+        " before it becomes older than ORGANISATION_DATA_MAX_AGE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=500,
+            help="Number of companies to refresh, the oldest data first",
+        )
+
+    def handle(self, *args, **options):
+        companies = get_companies_to_refresh(options["number"])
+        refreshed = refresh_organisation_data(companies)
+        self.stdout.write(
+            f"{timezone.now()}: Refreshed the organisation data of {refreshed}"
+            f" of {len(companies)} companies"
+        )
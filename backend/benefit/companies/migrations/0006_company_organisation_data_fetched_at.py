@@ -0,0 +1,19 @@
+# Generated by Django 4.2.11 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("companies", "0005_company_name_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="organisation_data_fetched_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="time organisation data fetched"
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -12,6 +13,11 @@ class Company(AbstractCompany):
     company_form_code = models.IntegerField(
         verbose_name=_("YTJ type code for company form")
     )
+    # The time the organisation data was last fetched from Palveluväylä or YRTTI. The
+    # data is read from the company within ORGANISATION_DATA_MAX_AGE of this time.
+    organisation_data_fetched_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("time organisation data fetched")
+    )
 
     def __str__(self):
         return self.name
@@ -20,6 +26,14 @@ class Company(AbstractCompany):
         db_table = "bf_companies_company"
         verbose_name = _("company")
         verbose_name_plural = _("companies")
+        indexes = [
+            # for the trigram search of the handler application search
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="bf_company_name_trgm_idx",
+            ),
+        ]
 
     def get_full_address(self):
         return f"{self.street_address}, {self.postcode} {self.city}"
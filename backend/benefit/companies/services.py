@@ -1,6 +1,16 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, List, Optional
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
 from django.http import Http404
-from requests import HTTPError
+from django.utils import timezone
+from requests import HTTPError, RequestException
 from rest_framework.exceptions import APIException
 
 from common.utils import update_object
@@ -9,6 +19,79 @@ from companies.tests.factories import CompanyFactory, generate_search_results
 from shared.service_bus.service_bus_client import ServiceBusClient
 from shared.yrtti.yrtti_client import YRTTIClient
 
+LOGGER = logging.getLogger(__name__)
+
+ORGANISATION_SEARCH_CACHE_KEY = "companies:organisation-search:{}"
+ORGANISATION_CACHE_KEY = "companies:organisation:{}"
+# The time (seconds) after which a failed background refresh can be retried
+CACHE_REFRESH_TIMEOUT = 60
+
+# The Service Bus and YRTTI requests of a search are run at the same time. The stale
+# cache entries are refreshed in a separate pool, as the refresh runs lookups itself.
+_lookup_executor = ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="organisation-lookup"
+)
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="organisation-refresh"
+)
+
+# The fields of the company that are refreshed from the organisation data
+ORGANISATION_DATA_FIELDS = [
+    "name",
+    "company_form",
+    "company_form_code",
+    "street_address",
+    "postcode",
+    "city",
+]
+# The number of companies whose organisation data is fetched at the same time
+ORGANISATION_DATA_REFRESH_MAX_WORKERS = 4
+
+
+def _get_cached(key: str, fetch: Callable):
+    """
+    Return the cached result of fetch(), or call it and cache the result. An expired
+    result is returned as long as it is in the cache, and it is refreshed in the
+    background, so only the first lookup waits for the registries.
+    """
+    if not settings.ORGANISATION_LOOKUP_CACHE_TTL:
+        return fetch()
+    entry = cache.get(key)
+    if entry is None:
+        return _fetch_and_cache(key, fetch)
+    if entry["expires_at"] <= time.time() and cache.add(
+        f"{key}:refresh", True, timeout=CACHE_REFRESH_TIMEOUT
+    ):
+        _refresh_executor.submit(_refresh_cached, key, fetch)
+    return entry["value"]
+
+
+def _fetch_and_cache(key: str, fetch: Callable):
+    value = fetch()
+    ttl = settings.ORGANISATION_LOOKUP_CACHE_TTL
+    cache.set(
+        key,
+        {"value": value, "expires_at": time.time() + ttl},
+        timeout=ttl + settings.ORGANISATION_LOOKUP_CACHE_STALE_TTL,
+    )
+    return value
+
+
+def _refresh_cached(key: str, fetch: Callable) -> None:
+    try:
+        _fetch_and_cache(key, fetch)
+    except Exception:
+        LOGGER.exception(f"Refreshing the cached organisation lookup {key} failed")
+    finally:
+        cache.delete(f"{key}:refresh")
+
+
+def _get_search_cache_key(search_term: str) -> str:
+    normalized_search_term = " ".join(search_term.split()).casefold()
+    return ORGANISATION_SEARCH_CACHE_KEY.format(
+        hashlib.sha256(normalized_search_term.encode()).hexdigest()
+    )
+
 
 def get_or_create_company_using_company_data(company_data: dict) -> Company:
     """
@@ -24,42 +107,130 @@ def get_or_create_company_using_company_data(company_data: dict) -> Company:
         business_id=business_id,
         defaults={"company_form_code": company_data["company_form_code"]},
     )
+    company_data["organisation_data_fetched_at"] = timezone.now()
     update_object(company, company_data)
 
     return company
 
 
 def get_or_create_organisation_with_business_id(business_id: str) -> Company:
-    try:
-        organisation = get_or_create_organisation_with_business_id_via_service_bus(
-            business_id
+    """
+    Return the company with the business id. The company is read from the database if
+    its organisation data has been fetched within ORGANISATION_DATA_MAX_AGE. Otherwise
+    the data is fetched from Palveluväylä or YRTTI, and if they are not available,
+    the company in the database is returned with the data it has.
+    """
+    if settings.NEXT_PUBLIC_MOCK_FLAG:
+        organisation = get_or_create_company_using_company_data(
+            CompanyFactory().__dict__
         )
-    except HTTPError:
-        organisation = get_or_create_association_with_business_id(business_id)
+    elif organisation := get_company_with_fresh_organisation_data(business_id):
+        return organisation
+    else:
+        try:
+            organisation_data = _get_cached(
+                ORGANISATION_CACHE_KEY.format(business_id.strip()),
+                lambda: _get_organisation_data(business_id),
+            )
+        except RequestException:
+            organisation = Company.objects.filter(business_id=business_id).first()
+            if organisation is None:
+                raise
+            LOGGER.warning(
+                f"Could not fetch the organisation data of {business_id},"
+                " using the data saved in the database"
+            )
+            return organisation
+        organisation = get_or_create_company_using_company_data(dict(organisation_data))
     if organisation:
         return organisation
     raise Http404("Organisation not found")
 
 
-def get_or_create_organisation_with_business_id_via_service_bus(
-    business_id: str,
-) -> Company:
-    """Create a company instance using the Palveluväylä integration."""
+def _get_organisation_data(business_id: str) -> dict:
+    """
+    Get the organisation data from the Palveluväylä integration, or from the Yrtti
+    integration if the organisation is not found in Palveluväylä.
+    """
+    try:
+        return ServiceBusClient().get_organisation_info_with_business_id(business_id)
+    except HTTPError:
+        return YRTTIClient().get_association_info_with_business_id(business_id)
+
 
-    if settings.NEXT_PUBLIC_MOCK_FLAG:
-        company_data = CompanyFactory().__dict__
-    else:
-        sb_client = ServiceBusClient()
-        company_data = sb_client.get_organisation_info_with_business_id(business_id)
-    return get_or_create_company_using_company_data(company_data)
+def get_company_with_fresh_organisation_data(business_id: str) -> Optional[Company]:
+    max_age = settings.ORGANISATION_DATA_MAX_AGE
+    if not max_age:
+        return None
+    return Company.objects.filter(
+        business_id=business_id,
+        organisation_data_fetched_at__gte=timezone.now() - timedelta(seconds=max_age),
+    ).first()
+
+
+def get_companies_to_refresh(number: int) -> List[Company]:
+    """
+    Return the companies whose organisation data is older than half of
+    ORGANISATION_DATA_MAX_AGE, or has never been fetched, the oldest data first. They
+    are refreshed before the data goes stale, so the reads do not have to fetch it.
+    """
+    refresh_before = timezone.now() - timedelta(
+        seconds=settings.ORGANISATION_DATA_MAX_AGE / 2
+    )
+    return list(
+        Company.objects.filter(
+            Q(organisation_data_fetched_at__isnull=True)
+            | Q(organisation_data_fetched_at__lt=refresh_before)
+        ).order_by(F("organisation_data_fetched_at").asc(nulls_first=True), "pk")[
+            :number
+        ]
+    )
 
 
-def get_or_create_association_with_business_id(business_id: str) -> Company:
-    """Create a company instance using the Yrtti integration."""
+def refresh_organisation_data(companies: List[Company]) -> int:
+    """
+    Fetch the organisation data of the companies concurrently and update the companies
+    in one bulk update. A company whose data cannot be fetched keeps its old data.
 
-    yrtti_client = YRTTIClient()
-    association_data = yrtti_client.get_association_info_with_business_id(business_id)
-    return get_or_create_company_using_company_data(association_data)
+    :return: The number of the refreshed companies.
+    """
+    with ThreadPoolExecutor(
+        max_workers=ORGANISATION_DATA_REFRESH_MAX_WORKERS,
+        thread_name_prefix="organisation-data-refresh",
+    ) as executor:
+        results = executor.map(
+            _fetch_organisation_data, [company.business_id for company in companies]
+        )
+        fetched_at = timezone.now()
+        refreshed = []
+        for company, organisation_data in zip(companies, results):
+            if organisation_data is None:
+                continue
+            for field in ORGANISATION_DATA_FIELDS:
+                setattr(company, field, organisation_data[field])
+            company.organisation_data_fetched_at = fetched_at
+            refreshed.append(company)
+
+    Company.objects.bulk_update(
+        refreshed, ORGANISATION_DATA_FIELDS + ["organisation_data_fetched_at"]
+    )
+    return len(refreshed)
+
+
+def _fetch_organisation_data(business_id: str) -> Optional[dict]:
+    try:
+        organisation_data = _get_organisation_data(business_id)
+    except (RequestException, KeyError, ValueError):
+        LOGGER.warning(
+            f"Could not refresh the organisation data of {business_id}", exc_info=True
+        )
+        return None
+    if not organisation_data or any(
+        organisation_data.get(field) is None for field in ORGANISATION_DATA_FIELDS
+    ):
+        LOGGER.warning(f"No organisation data found for {business_id}")
+        return None
+    return organisation_data
 
 
 def search_organisations(search_term: str) -> list[dict]:
@@ -67,16 +238,25 @@ def search_organisations(search_term: str) -> list[dict]:
 
     if settings.NEXT_PUBLIC_MOCK_FLAG:
         company_data = association_data = generate_search_results(search_term)
+        merged_results = company_data + association_data
     else:
-        sb_client = ServiceBusClient()
-        company_data = sb_client.search_companies(search_term)
-        association_data = []
-        # Option to disable YRTTI as their test api has some difficulties
-        if not settings.YRTTI_DISABLE:
-            yrtti_client = YRTTIClient()
-            association_data = yrtti_client.search_associations(search_term)
-    merged_results = company_data + association_data
+        merged_results = _get_cached(
+            _get_search_cache_key(search_term),
+            lambda: _search_organisations(search_term),
+        )
     results_without_duplicates = [
         dict(unique) for unique in {tuple(result.items()) for result in merged_results}
     ]
     return results_without_duplicates
+
+
+def _search_organisations(search_term: str) -> list[dict]:
+    """Search both registries at the same time."""
+    company_data = _lookup_executor.submit(
+        lambda: ServiceBusClient().search_companies(search_term)
+    )
+    association_data = []
+    # Option to disable YRTTI as their test api has some difficulties
+    if not settings.YRTTI_DISABLE:
+        association_data = YRTTIClient().search_associations(search_term)
+    return company_data.result() + association_data
@@ -0,0 +1,280 @@
+import re
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from requests.exceptions import ConnectionError
+
+from companies import services
+from companies.models import Company
+from companies.services import (
+    get_or_create_organisation_with_business_id,
+    search_organisations,
+)
+from companies.tests.data.company_data import (
+    DUMMY_SERVICE_BUS_RESPONSE,
+    DUMMY_YRTTI_RESPONSE,
+)
+from companies.tests.factories import CompanyFactory
+
+SERVICE_BUS_INFO_PATH = f"{settings.SERVICE_BUS_BASE_URL}/GetCompany"
+SERVICE_BUS_SEARCH_PATH = f"{settings.SERVICE_BUS_BASE_URL}/SearchCompany"
+YRTTI_BASIC_INFO_PATH = f"{settings.YRTTI_BASE_URL}/BasicInfo"
+YRTTI_SEARCH_PATH = f"{settings.YRTTI_BASE_URL}/AdvancedSearch"
+
+
+def _service_bus_search_response(name, business_id):
+    return {
+        "SearchCompanyResult": {
+            "SearchResults": {
+                "NameSearchQueryResult": [{"Name": name, "BusinessId": business_id}]
+            }
+        }
+    }
+
+
+def _yrtti_search_response(name, business_id):
+    return {
+        "AdvancedSearchResponse": {
+            "MatchedAssociation": [
+                {
+                    "BusinessId": business_id,
+                    "AssociationNameInfo": [
+                        {"AssociationName": name, "AssociationNameLanguage": "FI"}
+                    ],
+                }
+            ]
+        }
+    }
+
+
+@pytest.fixture
+def search_mocks(requests_mock):
+    return (
+        requests_mock.post(
+            SERVICE_BUS_SEARCH_PATH,
+            json=_service_bus_search_response("Testiyhtiö Oy", "1234567-8"),
+        ),
+        requests_mock.post(
+            YRTTI_SEARCH_PATH,
+            json=_yrtti_search_response("Testiyhdistys ry", "8765432-1"),
+        ),
+    )
+
+
+@pytest.fixture
+def synchronous_refresh():
+    with mock.patch.object(
+        services._refresh_executor,
+        "submit",
+        side_effect=lambda fn, *args: fn(*args),
+    ) as submit_mock:
+        yield submit_mock
+
+
+def _expire_cache_entry(key):
+    entry = cache.get(key)
+    cache.set(key, {**entry, "expires_at": 0})
+
+
+def test_search_organisations_from_both_registries(search_mocks):
+    results = search_organisations("testi")
+
+    assert sorted(results, key=lambda result: result["business_id"]) == [
+        {"name": "Testiyhtiö Oy", "business_id": "1234567-8"},
+        {"name": "Testiyhdistys ry", "business_id": "8765432-1"},
+    ]
+
+
+def test_search_organisations_is_cached_by_normalized_search_term(search_mocks):
+    results = search_organisations("Testi  yhtiö")
+
+    assert search_organisations(" testi yhtiö ") == results
+    assert [search_mock.call_count for search_mock in search_mocks] == [1, 1]
+
+    search_organisations("testi")
+    assert [search_mock.call_count for search_mock in search_mocks] == [2, 2]
+
+
+def test_search_organisations_cache_disabled(settings, search_mocks):
+    settings.ORGANISATION_LOOKUP_CACHE_TTL = 0
+
+    search_organisations("testi")
+    search_organisations("testi")
+
+    assert [search_mock.call_count for search_mock in search_mocks] == [2, 2]
+
+
+def test_search_organisations_returns_stale_results_while_refreshing(
+    requests_mock, search_mocks, synchronous_refresh
+):
+    search_organisations("testi")
+    _expire_cache_entry(services._get_search_cache_key("testi"))
+    requests_mock.post(
+        SERVICE_BUS_SEARCH_PATH,
+        json=_service_bus_search_response("Uusi Oy", "1234567-8"),
+    )
+
+    stale_results = search_organisations("testi")
+
+    assert {"name": "Testiyhtiö Oy", "business_id": "1234567-8"} in stale_results
+    assert synchronous_refresh.call_count == 1
+    assert {"name": "Uusi Oy", "business_id": "1234567-8"} in search_organisations(
+        "testi"
+    )
+    assert synchronous_refresh.call_count == 1
+
+
+def test_failed_refresh_keeps_stale_results(
+    requests_mock, search_mocks, synchronous_refresh
+):
+    results = search_organisations("testi")
+    _expire_cache_entry(services._get_search_cache_key("testi"))
+    requests_mock.post(SERVICE_BUS_SEARCH_PATH, text="Error", status_code=500)
+
+    assert search_organisations("testi") == results
+    assert search_organisations("testi") == results
+    assert synchronous_refresh.call_count == 2
+
+
+@pytest.mark.django_db
+def test_organisation_with_business_id_is_cached(requests_mock):
+    business_id = DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"][
+        "BusinessId"
+    ]
+    service_bus_mock = requests_mock.post(
+        SERVICE_BUS_INFO_PATH, json=DUMMY_SERVICE_BUS_RESPONSE
+    )
+    requests_mock.post(YRTTI_BASIC_INFO_PATH, json=DUMMY_YRTTI_RESPONSE)
+
+    company = get_or_create_organisation_with_business_id(business_id)
+
+    assert get_or_create_organisation_with_business_id(business_id) == company
+    assert service_bus_mock.call_count == 1
+    assert Company.objects.get().business_id == business_id
+
+
+@pytest.mark.django_db
+def test_organisation_found_in_service_bus_is_not_fetched_from_yrtti(requests_mock):
+    business_id = DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"][
+        "BusinessId"
+    ]
+    requests_mock.post(SERVICE_BUS_INFO_PATH, json=DUMMY_SERVICE_BUS_RESPONSE)
+    yrtti_mock = requests_mock.post(YRTTI_BASIC_INFO_PATH, json=DUMMY_YRTTI_RESPONSE)
+
+    get_or_create_organisation_with_business_id(business_id)
+
+    assert not yrtti_mock.called
+
+
+@pytest.mark.django_db
+def test_organisation_with_business_id_falls_back_to_yrtti(requests_mock):
+    business_id = DUMMY_YRTTI_RESPONSE["BasicInfoResponse"]["BusinessId"]
+    requests_mock.post(
+        re.compile(re.escape(SERVICE_BUS_INFO_PATH)), text="Error", status_code=404
+    )
+    requests_mock.post(YRTTI_BASIC_INFO_PATH, json=DUMMY_YRTTI_RESPONSE)
+
+    company = get_or_create_organisation_with_business_id(business_id)
+
+    assert company.business_id == business_id
+    assert (
+        company.name
+        == DUMMY_YRTTI_RESPONSE["BasicInfoResponse"]["AssociationNameInfo"][0][
+            "AssociationName"
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_organisation_with_fresh_data_is_read_from_database(requests_mock):
+    company = CompanyFactory(
+        organisation_data_fetched_at=timezone.now() - timedelta(days=6)
+    )
+
+    assert get_or_create_organisation_with_business_id(company.business_id) == company
+    assert not requests_mock.called
+
+
+@pytest.mark.django_db
+def test_organisation_with_stale_data_is_fetched(requests_mock):
+    business_id = DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"][
+        "BusinessId"
+    ]
+    company = CompanyFactory(
+        business_id=business_id,
+        organisation_data_fetched_at=timezone.now() - timedelta(days=8),
+    )
+    requests_mock.post(SERVICE_BUS_INFO_PATH, json=DUMMY_SERVICE_BUS_RESPONSE)
+    requests_mock.post(YRTTI_BASIC_INFO_PATH, json=DUMMY_YRTTI_RESPONSE)
+
+    assert get_or_create_organisation_with_business_id(business_id) == company
+
+    company.refresh_from_db()
+    assert (
+        company.name
+        == DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"]["TradeName"][
+            "Name"
+        ]
+    )
+    assert company.organisation_data_fetched_at == timezone.now()
+
+
+@pytest.mark.django_db
+def test_organisation_with_stale_data_is_read_from_database_during_outage(
+    requests_mock,
+):
+    company = CompanyFactory(
+        organisation_data_fetched_at=timezone.now() - timedelta(days=8)
+    )
+    requests_mock.post(SERVICE_BUS_INFO_PATH, exc=ConnectionError)
+    requests_mock.post(YRTTI_BASIC_INFO_PATH, exc=ConnectionError)
+
+    assert get_or_create_organisation_with_business_id(company.business_id) == company
+
+
+@pytest.mark.django_db
+def test_refresh_organisation_data(requests_mock):
+    fresh_company = CompanyFactory(
+        organisation_data_fetched_at=timezone.now() - timedelta(days=3)
+    )
+    stale_company = CompanyFactory(
+        organisation_data_fetched_at=timezone.now() - timedelta(days=4)
+    )
+    new_company = CompanyFactory()
+    failing_company = CompanyFactory()
+    requests_mock.post(
+        SERVICE_BUS_INFO_PATH,
+        json=DUMMY_SERVICE_BUS_RESPONSE,
+        additional_matcher=lambda request: request.json()["BusinessId"]
+        != failing_company.business_id,
+    )
+    requests_mock.post(
+        SERVICE_BUS_INFO_PATH,
+        text="Error",
+        status_code=500,
+        additional_matcher=lambda request: request.json()["BusinessId"]
+        == failing_company.business_id,
+    )
+    requests_mock.post(YRTTI_BASIC_INFO_PATH, text="Error", status_code=404)
+    out = StringIO()
+
+    call_command("refresh_organisation_data", stdout=out)
+
+    assert "Refreshed the organisation data of 2 of 3 companies" in out.getvalue()
+    expected_name = DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"][
+        "TradeName"
+    ]["Name"]
+    for company in [stale_company, new_company]:
+        company.refresh_from_db()
+        assert company.name == expected_name
+        assert company.organisation_data_fetched_at == timezone.now()
+    for company in [fresh_company, failing_company]:
+        old_name = company.name
+        company.refresh_from_db()
+        assert company.name == old_name
@@ -156,6 +156,9 @@ env = environ.Env(
     SERVICE_BUS_AUTH_PASSWORD=(str, "sample_password"),
     SERVICE_BUS_TIMEOUT=(int, 30),
     SERVICE_BUS_SEARCH_LIMIT=(int, 10),
+    ORGANISATION_LOOKUP_CACHE_TTL=(int, 300),
+    ORGANISATION_LOOKUP_CACHE_STALE_TTL=(int, 3600),
+    ORGANISATION_DATA_MAX_AGE=(int, 604800),
     GDPR_API_QUERY_SCOPE=(str, "gdprquery"),
     GDPR_API_DELETE_SCOPE=(str, "gdprdelete"),
     # For AHJO Rest API authentication
@@ -170,6 +173,7 @@ env = environ.Env(
     AHJO_TEST_USER_LAST_NAME=(str, ""),
     AHJO_TEST_USER_AD_USERNAME=(str, ""),
     AHJO_REQUEST_TIMEOUT=(int, 60),
+    AHJO_REQUEST_MAX_WORKERS=(int, 8),
     ENABLE_CLAMAV=(bool, False),
     CLAMAV_URL=(str, ""),
     ENABLE_AHJO_AUTOMATION=(bool, False),
@@ -519,6 +523,16 @@ SERVICE_BUS_AUTH_USERNAME = env("SERVICE_BUS_AUTH_USERNAME")
 SERVICE_BUS_AUTH_PASSWORD = env("SERVICE_BUS_AUTH_PASSWORD")
 SERVICE_BUS_SEARCH_LIMIT = env("SERVICE_BUS_SEARCH_LIMIT")
 
+# The organisation searches and lookups of Service Bus and YRTTI are cached for the TTL
+# (seconds). An expired result is returned for the stale TTL while it is refreshed in
+# the background. A TTL of 0 disables the cache.
+ORGANISATION_LOOKUP_CACHE_TTL = env("ORGANISATION_LOOKUP_CACHE_TTL")
+ORGANISATION_LOOKUP_CACHE_STALE_TTL = env("ORGANISATION_LOOKUP_CACHE_STALE_TTL")
+# The companies are read from the database for the max age (seconds) after their
+# organisation data has been fetched. A daily job refreshes the data before it goes
+# stale. A max age of 0 fetches the data on every read.
+ORGANISATION_DATA_MAX_AGE = env("ORGANISATION_DATA_MAX_AGE")
+
 HANDLERS_GROUP_NAME = "Application handlers"
 
 GDPR_API_QUERY_SCOPE = env("GDPR_API_QUERY_SCOPE")
@@ -552,6 +566,7 @@ AHJO_TEST_USER_FIRST_NAME = env("AHJO_TEST_USER_FIRST_NAME")
 AHJO_TEST_USER_LAST_NAME = env("AHJO_TEST_USER_LAST_NAME")
 AHJO_TEST_USER_AD_USERNAME = env("AHJO_TEST_USER_AD_USERNAME")
 AHJO_REQUEST_TIMEOUT = env("AHJO_REQUEST_TIMEOUT")
+AHJO_REQUEST_MAX_WORKERS = env("AHJO_REQUEST_MAX_WORKERS")
 
 ENABLE_CLAMAV = env.bool("ENABLE_CLAMAV")
 CLAMAV_URL = env.str("CLAMAV_URL")
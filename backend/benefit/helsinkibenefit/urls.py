@@ -11,7 +11,11 @@ from drf_spectacular.views import (
 )
 from rest_framework_nested import routers
 
-from applications.api.v1 import application_batch_views, application_views
+from applications.api.v1 import (
+    application_batch_views,
+    application_views,
+    export_job_views,
+)
 from applications.api.v1.ahjo_decision_views import (
     DecisionProposalDraftUpdate,
     DecisionProposalTemplateSectionList,
@@ -72,6 +76,7 @@ handler_app_router.register(r"notes", HandlerNoteViewSet, basename="handler-note
 
 router.register(r"applicationbatches", application_batch_views.ApplicationBatchViewSet)
 router.register(r"previousbenefits", calculator_views.PreviousBenefitViewSet)
+router.register(r"exportjobs", export_job_views.ExportJobViewSet, basename="export-job")
 
 router.register(
     r"applicationalterations",
@@ -131,6 +136,11 @@ urlpatterns = [
     path("v1/company/get/<str:business_id>/", GetOrganisationByIdView.as_view()),
     path("v1/users/me/", CurrentUserView.as_view(), name="users-me"),
     path("v1/users/options/", UserOptionsView.as_view()),
+    path(
+        "v1/calculator/preview/",
+        calculator_views.CalculationPreviewView.as_view(),
+        name="calculation_preview",
+    ),
     path(
         "v1/handlerapplications/<str:application_id>/review/", ReviewStateView.as_view()
     ),
@@ -35,6 +35,13 @@ class ExcelColumns(models.TextChoices):
     TALPA = "talpa", _("Talpa")
 
 
+class ExportJobState(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    RUNNING = "running", _("Running")
+    DONE = "done", _("Done")
+    FAILED = "failed", _("Failed")
+
+
 class EmployerApplicationStatus(models.TextChoices):
     DRAFT = "draft", _("Draft")
     SUBMITTED = "submitted", _("Submitted")
@@ -0,0 +1,263 @@
+import collections
+import io
+import logging
+import tempfile
+import typing
+from typing import BinaryIO, Callable, List, Optional
+
+import xlsx_streaming
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.files import File
+from django.db.models import QuerySet
+from django.utils import timezone, translation
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from xlsxwriter import Workbook
+from xlsxwriter.worksheet import Format, Worksheet
+
+from applications.api.v1.serializers import YouthApplicationExcelExportSerializer
+from applications.models import ExportJob, YouthApplication
+
+LOGGER = logging.getLogger(__name__)
+
+to_isoformat_localdate = YouthApplicationExcelExportSerializer.to_isoformat_localdate
+to_local_year = YouthApplicationExcelExportSerializer.to_local_year
+
+
+def get_youth_application_export_queryset(
+    queryset: QuerySet[YouthApplication],
+) -> QuerySet[YouthApplication]:
+    """
+    Fetch the youth summer vouchers with the applications, and leave out the handler
+    VTJ JSON, which is not exported.
+    """
+    return queryset.select_related("youth_summer_voucher").defer(
+        "encrypted_handler_vtj_json"
+    )
+
+
+def _get_model_value(app: YouthApplication, field: str) -> Optional[str]:
+    value = getattr(app, field)
+    return None if value is None else str(value)
+
+
+class YouthApplicationExcelRowBuilder:
+    """
+    Build the rows of the youth application Excel export. The rows have the same values
+    as YouthApplicationExcelExportSerializer gives, but the cell getters are resolved and
+    the translations are made once per export instead of once per row.
+    """
+
+    def __init__(self, source_fields: List[str]):
+        with translation.override("fi"):
+            self.unlisted_school_values = {True: str(_("Kyllä")), False: str(_("Ei"))}
+        self.getters: List[Callable] = [
+            self._get_getter(source_field) for source_field in source_fields
+        ]
+
+    def _get_getter(self, source_field: str) -> Callable:
+        getter = getattr(self, f"get_{source_field}", None)
+        if getter is None:
+            return lambda app: _get_model_value(app, source_field)
+        return getter
+
+    def build(self, app: YouthApplication) -> list:
+        return [getter(app) for getter in self.getters]
+
+    @staticmethod
+    def get_summer_voucher_serial_number(app: YouthApplication) -> Optional[int]:
+        # The voucher is selected with the application, so this does not query
+        try:
+            youth_summer_voucher = app.youth_summer_voucher
+        except ObjectDoesNotExist:
+            return None
+        return youth_summer_voucher.summer_voucher_serial_number
+
+    @staticmethod
+    def get_birth_year(app: YouthApplication) -> int:
+        return app.birthdate.year
+
+    @staticmethod
+    def get_birthdate(app: YouthApplication) -> str:
+        return app.birthdate.isoformat()
+
+    @staticmethod
+    def get_application_year(app: YouthApplication) -> int:
+        return to_local_year(app.created_at)
+
+    @staticmethod
+    def get_application_date(app: YouthApplication) -> str:
+        return to_isoformat_localdate(app.created_at)
+
+    @staticmethod
+    def get_confirmation_date(app: YouthApplication) -> str:
+        return to_isoformat_localdate(app.receipt_confirmed_at)
+
+    @staticmethod
+    def get_additional_info_providing_date(app: YouthApplication) -> str:
+        return to_isoformat_localdate(app.additional_info_provided_at)
+
+    @staticmethod
+    def get_handling_date(app: YouthApplication) -> str:
+        return to_isoformat_localdate(app.handled_at)
+
+    @staticmethod
+    def get_additional_info_user_reasons(app: YouthApplication) -> str:
+        return ", ".join(sorted(app.additional_info_user_reasons))
+
+    def get_is_unlisted_school(self, app: YouthApplication) -> str:
+        return self.unlisted_school_values[bool(app.is_unlisted_school)]
+
+    @staticmethod
+    def get_vtj_last_name(app: YouthApplication) -> Optional[str]:
+        return app.vtj_last_name
+
+    @staticmethod
+    def get_vtj_home_municipality(app: YouthApplication) -> Optional[str]:
+        return app.vtj_home_municipality
+
+
+class YouthApplicationExcelExporter:
+    """
+    Write the youth application Excel export. The rows are streamed into the workbook in
+    batches of settings.EXCEL_DOWNLOAD_BATCH_SIZE applications.
+    """
+
+    @classmethod
+    def source_fields_and_output_names(cls) -> typing.OrderedDict[str, str]:
+        with translation.override("fi"):
+            return collections.OrderedDict(
+                [
+                    ("application_date", str(_("Hakupvm"))),
+                    ("id", str(_("Tunniste"))),
+                    ("status", str(_("Hakemuksen tila"))),
+                    ("application_year", str(_("Hakuvuosi"))),
+                    ("summer_voucher_serial_number", str(_("Kesäsetelinro"))),
+                    ("birth_year", str(_("Syntymävuosi"))),
+                    ("birthdate", str(_("Syntymäpvm"))),
+                    ("first_name", str(_("Etunimi"))),
+                    ("last_name", str(_("Sukunimi"))),
+                    ("vtj_last_name", str(_("VTJ-sukunimi"))),
+                    ("school", str(_("Koulu"))),
+                    ("is_unlisted_school", str(_("Listaamaton koulu?"))),
+                    ("email", str(_("Sähköposti"))),
+                    ("phone_number", str(_("Puhelinnro"))),
+                    ("postcode", str(_("Postinro"))),
+                    ("vtj_home_municipality", str(_("VTJ-kotikunta"))),
+                    ("additional_info_user_reasons", str(_("Lisätietosyyt"))),
+                    ("additional_info_description", str(_("Lisätiedot"))),
+                    ("language", str(_("Kieli"))),
+                    ("confirmation_date", str(_("Vahvistettu"))),
+                    ("additional_info_providing_date", str(_("Lisätiedot annettu"))),
+                    ("handling_date", str(_("Käsitelty"))),
+                ]
+            )
+
+    @classmethod
+    def source_fields(cls) -> List[str]:
+        return list(cls.source_fields_and_output_names().keys())
+
+    @classmethod
+    def output_column_names(cls) -> List[str]:
+        return list(cls.source_fields_and_output_names().values())
+
+    @staticmethod
+    def get_queryset() -> QuerySet[YouthApplication]:
+        return get_youth_application_export_queryset(
+            YouthApplication.objects.active().order_by("created_at", "pk")
+        )
+
+    @cached_property
+    def row_builder(self) -> YouthApplicationExcelRowBuilder:
+        return YouthApplicationExcelRowBuilder(self.source_fields())
+
+    def serializer(self, apps: QuerySet[YouthApplication]):
+        return (self.row_builder.build(app) for app in apps)
+
+    @property
+    def worksheet_name(self) -> str:
+        return str(_("Nuorten kesäsetelihakemukset"))
+
+    @property
+    def header_format_properties(self) -> dict:
+        return {"bold": True, "text_wrap": False}
+
+    @property
+    def xlsx_filename(self) -> str:
+        return f"{self.worksheet_name}-{timezone.localdate()}.xlsx"
+
+    def generate_data_row(self, app: YouthApplication, is_template: bool = False):
+        data_row = self.row_builder.build(app)
+        if not is_template:
+            return data_row
+        return [
+            (
+                YouthApplicationExcelExportSerializer.get_placeholder_value(
+                    source_field
+                )
+                if not value
+                else value
+            )
+            for source_field, value in zip(self.source_fields(), data_row)
+        ]
+
+    def write_data_row(
+        self,
+        worksheet: Worksheet,
+        row_number: int,
+        app: YouthApplication,
+        is_template: bool = False,
+    ):
+        data_row = self.generate_data_row(app, is_template)
+        for column_number, cell_value in enumerate(data_row):
+            worksheet.write(row_number, column_number, cell_value)
+
+    def write_header(self, worksheet: Worksheet, header_format: Format):
+        for column_number, column_name in enumerate(self.output_column_names()):
+            worksheet.write(0, column_number, column_name, header_format)
+
+    def xlsx_template(self, queryset: QuerySet[YouthApplication]):
+        result = io.BytesIO()
+        workbook: Workbook = Workbook(result)
+        worksheet: Worksheet = workbook.add_worksheet(self.worksheet_name)
+        header_format: Format = workbook.add_format(self.header_format_properties)
+        self.write_header(worksheet, header_format)
+        self.write_data_row(
+            worksheet=worksheet, row_number=1, app=queryset[0], is_template=True
+        )
+        workbook.close()
+        return result
+
+    def write(self, queryset: QuerySet[YouthApplication], output: BinaryIO) -> None:
+        for chunk in xlsx_streaming.stream_queryset_as_xlsx(
+            qs=queryset,
+            xlsx_template=self.xlsx_template(queryset),
+            serializer=self.serializer,
+            batch_size=settings.EXCEL_DOWNLOAD_BATCH_SIZE,
+        ):
+            output.write(chunk)
+
+
+def process_export_job(job: ExportJob) -> bool:
+    """
+    Write the Excel file of a claimed job into the storage and record the outcome. Return
+    True if the export succeeded.
+    """
+    exporter = YouthApplicationExcelExporter()
+    try:
+        queryset = exporter.get_queryset()
+        if not queryset.exists():
+            raise ValueError("No youth applications to export")
+        with tempfile.TemporaryFile() as output:
+            exporter.write(queryset, output)
+            output.seek(0)
+            job.file.save(exporter.xlsx_filename, File(output), save=False)
+        job.mark_done()
+    except Exception as e:
+        LOGGER.exception(f"Export job {job.pk} failed")
+        if job.file:
+            job.file.delete(save=False)
+        job.mark_failed(str(e))
+        return False
+    return True
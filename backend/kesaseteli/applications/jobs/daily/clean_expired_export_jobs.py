@@ -0,0 +1,16 @@
+import logging
+
+from django_extensions.management.jobs import DailyJob
+
+from applications.models import ExportJob
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Job(DailyJob):
+    help = "Clean the expired Excel export jobs and their files."
+
+    def execute(self):
+        LOGGER.info("Cleaning expired export jobs...")
+        deleted_count = ExportJob.objects.delete_expired()
+        LOGGER.info(f"Cleaned {deleted_count} export jobs.")
@@ -0,0 +1,9 @@
+from django.core.management import call_command
+from django_extensions.management.jobs import MinutelyJob
+
+
+class Job(MinutelyJob):
+    help = "Process the youth application Excel exports queued since the previous run."
+
+    def execute(self):
+        call_command("process_export_jobs")
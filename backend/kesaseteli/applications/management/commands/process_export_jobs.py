@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from applications.exporters.youth_application_excel_exporter import process_export_job
+from applications.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Produce the files of the queued youth application Excel exports. Several"
+        " instances of the command can be run at the same time. With --loop the command"
+        " keeps waiting for new jobs, so it can be run as a worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=10,
+            help="Number of jobs to process per round",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep processing new jobs until the command is stopped",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5,
+            help="Seconds to wait for new jobs when there are none, used with --loop",
+        )
+
+    def handle(self, number, loop, sleep, *args, **options):
+        while True:
+            processed = self.process_jobs(number)
+            if not loop:
+                break
+            if not processed:
+                # Do not keep an idle connection open between the rounds
+                close_old_connections()
+                time.sleep(sleep)
+
+    def process_jobs(self, number_to_process: int) -> int:
+        jobs = ExportJob.objects.claim(number_to_process)
+        for job in jobs:
+            if process_export_job(job):
+                self.stdout.write(self.style.SUCCESS(f"Export job {job.pk} done"))
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f"Export job {job.pk} failed: {job.error}")
+                )
+        return len(jobs)
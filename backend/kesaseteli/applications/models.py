@@ -1,8 +1,9 @@
 import json
 from datetime import date, datetime, timedelta
 from email.mime.image import MIMEImage
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from urllib.parse import quote, urljoin
 
 import jsonpath_ng
@@ -26,6 +27,7 @@ from applications.enums import (
     ATTACHMENT_CONTENT_TYPE_CHOICES,
     AttachmentType,
     EmployerApplicationStatus,
+    ExportJobState,
     HiredWithoutVoucherAssessment,
     SummerVoucherExceptionReason,
     VtjTestCase,
@@ -57,6 +59,15 @@ from shared.models.mixins import LockForUpdateMixin
 from shared.vtj.vtj_client import VTJClient
 
 
+@lru_cache(maxsize=None)
+def compile_jsonpath(jsonpath_expression: str):
+    """
+    Return the compiled JSONPath expression. The same few expressions are evaluated for
+    every youth application, and parsing an expression costs more than evaluating it.
+    """
+    return jsonpath_ng.parse(jsonpath_expression)
+
+
 class School(TimeStampedModel, UUIDModel):
     """
     List of active schools.
@@ -364,16 +375,38 @@ class YouthApplication(LockForUpdateMixin, TimeStampedModel, UUIDModel):
                 VTJClient().get_personal_info(self.social_security_number, end_user)
             )
 
+    def _get_original_vtj_data(self) -> dict:
+        """
+        Return the parsed original VTJ JSON and the values found from it. They are kept
+        with the instance as long as encrypted_original_vtj_json is not changed, so the
+        JSON is parsed once however many VTJ based properties are evaluated.
+        """
+        vtj_json = self.encrypted_original_vtj_json
+        vtj_data = getattr(self, "_original_vtj_data", None)
+        # Strings are immutable, so the same object always has the same content
+        if vtj_data is None or vtj_data["json"] is not vtj_json:
+            try:
+                parsed_vtj_json = json.loads(vtj_json)
+            except (json.decoder.JSONDecodeError, TypeError):
+                parsed_vtj_json = None
+            vtj_data = {"json": vtj_json, "parsed": parsed_vtj_json, "values": {}}
+            self._original_vtj_data = vtj_data
+        return vtj_data
+
     def _vtj_values(self, jsonpath_expression) -> list:
-        try:
-            vtj_json = json.loads(self.encrypted_original_vtj_json)
-        except (json.decoder.JSONDecodeError, TypeError):
+        vtj_data = self._get_original_vtj_data()
+        if vtj_data["parsed"] is None:
             return []
 
-        return [
-            match.value
-            for match in jsonpath_ng.parse(jsonpath_expression).find(vtj_json)
-        ]
+        values = vtj_data["values"]
+        if jsonpath_expression not in values:
+            values[jsonpath_expression] = [
+                match.value
+                for match in compile_jsonpath(jsonpath_expression).find(
+                    vtj_data["parsed"]
+                )
+            ]
+        return list(values[jsonpath_expression])
 
     def handler_processing_url(self):
         return handler_youth_application_processing_url(self.pk)
@@ -1329,3 +1362,113 @@ class Attachment(UUIDModel, TimeStampedModel):
         verbose_name = _("attachment")
         verbose_name_plural = _("attachments")
         ordering = ["-summer_voucher__created_at", "attachment_type", "-created_at"]
+
+
+class ExportJobManager(models.Manager):
+    def claim(self, limit: int) -> List["ExportJob"]:
+        """
+        Claim the oldest pending jobs and mark them as running. The rows are selected with
+        FOR UPDATE SKIP LOCKED, so several workers can claim jobs at the same time without
+        getting the same ones. Jobs that have been running for longer than
+        ExportJob.RUNNING_TIMEOUT are assumed to belong to a worker that has died, and
+        are claimed again.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(state=ExportJobState.PENDING)
+                    | Q(
+                        state=ExportJobState.RUNNING,
+                        started_at__lt=now - ExportJob.RUNNING_TIMEOUT,
+                    )
+                )
+                .order_by("created_at")[:limit]
+            )
+            for job in jobs:
+                job.state = ExportJobState.RUNNING
+                job.started_at = now
+            self.bulk_update(jobs, ["state", "started_at"])
+        return jobs
+
+    def delete_expired(self) -> int:
+        """Delete the jobs older than ExportJob.EXPIRATION together with their files."""
+        expired_jobs = self.filter(created_at__lt=timezone.now() - ExportJob.EXPIRATION)
+        count = 0
+        for job in expired_jobs:
+            job.delete()
+            count += 1
+        return count
+
+
+class ExportJob(UUIDModel, TimeStampedModel):
+    """
+    An Excel export of the youth applications that is produced by the process_export_jobs
+    command instead of the HTTP request that asked for it. The file is downloaded when
+    the job is done, and deleted with the job after EXPIRATION.
+    """
+
+    RUNNING_TIMEOUT = timedelta(hours=1)
+    EXPIRATION = timedelta(days=7)
+
+    objects = ExportJobManager()
+
+    state = models.CharField(
+        max_length=64,
+        verbose_name=_("state"),
+        choices=ExportJobState.choices,
+        default=ExportJobState.PENDING,
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="export_jobs",
+        verbose_name=_("created by"),
+        null=True,
+        blank=True,
+    )
+    file = models.FileField(
+        verbose_name=_("exported file"),
+        upload_to="export_jobs/",
+        null=True,
+        blank=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name=_("started at"), null=True, blank=True
+    )
+    completed_at = models.DateTimeField(
+        verbose_name=_("completed at"), null=True, blank=True
+    )
+    error = models.TextField(verbose_name=_("error"), blank=True)
+
+    def mark_done(self):
+        self.state = ExportJobState.DONE
+        self.completed_at = timezone.now()
+        self.save()
+
+    def mark_failed(self, error: str):
+        self.state = ExportJobState.FAILED
+        self.completed_at = timezone.now()
+        self.error = error
+        self.save()
+
+    def delete(self, using=None, keep_parents=False):
+        if self.file:
+            self.file.delete(save=False)
+        super().delete(using=using, keep_parents=keep_parents)
+
+    def __str__(self):
+        return f"{self.created_at}: {self.state}"
+
+    class Meta:
+        verbose_name = _("export job")
+        verbose_name_plural = _("export jobs")
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(state__in=[ExportJobState.PENDING, ExportJobState.RUNNING]),
+                name="ks_export_job_unfinished_idx",
+            )
+        ]
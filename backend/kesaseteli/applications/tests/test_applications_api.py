@@ -1,5 +1,9 @@
+from unittest import mock
+
 import pytest
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 
 from applications.api.v1.serializers import (
@@ -13,6 +17,7 @@ from common.tests.factories import (
     EmployerSummerVoucherFactory,
 )
 from shared.audit_log.models import AuditLogEntry
+from shared.audit_log.viewsets import AuditLoggingModelViewSet
 
 
 def get_list_url():
@@ -314,6 +319,32 @@ def test_application_update_writes_audit_log(api_client, user, application):
     assert audit_event["status"] == "SUCCESS"
 
 
+def _get_query_count(api_client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_application_read_audit_log_reuses_fetched_target(api_client, application):
+    url = get_detail_url(application)
+    api_client.get(url)
+
+    query_count = _get_query_count(api_client, url)
+    with mock.patch.object(
+        AuditLoggingModelViewSet, "_get_fetched_instance", return_value=None
+    ):
+        # looking the target up again costs at least one query
+        assert _get_query_count(api_client, url) > query_count
+
+    audit_event = AuditLogEntry.objects.last().message["audit_event"]
+    assert audit_event["target"] == {
+        "id": str(application.id),
+        "type": "EmployerApplication",
+    }
+
+
 @pytest.mark.django_db
 @override_settings(
     AUDIT_LOG_ORIGIN="TEST_SERVICE",
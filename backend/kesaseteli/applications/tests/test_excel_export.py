@@ -1,22 +1,28 @@
+import copy
 import random
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from io import BytesIO
+from io import BytesIO, StringIO
 from typing import List
 
 import openpyxl
 import pytest
-from django.http import StreamingHttpResponse
+from django.core.management import call_command
+from django.db import connection
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import reverse
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import translation
 from django.utils.timezone import localdate
 from freezegun import freeze_time
 from rest_framework import status
 
+from applications.api.v1.serializers import YouthApplicationExcelExportSerializer
 from applications.enums import (
     EmployerApplicationStatus,
     ExcelColumns,
+    ExportJobState,
     VtjTestCase,
     YouthApplicationStatus,
 )
@@ -43,9 +49,13 @@ from applications.exporters.excel_exporter import (
     SUM_FIELD_TITLE,
     WORK_HOURS_FIELD_TITLE,
 )
-from applications.models import EmployerSummerVoucher, YouthApplication
+from applications.exporters.youth_application_excel_exporter import (
+    get_youth_application_export_queryset,
+    YouthApplicationExcelExporter,
+    YouthApplicationExcelRowBuilder,
+)
+from applications.models import EmployerSummerVoucher, ExportJob, YouthApplication
 from applications.tests.test_models import create_test_employer_summer_vouchers
-from applications.views import YouthApplicationExcelExportViewSet
 from common.tests.factories import (
     ActiveVtjTestCaseYouthApplicationFactory,
     ActiveYouthApplicationFactory,
@@ -53,6 +63,7 @@ from common.tests.factories import (
     EmployerSummerVoucherFactory,
     InactiveYouthApplicationFactory,
     YouthApplicationFactory,
+    YouthSummerVoucherFactory,
 )
 from common.urls import handler_403_url
 from shared.audit_log.models import AuditLogEntry
@@ -66,6 +77,25 @@ def youth_excel_download_url():
     return reverse("youth-excel-download")
 
 
+def youth_excel_export_job_download_url(export_job):
+    return reverse("youth-excel-export-job-download", kwargs={"pk": export_job.pk})
+
+
+def export_youth_applications(client) -> FileResponse:
+    """Queue the youth application Excel export, process it and download the file."""
+    response = client.get(youth_excel_download_url())
+    assert response.status_code == 302
+    assert response.url == excel_download_url()
+    export_job = ExportJob.objects.get()
+    assert export_job.state == ExportJobState.PENDING
+
+    call_command("process_export_jobs", stdout=StringIO())
+
+    export_job.refresh_from_db()
+    assert export_job.state == ExportJobState.DONE
+    return client.get(youth_excel_export_job_download_url(export_job))
+
+
 def get_field_titles(fields: List[ExcelField]) -> List[str]:
     return [field.title for field in fields]
 
@@ -154,9 +184,18 @@ def test_youth_excel_download_no_youth_applications(staff_client):
 
 
 @pytest.mark.django_db
-def test_youth_excel_download_writes_audit_log(staff_client, youth_application):
+@pytest.mark.parametrize("action", ["list", "download"])
+def test_youth_excel_download_writes_audit_log(
+    staff_client, staff_user, youth_application, action
+):
+    if action == "list":
+        url = youth_excel_download_url()
+    else:
+        url = youth_excel_export_job_download_url(
+            ExportJob.objects.create(created_by=staff_user)
+        )
     old_audit_log_entry_count = AuditLogEntry.objects.count()
-    response = staff_client.get(youth_excel_download_url())
+    response = staff_client.get(url)
 
     assert AuditLogEntry.objects.count() == old_audit_log_entry_count + 1
     audit_event = AuditLogEntry.objects.first().message["audit_event"]
@@ -168,10 +207,53 @@ def test_youth_excel_download_writes_audit_log(staff_client, youth_application):
     assert audit_event["target"]["type"] == "YouthApplication"
     assert (
         audit_event["additional_information"]
-        == "YouthApplicationExcelExportViewSet.list"
+        == f"YouthApplicationExcelExportViewSet.{action}"
     )
 
 
+@pytest.mark.django_db
+@override_settings(NEXT_PUBLIC_MOCK_FLAG=False)
+def test_youth_excel_export_job_download(staff_client, youth_application):
+    staff_client.get(youth_excel_download_url())
+    export_job = ExportJob.objects.get()
+    download_url = youth_excel_export_job_download_url(export_job)
+    # The file is not produced in the request
+    assert not export_job.file
+    assert download_url not in staff_client.get(excel_download_url()).content.decode()
+    assert staff_client.get(download_url).status_code == 409
+
+    call_command("process_export_jobs", stdout=StringIO())
+
+    assert download_url in staff_client.get(excel_download_url()).content.decode()
+    response = staff_client.get(download_url)
+    assert response.status_code == 200
+    assert isinstance(response, FileResponse)
+
+    # Only the handler who started the export can download the file
+    export_job.created_by = None
+    export_job.save()
+    assert staff_client.get(download_url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_expired_youth_excel_export_jobs_are_deleted(youth_application):
+    ExportJob.objects.create()
+    call_command("process_export_jobs", stdout=StringIO())
+    expired_job = ExportJob.objects.get()
+    file_name = expired_job.file.name
+    assert expired_job.file.storage.exists(file_name)
+
+    with freeze_time(expired_job.created_at + ExportJob.EXPIRATION):
+        assert ExportJob.objects.delete_expired() == 0
+    with freeze_time(
+        expired_job.created_at + ExportJob.EXPIRATION + timedelta(seconds=1)
+    ):
+        assert ExportJob.objects.delete_expired() == 1
+
+    assert not ExportJob.objects.exists()
+    assert not expired_job.file.storage.exists(file_name)
+
+
 @pytest.mark.django_db
 @pytest.mark.xfail(reason="Audit log writing should be added to this endpoint")
 @override_settings(NEXT_PUBLIC_MOCK_FLAG=False)
@@ -428,9 +510,9 @@ def test_youth_excel_download_content(staff_client):  # noqa: C901
     apps = sorted(apps, key=youth_application_sorting_key)
 
     with translation.override("en"):  # Should still use Finnish translations
-        response = staff_client.get(youth_excel_download_url())
+        response = export_youth_applications(staff_client)
 
-    assert isinstance(response, StreamingHttpResponse)
+    assert isinstance(response, FileResponse)
 
     workbook = openpyxl.load_workbook(filename=BytesIO(response.getvalue()))
     active_worksheet = workbook.active
@@ -444,11 +526,11 @@ def test_youth_excel_download_content(staff_client):  # noqa: C901
     output_column_names = [column.value for column in header_row]
     with translation.override("fi"):  # Make extra sure to test for Finnish column names
         expected_output_columns_names = (
-            YouthApplicationExcelExportViewSet.output_column_names()
+            YouthApplicationExcelExporter.output_column_names()
         )
     assert output_column_names == expected_output_columns_names
 
-    source_fields = YouthApplicationExcelExportViewSet.source_fields()
+    source_fields = YouthApplicationExcelExporter.source_fields()
     for data_row, app in zip(data_rows, apps):
         for output_cell, source_field in zip(data_row, source_fields):
             output_value = output_cell.value
@@ -500,6 +582,61 @@ def test_youth_excel_download_content(staff_client):  # noqa: C901
                 assert output_value == getattr(app, source_field), source_field
 
 
+def _get_youth_application_export_rows(apps) -> List[list]:
+    row_builder = YouthApplicationExcelRowBuilder(
+        YouthApplicationExcelExporter.source_fields()
+    )
+    return [row_builder.build(app) for app in apps]
+
+
+@pytest.mark.django_db
+def test_youth_excel_export_rows_match_serializer():
+    YouthSummerVoucherFactory.create_batch(size=3)
+    ActiveYouthApplicationFactory.create_batch(size=3)
+    for vtj_test_case in VtjTestCase.values:
+        ActiveVtjTestCaseYouthApplicationFactory(last_name=vtj_test_case)
+    source_fields = YouthApplicationExcelExporter.source_fields()
+    apps = list(
+        get_youth_application_export_queryset(
+            YouthApplication.objects.order_by("created_at", "pk")
+        )
+    )
+
+    with CaptureQueriesContext(connection) as context:
+        rows = _get_youth_application_export_rows(apps)
+
+    assert context.captured_queries == []
+    assert rows == [
+        [
+            YouthApplicationExcelExportSerializer(app).data.get(source_field)
+            for source_field in source_fields
+        ]
+        for app in apps
+    ]
+
+
+@pytest.mark.django_db
+def test_youth_excel_export_rows_are_built_without_queries():
+    """
+    Build 50 000 rows of the youth application Excel export. The rows must be built
+    without queries.
+    """
+    row_count = 50_000
+    YouthSummerVoucherFactory.create_batch(size=2)
+    ActiveYouthApplicationFactory.create_batch(size=3)
+    fetched_apps = list(
+        get_youth_application_export_queryset(YouthApplication.objects.all())
+    )
+    # Copies of the fetched applications, so that each row parses its own VTJ JSON
+    apps = [copy.copy(app) for app in fetched_apps * (row_count // len(fetched_apps))]
+
+    with CaptureQueriesContext(connection) as context:
+        rows = _get_youth_application_export_rows(apps)
+
+    assert len(rows) == row_count
+    assert context.captured_queries == []
+
+
 @pytest.mark.django_db
 @override_settings(NEXT_PUBLIC_MOCK_FLAG=False)
 @pytest.mark.parametrize(
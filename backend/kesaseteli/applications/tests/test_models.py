@@ -1,4 +1,5 @@
 import itertools
+import json
 import operator
 import os
 from email.mime.image import MIMEImage
@@ -13,12 +14,18 @@ from django.test import override_settings
 from freezegun import freeze_time
 
 from applications.enums import EmployerApplicationStatus
-from applications.models import EmployerSummerVoucher, YouthSummerVoucher
+from applications.models import (
+    compile_jsonpath,
+    EmployerSummerVoucher,
+    YouthSummerVoucher,
+)
+from applications.tests.data.mock_vtj import mock_vtj_person_id_query_found_content
 from common.tests.factories import (
     AttachmentFactory,
     AwaitingManualProcessingYouthApplicationFactory,
     EmployerApplicationFactory,
     EmployerSummerVoucherFactory,
+    InactiveNoNeedAdditionalInfoYouthApplicationFactory,
     YouthSummerVoucherFactory,
 )
 from shared.common.tests.utils import utc_datetime
@@ -398,3 +405,33 @@ def test_youth_summer_voucher_helsinki_logo(language, expected_logo_from_file):
     expected_logo_mime_image = MIMEImage(expected_logo_content)
 
     assert logo_mime_image.get_payload() == expected_logo_mime_image.get_payload()
+
+
+@pytest.mark.django_db
+def test_youth_application_vtj_json_is_parsed_once():
+    app = InactiveNoNeedAdditionalInfoYouthApplicationFactory()
+    vtj_json = app.encrypted_original_vtj_json
+
+    with mock.patch("json.loads", wraps=json.loads) as loads_mock:
+        assert not app.need_additional_info
+        assert app.is_helsinkian
+        assert not app.is_applicant_dead_according_to_vtj
+        assert app.is_social_security_number_valid_according_to_vtj
+
+    assert [call.args[0] for call in loads_mock.call_args_list].count(vtj_json) == 1
+    assert compile_jsonpath("$.Henkilo") is compile_jsonpath("$.Henkilo")
+
+    # The values are found from the new VTJ JSON when it is changed
+    app.encrypted_original_vtj_json = mock_vtj_person_id_query_found_content(
+        first_name=app.first_name,
+        last_name="Eri sukunimi",
+        social_security_number=app.social_security_number,
+        is_alive=False,
+        is_home_municipality_helsinki=False,
+    )
+    assert app.vtj_last_name == "Eri sukunimi"
+    assert app.is_applicant_dead_according_to_vtj
+    assert not app.is_helsinkian
+
+    app.encrypted_original_vtj_json = None
+    assert app.vtj_last_name == ""
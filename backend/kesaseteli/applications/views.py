@@ -1,33 +1,36 @@
-import collections
-import io
-import typing
+import os
 from datetime import date
 from functools import partial
-from typing import List, Union
+from typing import Union
 
 import xlsx_streaming
 from django.conf import settings
 from django.db.models import F, OuterRef, QuerySet, Subquery, Window
 from django.db.models.functions import RowNumber
-from django.http import HttpResponse, HttpResponseRedirect, StreamingHttpResponse
-from django.shortcuts import render
-from django.utils import timezone, translation
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.translation import gettext_lazy as _
 from django.views.generic.base import TemplateView
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from xlsxwriter import Workbook
-from xlsxwriter.worksheet import Format, Worksheet
 
 from applications.api.v1.serializers import YouthApplicationExcelExportSerializer
-from applications.enums import EmployerApplicationStatus, ExcelColumns
+from applications.enums import EmployerApplicationStatus, ExcelColumns, ExportJobState
 from applications.exporters.excel_exporter import (
     generate_data_rows,
     generate_xlsx_template,
     get_exportable_fields,
     get_xlsx_filename,
 )
-from applications.models import EmployerSummerVoucher, YouthApplication
+from applications.exporters.youth_application_excel_exporter import (
+    YouthApplicationExcelExporter,
+)
+from applications.models import EmployerSummerVoucher, ExportJob, YouthApplication
 from common.decorators import enforce_handler_view_adfs_login
 from common.urls import handler_create_application_without_ssn_url
 from shared.audit_log.viewsets import AuditLoggingModelViewSet
@@ -43,9 +46,15 @@ class EmployerApplicationExcelDownloadView(TemplateView):
     template_name = "application_excel_download.html"
 
     def get_context_data(self, **kwargs):
+        user = self.request.user
         return super().get_context_data(
             **kwargs,
             handler_create_application_without_ssn_url=handler_create_application_without_ssn_url(),
+            export_jobs=(
+                ExportJob.objects.filter(created_by=user)
+                if user.is_authenticated
+                else ExportJob.objects.none()
+            ),
         )
 
     @staticmethod
@@ -204,123 +213,37 @@ class YouthApplicationExcelExportViewSet(AuditLoggingModelViewSet):
     def update(self, request, *args, **kwargs):
         return HttpResponse(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
-    @classmethod
-    def source_fields_and_output_names(cls) -> typing.OrderedDict[str, str]:
-        with translation.override("fi"):
-            return collections.OrderedDict(
-                [
-                    ("application_date", str(_("Hakupvm"))),
-                    ("id", str(_("Tunniste"))),
-                    ("status", str(_("Hakemuksen tila"))),
-                    ("application_year", str(_("Hakuvuosi"))),
-                    ("summer_voucher_serial_number", str(_("Kesäsetelinro"))),
-                    ("birth_year", str(_("Syntymävuosi"))),
-                    ("birthdate", str(_("Syntymäpvm"))),
-                    ("first_name", str(_("Etunimi"))),
-                    ("last_name", str(_("Sukunimi"))),
-                    ("vtj_last_name", str(_("VTJ-sukunimi"))),
-                    ("school", str(_("Koulu"))),
-                    ("is_unlisted_school", str(_("Listaamaton koulu?"))),
-                    ("email", str(_("Sähköposti"))),
-                    ("phone_number", str(_("Puhelinnro"))),
-                    ("postcode", str(_("Postinro"))),
-                    ("vtj_home_municipality", str(_("VTJ-kotikunta"))),
-                    ("additional_info_user_reasons", str(_("Lisätietosyyt"))),
-                    ("additional_info_description", str(_("Lisätiedot"))),
-                    ("language", str(_("Kieli"))),
-                    ("confirmation_date", str(_("Vahvistettu"))),
-                    ("additional_info_providing_date", str(_("Lisätiedot annettu"))),
-                    ("handling_date", str(_("Käsitelty"))),
-                ]
-            )
-
-    @classmethod
-    def source_fields(cls) -> List[str]:
-        return list(cls.source_fields_and_output_names().keys())
-
-    @classmethod
-    def output_column_names(cls) -> List[str]:
-        return list(cls.source_fields_and_output_names().values())
-
     def get_queryset(self):
-        return YouthApplication.objects.active().order_by("created_at", "pk")
-
-    def serializer(self, apps: QuerySet[YouthApplication]):
-        return (self.generate_data_row(app) for app in apps)
+        return YouthApplicationExcelExporter.get_queryset()
 
     @enforce_handler_view_adfs_login
-    def list(
-        self, request, *args, **kwargs
-    ) -> Union[HttpResponse, HttpResponseRedirect, StreamingHttpResponse]:
+    def list(self, request, *args, **kwargs) -> HttpResponse:
+        """
+        Queue an export of the youth applications and redirect to the Excel download
+        page, where the file can be downloaded when the export is done.
+        """
         with self.record_action(
             additional_information=f"{self.__class__.__name__}.list"
         ):
-            queryset = self.get_queryset()
-            if not queryset.exists():
+            if not self.get_queryset().exists():
                 return HttpResponse(_("Hakemuksia ei löytynyt."))
 
-            response = StreamingHttpResponse(
-                xlsx_streaming.stream_queryset_as_xlsx(
-                    qs=queryset,
-                    xlsx_template=self.xlsx_template(queryset),
-                    serializer=self.serializer,
-                    batch_size=settings.EXCEL_DOWNLOAD_BATCH_SIZE,
-                ),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            response[
-                "Content-Disposition"
-            ] = f"attachment; filename={self.xlsx_filename}"
-            return response
+            ExportJob.objects.create(created_by=request.user)
+            return redirect("excel-download")
 
-    @property
-    def worksheet_name(self) -> str:
-        return str(_("Nuorten kesäsetelihakemukset"))
-
-    @property
-    def header_format_properties(self) -> dict:
-        return {"bold": True, "text_wrap": False}
-
-    @property
-    def xlsx_filename(self) -> str:
-        return f"{self.worksheet_name}-{timezone.localdate()}.xlsx"
-
-    def generate_data_row(self, app: YouthApplication, is_template: bool = False):
-        data = self.serializer_class(app).data
-        return [
-            (
-                YouthApplicationExcelExportSerializer.get_placeholder_value(
-                    source_field
+    @enforce_handler_view_adfs_login
+    def download(self, request, *args, **kwargs) -> HttpResponse:
+        with self.record_action(
+            target=YouthApplication,
+            additional_information=f"{self.__class__.__name__}.download",
+        ):
+            job = get_object_or_404(ExportJob, pk=kwargs["pk"], created_by=request.user)
+            if job.state != ExportJobState.DONE or not job.file:
+                return HttpResponse(
+                    _("Tiedosto ei ole vielä valmis."), status=status.HTTP_409_CONFLICT
                 )
-                if is_template and not data.get(source_field)
-                else data.get(source_field)
+            return FileResponse(
+                job.file.open("rb"),
+                as_attachment=True,
+                filename=os.path.basename(job.file.name),
             )
-            for source_field in self.source_fields()
-        ]
-
-    def write_data_row(
-        self,
-        worksheet: Worksheet,
-        row_number: int,
-        app: YouthApplication,
-        is_template: bool = False,
-    ):
-        data_row = self.generate_data_row(app, is_template)
-        for column_number, cell_value in enumerate(data_row):
-            worksheet.write(row_number, column_number, cell_value)
-
-    def write_header(self, worksheet: Worksheet, header_format: Format):
-        for column_number, column_name in enumerate(self.output_column_names()):
-            worksheet.write(0, column_number, column_name, header_format)
-
-    def xlsx_template(self, queryset: QuerySet[YouthApplication]):
-        result = io.BytesIO()
-        workbook: Workbook = Workbook(result)
-        worksheet: Worksheet = workbook.add_worksheet(self.worksheet_name)
-        header_format: Format = workbook.add_format(self.header_format_properties)
-        self.write_header(worksheet, header_format)
-        self.write_data_row(
-            worksheet=worksheet, row_number=1, app=queryset[0], is_template=True
-        )
-        workbook.close()
-        return result
@@ -39,6 +39,11 @@ urlpatterns = [
         YouthApplicationExcelExportViewSet.as_view({"get": "list"}),
         name="youth-excel-download",
     ),
+    path(
+        "excel-download/export-jobs/<uuid:pk>/",
+        YouthApplicationExcelExportViewSet.as_view({"get": "download"}),
+        name="youth-excel-export-job-download",
+    ),
     path("logout/", LogoutView.as_view(), name="logout"),
 ]
 
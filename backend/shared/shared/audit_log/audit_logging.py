@@ -1,11 +1,17 @@
+import contextlib
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Callable, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
 from django.db.models import Model
 from django.db.models.base import ModelBase
+from django.dispatch import receiver
+from simple_history.signals import post_create_historical_record
 
 from shared.audit_log.enums import Operation, Role, Status
 from shared.audit_log.mappings import DJANGO_BACKEND_MAPPING
@@ -13,6 +19,89 @@ from shared.audit_log.models import AuditLogEntry
 
 User = get_user_model()
 
+_local = threading.local()
+
+
+@dataclass
+class _AuditLogBuffer:
+    # the number of atomic blocks that were open when the buffering started
+    atomic_depth: int
+    entries: List[AuditLogEntry] = field(default_factory=list)
+    # the latest history records saved while buffering, by the model and pk of the instance
+    history_records: Dict[Tuple[str, Any], Model] = field(default_factory=dict)
+    # the history records before them, if they are known without a query
+    previous_history_records: Dict[Tuple[str, Any], Model] = field(default_factory=dict)
+
+
+def _get_atomic_depth() -> int:
+    return len(transaction.get_connection(AuditLogEntry.objects.db).atomic_blocks)
+
+
+def _get_buffer() -> Optional[_AuditLogBuffer]:
+    return getattr(_local, "buffer", None)
+
+
+@contextlib.contextmanager
+def buffered():
+    """
+    Collect the audit log entries written in the managed code and save them with one
+    query when the managed code has finished.
+
+    Use inside the transaction of the logged changes: the entries are then saved in the
+    same transaction as without buffering. If the managed code raises an exception, its
+    entries are discarded like the changes of the rolled back transaction. Nested calls
+    collect their entries into the outermost buffer. The entries written in an atomic
+    block that is opened in the managed code are saved right away, so that they are
+    rolled back with the block.
+    """
+    buffer = _get_buffer()
+    if buffer is not None:
+        start = len(buffer.entries)
+        try:
+            yield
+        except BaseException:
+            del buffer.entries[start:]
+            raise
+        return
+
+    _local.buffer = _AuditLogBuffer(atomic_depth=_get_atomic_depth())
+    try:
+        yield
+        AuditLogEntry.objects.bulk_create(_local.buffer.entries)
+    finally:
+        _local.buffer = None
+
+
+def _get_history_key(instance: Model) -> Tuple[str, Any]:
+    return instance._meta.label, instance.pk
+
+
+def remember_history_state(instance: Model) -> None:
+    """
+    Remember the current state of the instance as its previous history record while
+    buffering. The changes of the next update of the instance are then logged without
+    querying its history. Call before the instance is changed.
+    """
+    buffer = _get_buffer()
+    if buffer is None or instance.pk is None or not hasattr(instance, "history"):
+        return
+    history_model = instance.history.model
+    buffer.previous_history_records[_get_history_key(instance)] = history_model(
+        **{
+            field.attname: getattr(instance, field.attname)
+            for field in history_model.tracked_fields
+        }
+    )
+
+
+@receiver(post_create_historical_record)
+def _remember_history_record(sender, instance, history_instance, **kwargs):
+    if (buffer := _get_buffer()) is not None:
+        key = _get_history_key(instance)
+        if key in buffer.history_records:
+            buffer.previous_history_records[key] = buffer.history_records[key]
+        buffer.history_records[key] = history_instance
+
 
 def _now() -> datetime:
     """Returns the current time in UTC timezone."""
@@ -87,15 +176,29 @@ def log(
     ):
         _add_changes(target, message)
 
-    AuditLogEntry.objects.create(
-        message=message,
-    )
+    entry = AuditLogEntry(message=message)
+    buffer = _get_buffer()
+    # The entries of a nested atomic block are saved in it, as it may be rolled back
+    if buffer is not None and _get_atomic_depth() <= buffer.atomic_depth:
+        buffer.entries.append(entry)
+    else:
+        entry.save()
 
 
 def _add_changes(target: Union[Model, ModelBase], message: dict) -> None:
-    # Model is using django-simple-history
-    latest_record = target.history.latest()
-    previous_record = latest_record.prev_record
+    # Model is using django-simple-history. When buffering, the history record saved by
+    # the update, and the state before it if it has been remembered, are already known
+    # and do not need to be queried.
+    buffer = _get_buffer()
+    key = _get_history_key(target)
+    if buffer is not None and key in buffer.history_records:
+        latest_record = buffer.history_records[key]
+        previous_record = (
+            buffer.previous_history_records.get(key) or latest_record.prev_record
+        )
+    else:
+        latest_record = target.history.latest()
+        previous_record = latest_record.prev_record
 
     if previous_record:
         delta = latest_record.diff_against(previous_record)
@@ -0,0 +1,17 @@
+import logging
+
+from django_extensions.management.jobs import DailyJob
+
+from shared.audit_log.partitions import create_partitions
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Job(DailyJob):
+    help = "Create the monthly AuditLogEntry partitions of the current and the coming months"
+
+    def execute(self):
+        created = create_partitions()
+        LOGGER.info(
+            f"Created {len(created)} audit log partitions: {', '.join(created)}"
+        )
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.11 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit_log", "0002_auditlogentry_created_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(
+                condition=models.Q(("is_sent", False)),
+                fields=["id"],
+                name="audit_log_unsent_idx",
+            ),
+        ),
+    ]
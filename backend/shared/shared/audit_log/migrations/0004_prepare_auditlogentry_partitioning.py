@@ -0,0 +1,76 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import F
+
+TABLE_NAME = "audit_log_auditlogentry"
+
+
+def prepare_partitioning(apps, schema_editor):
+    """
+    Build the indexes that make the audit log table attachable as a partition, without
+    blocking the writes to the table. The migration is not atomic, so that the indexes
+    can be built concurrently.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+
+    # The primary key of a partitioned table must contain the partition key
+    execute(
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS audit_log_id_created_at_uniq"
+        f' ON "{TABLE_NAME}" (id, created_at)'
+    )
+    # The primary key on id is replaced, but the ids of the entries stay unique
+    execute(
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS audit_log_id_uniq"
+        f' ON "{TABLE_NAME}" (id)'
+    )
+
+
+def unprepare_partitioning(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+
+    execute("DROP INDEX CONCURRENTLY IF EXISTS audit_log_id_uniq")
+    execute("DROP INDEX CONCURRENTLY IF EXISTS audit_log_id_created_at_uniq")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("audit_log", "0003_auditlogentry_unsent_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(prepare_partitioning, unprepare_partitioning),
+        AddIndexConcurrently(
+            model_name="auditlogentry",
+            index=models.Index(
+                F("message__audit_event__target__id"),
+                name="audit_log_target_id_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="auditlogentry",
+            index=models.Index(
+                F("message__audit_event__target__type"),
+                name="audit_log_target_type_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="auditlogentry",
+            index=models.Index(
+                F("message__audit_event__actor__user_id"),
+                name="audit_log_actor_id_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="auditlogentry",
+            index=models.Index(
+                F("message__audit_event__operation"),
+                name="audit_log_operation_idx",
+            ),
+        ),
+    ]
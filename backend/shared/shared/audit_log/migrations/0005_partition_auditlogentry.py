@@ -0,0 +1,219 @@
+from datetime import datetime, timezone
+
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, transaction
+
+TABLE_NAME = "audit_log_auditlogentry"
+LEGACY_TABLE_NAME = "audit_log_auditlogentry_legacy"
+UNPARTITIONED_TABLE_NAME = "audit_log_auditlogentry_unpartitioned"
+SEQUENCE_NAME = f"{TABLE_NAME}_id_seq"
+PARTITION_MONTHS_AHEAD = 2
+# The existing entries are kept in the table, which becomes the partition of the entries
+# before the first monthly partition. Its bound is a few months ahead, so that the entries
+# written while the table is validated against it stay within it.
+LEGACY_PARTITION_MONTHS_AHEAD = 2
+LEGACY_PARTITION_CHECK_NAME = "audit_log_legacy_partition_check"
+
+
+def _get_month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _create_partition(execute, name: str, bound_sql: str, params=None):
+    execute(f'CREATE TABLE "{name}" PARTITION OF "{TABLE_NAME}" {bound_sql}', params)
+    # The primary key contains the partition key, so the ids are unique per partition
+    execute(f'CREATE UNIQUE INDEX "{name}_id_uniq" ON "{name}" (id)')
+
+
+def _get_sequence_state(cursor, table_name: str):
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f'"{table_name}"'])
+    (sequence_name,) = cursor.fetchone()
+    cursor.execute(f"SELECT last_value, is_called FROM {sequence_name}")
+    return cursor.fetchone()
+
+
+def partition_audit_log(apps, schema_editor):
+    """
+    Replace the audit log table with a table that is partitioned by month. The primary key
+    of a partitioned table must contain the partition key, so it is (id, created_at).
+
+    The existing table is attached as the partition of the entries before the first
+    monthly partition, so the entries are not copied. Migration 0004 has built its
+    indexes, and the constraint on its bound is validated here before the table is
+    locked, so attaching it neither builds indexes nor scans the table, and the table is
+    locked only briefly. A table without entries is dropped instead.
+
+    The migration is not atomic, so that the constraint is validated without blocking the
+    writes to the table. The table is swapped in a transaction.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    now = datetime.now(tz=timezone.utc)
+    legacy_partition_end = _get_month_start(now) + relativedelta(
+        months=LEGACY_PARTITION_MONTHS_AHEAD
+    )
+
+    # The constraint is added just before the table is attached, so that its bound is
+    # not reached before the table becomes a partition with the same bound
+    execute(
+        f'ALTER TABLE "{TABLE_NAME}"'
+        f" DROP CONSTRAINT IF EXISTS {LEGACY_PARTITION_CHECK_NAME}"
+    )
+    execute(
+        f'ALTER TABLE "{TABLE_NAME}" ADD CONSTRAINT {LEGACY_PARTITION_CHECK_NAME}'
+        " CHECK (created_at < %s) NOT VALID",
+        [legacy_partition_end],
+    )
+    execute(
+        f'ALTER TABLE "{TABLE_NAME}" VALIDATE CONSTRAINT {LEGACY_PARTITION_CHECK_NAME}'
+    )
+
+    with transaction.atomic(using=schema_editor.connection.alias):
+        _swap_audit_log_table(apps, schema_editor, now, legacy_partition_end)
+
+
+def _swap_audit_log_table(
+    apps, schema_editor, now: datetime, legacy_partition_end: datetime
+):
+    execute = schema_editor.execute
+    AuditLogEntry = apps.get_model("audit_log", "AuditLogEntry")
+    index_names = [index.name for index in AuditLogEntry._meta.indexes]
+
+    execute(f'LOCK TABLE "{TABLE_NAME}" IN ACCESS EXCLUSIVE MODE')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{TABLE_NAME}")')
+        (has_entries,) = cursor.fetchone()
+        last_value, is_called = _get_sequence_state(cursor, TABLE_NAME)
+
+    execute(f'ALTER TABLE "{TABLE_NAME}" RENAME TO "{LEGACY_TABLE_NAME}"')
+    execute(
+        f'ALTER TABLE "{LEGACY_TABLE_NAME}"'
+        f' RENAME CONSTRAINT "{TABLE_NAME}_pkey" TO "{LEGACY_TABLE_NAME}_pkey"'
+    )
+    for index_name in index_names:
+        execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"')
+    # The id sequence of the old table is replaced by the sequence of the new table
+    execute(
+        f'ALTER TABLE "{LEGACY_TABLE_NAME}" ALTER COLUMN id DROP IDENTITY IF EXISTS'
+    )
+    execute(f'ALTER TABLE "{LEGACY_TABLE_NAME}" ALTER COLUMN id DROP DEFAULT')
+    execute(f'DROP SEQUENCE IF EXISTS "{SEQUENCE_NAME}"')
+
+    execute(f'CREATE SEQUENCE "{SEQUENCE_NAME}"')
+    execute(
+        f"""
+        CREATE TABLE "{TABLE_NAME}" (
+            id integer NOT NULL DEFAULT nextval('{SEQUENCE_NAME}'),
+            is_sent boolean NOT NULL,
+            message jsonb NOT NULL,
+            created_at timestamp with time zone NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    execute(f'ALTER SEQUENCE "{SEQUENCE_NAME}" OWNED BY "{TABLE_NAME}".id')
+    execute(f"SELECT setval('{SEQUENCE_NAME}', %s, %s)", [last_value, is_called])
+    # The indexes of the partitioned table have no entries to index yet
+    for index in AuditLogEntry._meta.indexes:
+        schema_editor.add_index(AuditLogEntry, index)
+
+    if has_entries:
+        execute(
+            f'ALTER TABLE "{LEGACY_TABLE_NAME}" DROP CONSTRAINT "{LEGACY_TABLE_NAME}_pkey"'
+        )
+        execute(
+            f'ALTER TABLE "{LEGACY_TABLE_NAME}" ADD CONSTRAINT "{LEGACY_TABLE_NAME}_pkey"'
+            " PRIMARY KEY USING INDEX audit_log_id_created_at_uniq"
+        )
+        # The indexes of the table that match the indexes of the partitioned table are
+        # attached to them
+        execute(
+            f'ALTER TABLE "{TABLE_NAME}" ATTACH PARTITION "{LEGACY_TABLE_NAME}"'
+            " FOR VALUES FROM (MINVALUE) TO (%s)",
+            [legacy_partition_end],
+        )
+        execute(
+            f'ALTER TABLE "{LEGACY_TABLE_NAME}"'
+            f" DROP CONSTRAINT {LEGACY_PARTITION_CHECK_NAME}"
+        )
+        month = legacy_partition_end
+    else:
+        execute(f'DROP TABLE "{LEGACY_TABLE_NAME}"')
+        month = _get_month_start(now)
+
+    _create_partition(execute, f"{TABLE_NAME}_default", "DEFAULT")
+    last_month = _get_month_start(now) + relativedelta(months=PARTITION_MONTHS_AHEAD)
+    while month <= last_month:
+        next_month = month + relativedelta(months=1)
+        _create_partition(
+            execute,
+            f"{TABLE_NAME}_p{month:%Y_%m}",
+            "FOR VALUES FROM (%s) TO (%s)",
+            [month, next_month],
+        )
+        month = next_month
+
+
+def unpartition_audit_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with transaction.atomic(using=schema_editor.connection.alias):
+        _unswap_audit_log_table(apps, schema_editor)
+
+
+def _unswap_audit_log_table(apps, schema_editor):
+    execute = schema_editor.execute
+    AuditLogEntry = apps.get_model("audit_log", "AuditLogEntry")
+
+    with schema_editor.connection.cursor() as cursor:
+        last_value, is_called = _get_sequence_state(cursor, TABLE_NAME)
+    execute(f'ALTER TABLE "{TABLE_NAME}" RENAME TO "{UNPARTITIONED_TABLE_NAME}"')
+    execute(
+        f'ALTER TABLE "{UNPARTITIONED_TABLE_NAME}"'
+        f' RENAME CONSTRAINT "{TABLE_NAME}_pkey" TO "{UNPARTITIONED_TABLE_NAME}_pkey"'
+    )
+    execute(f'ALTER TABLE "{UNPARTITIONED_TABLE_NAME}" ALTER COLUMN id DROP DEFAULT')
+    execute(f'DROP SEQUENCE "{SEQUENCE_NAME}"')
+    for index in AuditLogEntry._meta.indexes:
+        execute(f'DROP INDEX IF EXISTS "{index.name}"')
+    execute(
+        f"""
+        CREATE TABLE "{TABLE_NAME}" (
+            id integer NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+            is_sent boolean NOT NULL,
+            message jsonb NOT NULL,
+            created_at timestamp with time zone NOT NULL
+        )
+        """
+    )
+    execute(
+        f'INSERT INTO "{TABLE_NAME}" (id, is_sent, message, created_at)'
+        f' SELECT id, is_sent, message, created_at FROM "{UNPARTITIONED_TABLE_NAME}"'
+    )
+    execute(f'DROP TABLE "{UNPARTITIONED_TABLE_NAME}"')
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{TABLE_NAME}\"', 'id'), %s, %s)",
+        [last_value, is_called],
+    )
+    for index in AuditLogEntry._meta.indexes:
+        schema_editor.add_index(AuditLogEntry, index)
+    # The indexes that migration 0004 builds for attaching the table as a partition
+    execute(
+        "CREATE UNIQUE INDEX audit_log_id_created_at_uniq"
+        f' ON "{TABLE_NAME}" (id, created_at)'
+    )
+    execute(f'CREATE UNIQUE INDEX audit_log_id_uniq ON "{TABLE_NAME}" (id)')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("audit_log", "0004_prepare_auditlogentry_partitioning"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+    ]
@@ -1,12 +1,43 @@
 from django.db import models
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
 
 class AuditLogEntry(models.Model):
+    """
+    In PostgreSQL the table is partitioned by created_at, see shared.audit_log.partitions.
+    """
+
     is_sent = models.BooleanField(default=False, verbose_name=_("is sent"))
     message = models.JSONField(verbose_name=_("message"))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
 
+    class Meta:
+        indexes = [
+            # the entries that are waiting to be sent to Elasticsearch
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_sent=False),
+                name="audit_log_unsent_idx",
+            ),
+            models.Index(
+                F("message__audit_event__target__id"),
+                name="audit_log_target_id_idx",
+            ),
+            models.Index(
+                F("message__audit_event__target__type"),
+                name="audit_log_target_type_idx",
+            ),
+            models.Index(
+                F("message__audit_event__actor__user_id"),
+                name="audit_log_actor_id_idx",
+            ),
+            models.Index(
+                F("message__audit_event__operation"),
+                name="audit_log_operation_idx",
+            ),
+        ]
+
     def __str__(self):
         return " ".join(
             [
@@ -0,0 +1,176 @@
+"""
+Monthly partitions of the AuditLogEntry table.
+
+The table is partitioned by created_at in PostgreSQL, one partition per month. Entries
+that do not fall into any monthly partition are stored in the default partition, and the
+entries from before the partitioning are stored in the legacy partition. The partitions
+are created ahead of time by the daily job, and the monthly cleanup drops the expired
+partitions instead of deleting their rows.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection, transaction
+from django.utils import timezone as django_timezone
+from django.utils.dateparse import parse_datetime
+
+from shared.audit_log.models import AuditLogEntry
+
+PARTITION_MONTHS_AHEAD = 2
+
+TABLE_NAME = AuditLogEntry._meta.db_table
+DEFAULT_PARTITION_NAME = f"{TABLE_NAME}_default"
+PARTITION_BOUND_RE = re.compile(r"^FOR VALUES FROM \((.+)\) TO \((.+)\)$")
+
+
+@dataclass
+class Partition:
+    name: str
+    # None for the legacy partition, which has no lower bound
+    start: Optional[datetime]
+    end: datetime
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return (self.start is None or self.start < end) and self.end > start
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value == "MINVALUE":
+        return None
+    return parse_datetime(value.strip("'"))
+
+
+def get_partition_name(month: datetime) -> str:
+    return f"{TABLE_NAME}_p{month:%Y_%m}"
+
+
+def get_month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [TABLE_NAME],
+        )
+        return cursor.fetchone() is not None
+
+
+def get_partitions() -> List[Partition]:
+    """
+    Return the range partitions, oldest first. The default partition is excluded.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = %s
+            """,
+            [TABLE_NAME],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        if match := PARTITION_BOUND_RE.match(bound):
+            partitions.append(
+                Partition(
+                    name, _parse_bound(match.group(1)), _parse_bound(match.group(2))
+                )
+            )
+    return sorted(
+        partitions,
+        key=lambda partition: (partition.start is not None, partition.start),
+    )
+
+
+def create_partition(month: datetime) -> Optional[str]:
+    """
+    Create the partition of the given month, unless the month is covered by an existing
+    partition already. The entries of the month that have been stored in the default
+    partition are moved to it.
+
+    :return: The name of the created partition, or None if the month has a partition.
+    """
+    start = get_month_start(month)
+    end = start + relativedelta(months=1)
+    name = get_partition_name(start)
+    if any(partition.overlaps(start, end) for partition in get_partitions()):
+        return None
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # A partition cannot be attached while the default partition contains entries
+        # that belong to it, so the new partition is filled before attaching it.
+        cursor.execute(
+            f'CREATE TABLE "{name}" (LIKE "{TABLE_NAME}" INCLUDING DEFAULTS)'
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM "{DEFAULT_PARTITION_NAME}"
+                WHERE created_at >= %s AND created_at < %s
+                RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        # The primary key contains the partition key, so the ids are unique per partition
+        cursor.execute(f'CREATE UNIQUE INDEX "{name}_id_uniq" ON "{name}" (id)')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE_NAME}" ATTACH PARTITION "{name}"'
+            " FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    return name
+
+
+def create_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the partitions of the current month and the given number of months after it.
+
+    :return: The names of the created partitions.
+    """
+    if not is_partitioned():
+        return []
+    current_month = get_month_start(django_timezone.now())
+    created = []
+    for months in range(months_ahead + 1):
+        if name := create_partition(current_month + relativedelta(months=months)):
+            created.append(name)
+    return created
+
+
+def drop_sent_partitions(before: datetime) -> int:
+    """
+    Drop the partitions that end before the given time, including the legacy partition,
+    if all of their entries have been sent to Elasticsearch.
+
+    :return: The number of entries in the dropped partitions.
+    """
+    if not is_partitioned():
+        return 0
+    dropped_count = 0
+    for partition in get_partitions():
+        if partition.end > before:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT EXISTS (SELECT 1 FROM "{partition.name}" WHERE NOT is_sent)'
+            )
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'SELECT COUNT(*) FROM "{partition.name}"')
+            dropped_count += cursor.fetchone()[0]
+            cursor.execute(f'DROP TABLE "{partition.name}"')
+    return dropped_count
@@ -1,21 +1,25 @@
 import logging
+import time
 from datetime import timedelta
+from typing import Iterable, List, Optional, Set
 
 from django.conf import settings
 from django.utils import timezone
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, TransportError
 
 from shared.audit_log.models import AuditLogEntry
+from shared.audit_log.partitions import drop_sent_partitions
 
 ES_STATUS_CREATED = "created"
+ES_STATUS_CONFLICT = 409
+BULK_CHUNK_SIZE = 500
 LOGGER = logging.getLogger(__name__)
 
 
-def send_audit_log_to_elastic_search() -> int:
+def get_elastic_search_client() -> Optional[Elasticsearch]:
     """
-    Send AuditLogEntry to Elasticsearch.
-
-    :return: The number of AuditLogEntry objects sent to Elasticsearch.
+    Return an Elasticsearch client for the audit log, or None if the connection has not
+    been configured.
     """
     if not (
         settings.ELASTICSEARCH_HOST
@@ -24,11 +28,8 @@ def send_audit_log_to_elastic_search() -> int:
         and settings.ELASTICSEARCH_USERNAME
         and settings.ELASTICSEARCH_PASSWORD
     ):
-        LOGGER.warning(
-            "Trying to send audit log to Elasticsearch without proper configuration, process skipped"
-        )
-        return 0
-    es = Elasticsearch(
+        return None
+    return Elasticsearch(
         [
             {
                 "host": settings.ELASTICSEARCH_HOST,
@@ -38,25 +39,102 @@ def send_audit_log_to_elastic_search() -> int:
         ],
         http_auth=(settings.ELASTICSEARCH_USERNAME, settings.ELASTICSEARCH_PASSWORD),
     )
-    entries = AuditLogEntry.objects.filter(is_sent=False).order_by("created_at")
-    sent_entries_count = 0
 
+
+def _get_bulk_actions(entries: Iterable[AuditLogEntry]) -> List[dict]:
+    actions = []
     for entry in entries:
         message_body = entry.message.copy()
         message_body["@timestamp"] = entry.message["audit_event"][
             "date_time"
         ]  # required by ES
-        rs = es.index(
-            index=settings.ELASTICSEARCH_APP_AUDIT_LOG_INDEX,
-            id=entry.id,
-            body=message_body,
-            op_type="create",
+        actions.append({"create": {"_id": entry.id}})
+        actions.append(message_body)
+    return actions
+
+
+def _get_acknowledged_ids(response: dict) -> Set[int]:
+    """
+    Return the ids of the entries that are stored in Elasticsearch according to the bulk
+    response. An entry that already exists has been sent before, but marking it as sent
+    has failed, so it is acknowledged too.
+    """
+    acknowledged_ids = set()
+    for item in response["items"]:
+        result = item["create"]
+        if (
+            result.get("result") == ES_STATUS_CREATED
+            or result.get("status") == ES_STATUS_CONFLICT
+        ):
+            acknowledged_ids.add(int(result["_id"]))
+        else:
+            LOGGER.warning(
+                f"Sending audit log entry {result.get('_id')} to Elasticsearch failed:"
+                f" {result.get('status')} {result.get('error')}"
+            )
+    return acknowledged_ids
+
+
+def send_audit_log_to_elastic_search(
+    es: Optional[Elasticsearch] = None, chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """
+    Send AuditLogEntry to Elasticsearch.
+
+    The unsent entries are sent in the order of their ids with the bulk API, chunk_size
+    entries per request. The acknowledged entries of a chunk are marked as sent before the
+    next chunk is sent, so an interrupted run is resumed from the first unsent entry by
+    the next run. The entries that Elasticsearch rejects are left unsent and retried by
+    the next run. If Elasticsearch cannot be reached, the run is stopped.
+
+    :return: The number of AuditLogEntry objects sent to Elasticsearch.
+    """
+    if es is None:
+        es = get_elastic_search_client()
+    if es is None:
+        LOGGER.warning(
+            "Trying to send audit log to Elasticsearch without proper configuration, process skipped"
         )
-        if rs.get("result") == ES_STATUS_CREATED:
-            entry.is_sent = True
-            entry.save()
-            sent_entries_count += 1
+        return 0
 
+    sent_entries_count = 0
+    failed_entries_count = 0
+    # the high-water mark of this run, the entries up to it have been sent or rejected
+    last_id = 0
+    start_time = time.monotonic()
+
+    while True:
+        entries = list(
+            AuditLogEntry.objects.filter(is_sent=False, id__gt=last_id).order_by("id")[
+                :chunk_size
+            ]
+        )
+        if not entries:
+            break
+        try:
+            response = es.bulk(
+                body=_get_bulk_actions(entries),
+                index=settings.ELASTICSEARCH_APP_AUDIT_LOG_INDEX,
+            )
+        except TransportError:
+            LOGGER.exception(
+                f"Sending audit log entries after id {last_id} to Elasticsearch failed,"
+                " stopping until the next run"
+            )
+            break
+        acknowledged_ids = _get_acknowledged_ids(response)
+        AuditLogEntry.objects.filter(id__in=acknowledged_ids).update(is_sent=True)
+        sent_entries_count += len(acknowledged_ids)
+        failed_entries_count += len(entries) - len(acknowledged_ids)
+        last_id = entries[-1].id
+
+    elapsed = time.monotonic() - start_time
+    if sent_entries_count or failed_entries_count:
+        LOGGER.info(
+            f"Sent {sent_entries_count} audit log entries to Elasticsearch in"
+            f" {elapsed:.1f} s ({sent_entries_count / max(elapsed, 0.001):.0f} entries/s),"
+            f" {failed_entries_count} entries failed"
+        )
     return sent_entries_count
 
 
@@ -65,11 +143,14 @@ def clear_audit_log_entries(days_to_keep=30) -> int:
     Delete AuditLogEntry entries that have been sent to Elasticsearch and are older than
     `days_to_keep` days.
 
+    The monthly partitions that only contain such entries are dropped as a whole, the rest
+    of the entries are deleted row by row.
+
     :return: The number of deleted AuditLogEntry objects
     """
     # Only remove entries older than `X` days
-    sent_entries = AuditLogEntry.objects.filter(
-        is_sent=True, created_at__lte=(timezone.now() - timedelta(days=days_to_keep))
-    )
+    cutoff = timezone.now() - timedelta(days=days_to_keep)
+    dropped_count = drop_sent_partitions(cutoff)
+    sent_entries = AuditLogEntry.objects.filter(is_sent=True, created_at__lte=cutoff)
     deleted_count, _ = sent_entries.delete()
-    return deleted_count
+    return dropped_count + deleted_count
@@ -1,6 +1,10 @@
+import json
+import threading
 from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Callable
 
+from elasticsearch import Elasticsearch
 from pytest import fixture
 
 from shared.common.tests.conftest import *  # noqa
@@ -9,3 +13,87 @@ from shared.common.tests.conftest import *  # noqa
 @fixture
 def fixed_datetime() -> Callable[[], datetime]:
     return lambda: datetime(2020, 6, 1, tzinfo=timezone.utc)
+
+
+class FakeElasticSearch(ThreadingHTTPServer):
+    """
+    A local HTTP server that implements the parts of the Elasticsearch API that are used
+    for sending the audit log.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeElasticSearchHandler)
+        self.documents = {}
+        self.bulk_requests = []
+        self.rejected_ids = set()
+        # the numbers of the bulk requests, starting from 1, that fail as a whole
+        self.failing_requests = set()
+        self.client = Elasticsearch(
+            [f"http://127.0.0.1:{self.server_port}"], max_retries=0
+        )
+
+
+class FakeElasticSearchHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(
+            200, {"version": {"number": "7.17.9", "build_flavor": "default"}}
+        )
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers["Content-Length"])
+        lines = [
+            json.loads(line)
+            for line in self.rfile.read(length).decode().splitlines()
+            if line
+        ]
+        operations = list(zip(lines[::2], lines[1::2]))
+        server.bulk_requests.append(operations)
+        if len(server.bulk_requests) in server.failing_requests:
+            self._send_json(500, {"error": "internal error", "status": 500})
+            return
+
+        items = []
+        for action, document in operations:
+            document_id = str(action["create"]["_id"])
+            if document_id in server.rejected_ids:
+                result = {"status": 400, "error": {"type": "mapper_parsing_exception"}}
+            elif document_id in server.documents:
+                result = {
+                    "status": 409,
+                    "error": {"type": "version_conflict_engine_exception"},
+                }
+            else:
+                server.documents[document_id] = document
+                result = {"status": 201, "result": "created"}
+            items.append({"create": {"_id": document_id, **result}})
+        self._send_json(
+            200,
+            {
+                "took": 1,
+                "errors": any("error" in i["create"] for i in items),
+                "items": items,
+            },
+        )
+
+
+@fixture
+def fake_elastic_search():
+    server = FakeElasticSearch()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
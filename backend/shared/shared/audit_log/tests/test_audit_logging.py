@@ -3,6 +3,7 @@ from unittest import mock
 
 import pytest
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
 from django.test import override_settings
 from django.utils.timezone import now
 
@@ -300,6 +301,71 @@ def test_log_user_with_backend(user, fixed_datetime):
     }
 
 
+@pytest.mark.django_db
+def test_buffered_log(user, fixed_datetime, django_assert_num_queries):
+    with audit_logging.buffered():
+        with django_assert_num_queries(0):
+            for operation in [Operation.READ, Operation.UPDATE, Operation.DELETE]:
+                audit_logging.log(user, "", operation, user, get_time=fixed_datetime)
+        assert not AuditLogEntry.objects.exists()
+
+    assert [
+        entry.message["audit_event"]["operation"]
+        for entry in AuditLogEntry.objects.order_by("id")
+    ] == ["READ", "UPDATE", "DELETE"]
+
+
+@pytest.mark.django_db
+def test_buffered_log_is_saved_with_one_query(
+    user, fixed_datetime, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        with audit_logging.buffered():
+            for _ in range(3):
+                audit_logging.log(user, "", Operation.READ, user)
+
+    assert AuditLogEntry.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_buffered_log_is_discarded_on_error(user):
+    with audit_logging.buffered():
+        audit_logging.log(user, "", Operation.READ, user)
+        with pytest.raises(ValueError):
+            with audit_logging.buffered():
+                audit_logging.log(user, "", Operation.UPDATE, user)
+                raise ValueError()
+
+    assert [
+        entry.message["audit_event"]["operation"]
+        for entry in AuditLogEntry.objects.all()
+    ] == ["READ"]
+
+    with pytest.raises(ValueError):
+        with audit_logging.buffered():
+            audit_logging.log(user, "", Operation.DELETE, user)
+            raise ValueError()
+
+    assert AuditLogEntry.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_buffered_log_of_rolled_back_atomic_block_is_discarded(user):
+    with transaction.atomic(), audit_logging.buffered():
+        audit_logging.log(user, "", Operation.READ, user)
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                audit_logging.log(user, "", Operation.UPDATE, user)
+                raise ValueError()
+        with transaction.atomic():
+            audit_logging.log(user, "", Operation.DELETE, user)
+
+    assert sorted(
+        entry.message["audit_event"]["operation"]
+        for entry in AuditLogEntry.objects.all()
+    ) == ["DELETE", "READ"]
+
+
 @pytest.mark.django_db
 @override_settings(
     ENABLE_SEND_AUDIT_LOG=True,
@@ -321,6 +387,19 @@ def test_send_audit_log_missing_configuration(user, fixed_datetime):
     assert sent_entries_count == 0
 
 
+def _log_entries(user, fixed_datetime, count):
+    for _ in range(count):
+        audit_logging.log(
+            user,
+            "shared.oidc.auth.HelsinkiOIDCAuthenticationBackend",
+            Operation.READ,
+            user,
+            get_time=fixed_datetime,
+            ip_address="192.168.1.1",
+        )
+    return list(AuditLogEntry.objects.order_by("id").values_list("id", flat=True))
+
+
 @pytest.mark.parametrize(
     "result_value, expected_status",
     [("created", True), ("failed", False)],  # Log sent successfully
@@ -334,24 +413,83 @@ def test_send_audit_log_missing_configuration(user, fixed_datetime):
     ENABLE_SEND_AUDIT_LOG=True,
 )
 def test_send_audit_log_success(user, fixed_datetime, result_value, expected_status):
-    audit_logging.log(
-        user,
-        "shared.oidc.auth.HelsinkiOIDCAuthenticationBackend",
-        Operation.READ,
-        user,
-        get_time=fixed_datetime,
-        ip_address="192.168.1.1",
-    )
-    assert AuditLogEntry.objects.count() == 1
+    [entry_id] = _log_entries(user, fixed_datetime, 1)
     assert AuditLogEntry.objects.first().is_sent is False
 
-    with mock.patch("elasticsearch.Elasticsearch.index") as elasticsearch_index_mock:
-        elasticsearch_index_mock.return_value = {"result": result_value}
+    with mock.patch("elasticsearch.Elasticsearch.bulk") as elasticsearch_bulk_mock:
+        elasticsearch_bulk_mock.return_value = {
+            "items": [{"create": {"_id": str(entry_id), "result": result_value}}]
+        }
         sent_entries_count = send_audit_log_to_elastic_search()
         assert AuditLogEntry.objects.first().is_sent == expected_status
         assert sent_entries_count == (1 if expected_status else 0)
 
 
+@pytest.mark.django_db
+def test_send_audit_log_in_chunks(user, fixed_datetime, fake_elastic_search):
+    entry_ids = _log_entries(user, fixed_datetime, 5)
+
+    sent_entries_count = send_audit_log_to_elastic_search(
+        fake_elastic_search.client, chunk_size=2
+    )
+
+    assert sent_entries_count == 5
+    assert not AuditLogEntry.objects.filter(is_sent=False).exists()
+    assert [len(request) for request in fake_elastic_search.bulk_requests] == [2, 2, 1]
+    assert list(fake_elastic_search.documents) == [str(i) for i in entry_ids]
+    document = fake_elastic_search.documents[str(entry_ids[0])]
+    assert document["@timestamp"] == "2020-06-01T00:00:00.000Z"
+    assert document["audit_event"]["operation"] == "READ"
+
+    # nothing is left to send
+    assert send_audit_log_to_elastic_search(fake_elastic_search.client) == 0
+    assert len(fake_elastic_search.bulk_requests) == 3
+
+
+@pytest.mark.django_db
+def test_send_audit_log_partial_failure(user, fixed_datetime, fake_elastic_search):
+    entry_ids = _log_entries(user, fixed_datetime, 4)
+    fake_elastic_search.rejected_ids.add(str(entry_ids[1]))
+    # sent before, but marking the entry as sent did not succeed
+    fake_elastic_search.documents[str(entry_ids[2])] = {}
+
+    sent_entries_count = send_audit_log_to_elastic_search(
+        fake_elastic_search.client, chunk_size=2
+    )
+
+    assert sent_entries_count == 3
+    assert list(
+        AuditLogEntry.objects.filter(is_sent=False).values_list("id", flat=True)
+    ) == [entry_ids[1]]
+
+    # the rejected entry is retried on the next run
+    fake_elastic_search.rejected_ids.clear()
+    assert send_audit_log_to_elastic_search(fake_elastic_search.client) == 1
+    assert not AuditLogEntry.objects.filter(is_sent=False).exists()
+
+
+@pytest.mark.django_db
+def test_send_audit_log_resumes_after_error(user, fixed_datetime, fake_elastic_search):
+    entry_ids = _log_entries(user, fixed_datetime, 5)
+    fake_elastic_search.failing_requests = {2}
+
+    sent_entries_count = send_audit_log_to_elastic_search(
+        fake_elastic_search.client, chunk_size=2
+    )
+
+    # the run stops at the failed chunk, the first chunk stays sent
+    assert sent_entries_count == 2
+    assert (
+        list(AuditLogEntry.objects.filter(is_sent=False).values_list("id", flat=True))
+        == entry_ids[2:]
+    )
+
+    assert (
+        send_audit_log_to_elastic_search(fake_elastic_search.client, chunk_size=2) == 3
+    )
+    assert list(fake_elastic_search.documents) == [str(i) for i in entry_ids]
+
+
 @pytest.mark.django_db
 @override_settings(CLEAR_AUDIT_LOG_ENTRIES=True)
 def test_clear_audit_log(user, fixed_datetime):
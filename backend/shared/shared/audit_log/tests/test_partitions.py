@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.utils.timezone import now
+
+from shared.audit_log.models import AuditLogEntry
+from shared.audit_log.partitions import (
+    create_partition,
+    create_partitions,
+    get_month_start,
+    get_partitions,
+    is_partitioned,
+)
+from shared.audit_log.tasks import clear_audit_log_entries
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="Partitioning requires PostgreSQL"
+    ),
+]
+
+
+def _create_entry(created_at: datetime, is_sent: bool = True) -> AuditLogEntry:
+    entry = AuditLogEntry.objects.create(message={}, is_sent=is_sent)
+    AuditLogEntry.objects.filter(pk=entry.pk).update(created_at=created_at)
+    return entry
+
+
+def _get_partition_entry_ids(partition_name: str) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM "{partition_name}" ORDER BY id')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _get_partition_names() -> list:
+    return [partition.name for partition in get_partitions()]
+
+
+def test_audit_log_is_partitioned():
+    assert is_partitioned()
+    current_month = get_month_start(now())
+    assert f"audit_log_auditlogentry_p{current_month:%Y_%m}" in _get_partition_names()
+
+
+def test_create_partitions_ahead():
+    current_month = get_month_start(now())
+
+    assert create_partitions() == []
+
+    created = create_partitions(months_ahead=3)
+
+    last_month = current_month + relativedelta(months=3)
+    assert created == [f"audit_log_auditlogentry_p{last_month:%Y_%m}"]
+    assert get_partitions()[-1].start == last_month
+
+
+def test_create_partition_moves_entries_from_default_partition():
+    march_entry = _create_entry(datetime(2019, 3, 15, tzinfo=timezone.utc))
+    april_entry = _create_entry(datetime(2019, 4, 1, tzinfo=timezone.utc))
+    assert _get_partition_entry_ids("audit_log_auditlogentry_default") == [
+        march_entry.pk,
+        april_entry.pk,
+    ]
+
+    name = create_partition(datetime(2019, 3, 31, tzinfo=timezone.utc))
+
+    assert name == "audit_log_auditlogentry_p2019_03"
+    assert create_partition(datetime(2019, 3, 1, tzinfo=timezone.utc)) is None
+    assert _get_partition_entry_ids(name) == [march_entry.pk]
+    assert _get_partition_entry_ids("audit_log_auditlogentry_default") == [
+        april_entry.pk
+    ]
+    # new entries of the month are stored in the partition
+    new_entry = _create_entry(datetime(2019, 3, 1, tzinfo=timezone.utc))
+    assert _get_partition_entry_ids(name) == [march_entry.pk, new_entry.pk]
+
+
+def test_partition_without_lower_bound():
+    # the entries from before the partitioning are kept in a partition without a lower bound
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE audit_log_auditlogentry_legacy"
+            " (LIKE audit_log_auditlogentry INCLUDING DEFAULTS)"
+        )
+        cursor.execute(
+            "ALTER TABLE audit_log_auditlogentry ATTACH PARTITION"
+            " audit_log_auditlogentry_legacy FOR VALUES FROM (MINVALUE) TO (%s)",
+            [datetime(2019, 3, 1, tzinfo=timezone.utc)],
+        )
+    entry = _create_entry(datetime(2019, 2, 1, tzinfo=timezone.utc))
+
+    legacy_partition = get_partitions()[0]
+    assert legacy_partition.name == "audit_log_auditlogentry_legacy"
+    assert legacy_partition.start is None
+    assert legacy_partition.end == datetime(2019, 3, 1, tzinfo=timezone.utc)
+    assert _get_partition_entry_ids(legacy_partition.name) == [entry.pk]
+    assert create_partition(datetime(2019, 2, 1, tzinfo=timezone.utc)) is None
+    assert create_partition(datetime(2019, 3, 1, tzinfo=timezone.utc))
+
+    assert clear_audit_log_entries() == 1
+
+    assert "audit_log_auditlogentry_legacy" not in _get_partition_names()
+
+
+def test_clear_audit_log_drops_sent_partitions():
+    create_partition(datetime(2019, 3, 1, tzinfo=timezone.utc))
+    create_partition(datetime(2019, 4, 1, tzinfo=timezone.utc))
+    _create_entry(datetime(2019, 3, 1, tzinfo=timezone.utc))
+    _create_entry(datetime(2019, 3, 31, tzinfo=timezone.utc))
+    _create_entry(datetime(2019, 4, 1, tzinfo=timezone.utc))
+    unsent_entry = _create_entry(datetime(2019, 4, 2, tzinfo=timezone.utc), False)
+    _create_entry(now() - timedelta(days=35))
+    new_entry = _create_entry(now())
+
+    assert clear_audit_log_entries() == 4
+
+    # the partition with an unsent entry is kept
+    assert "audit_log_auditlogentry_p2019_03" not in _get_partition_names()
+    assert "audit_log_auditlogentry_p2019_04" in _get_partition_names()
+    assert set(AuditLogEntry.objects.values_list("id", flat=True)) == {
+        unsent_entry.pk,
+        new_entry.pk,
+    }
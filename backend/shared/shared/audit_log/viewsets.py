@@ -26,6 +26,12 @@ class AuditLoggingModelViewSet(ModelViewSet):
         "DELETE": Operation.DELETE,
     }
     created_instance: Optional[Model] = None
+    # The object of the request, as loaded by get_object()
+    fetched_instance: Optional[Model] = None
+
+    def get_object(self):
+        self.fetched_instance = super().get_object()
+        return self.fetched_instance
 
     def permission_denied(self, request, message=None, code=None):
         self._log_permission_denied()
@@ -88,13 +94,18 @@ class AuditLoggingModelViewSet(ModelViewSet):
         This context manager will run the managed code in a transaction and writes
         a new audit log entry in the same transaction. If an exception is raised,
         the transaction will be rolled back. If the user has no permission to perform
-        the given action, a "FORBIDDEN" audit log event will be recorded.
+        the given action, a "FORBIDDEN" audit log event will be recorded. The audit log
+        entries written in the managed code are buffered and saved with one query at
+        the end of the transaction. The changes of an updated object are compared with
+        its state before the update, so its history does not need to be queried.
         """
         actor = copy(self._get_actor())  # May be destroyed if actor is also the target
         actor_backend = self._get_actor_backend()
         operation = self._get_operation()
         try:
-            with transaction.atomic():
+            with transaction.atomic(), audit_logging.buffered():
+                if self.fetched_instance is not None and operation == Operation.UPDATE:
+                    audit_logging.remember_history_state(self.fetched_instance)
                 yield
                 audit_logging.log(
                     actor,
@@ -127,11 +138,18 @@ class AuditLoggingModelViewSet(ModelViewSet):
 
     def _get_target(self) -> Optional[Union[Model, ModelBase]]:
         return (
-            self._get_target_object()
+            self._get_fetched_instance()
+            or self._get_target_object()
             or self.created_instance
             or self._unfiltered_queryset().model
         )
 
+    def _get_fetched_instance(self) -> Optional[Model]:
+        # A deleted instance no longer identifies the target
+        if self.fetched_instance is not None and self.fetched_instance.pk is not None:
+            return self.fetched_instance
+        return None
+
     def _get_target_object(self):
         lookup_value = self.kwargs.get(self.lookup_field, None)
         if lookup_value is not None:
@@ -1,12 +1,19 @@
+import threading
 from typing import Optional
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 
 class ServiceBusClient:
     UNKNOWN_INDUSTRY = "n/a"
 
+    # The maximum number of connections kept alive in the pool of the shared session
+    POOL_MAXSIZE = 10
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
     def __init__(self):
         if not all(
             [
@@ -50,8 +57,22 @@ class ServiceBusClient:
             return self._format_search_results(search_results)
         return []
 
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """
+        Return the session shared by all the clients, so that the connections to the
+        Service Bus API are kept alive and reused between the requests.
+        """
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=cls.POOL_MAXSIZE)
+                cls._session.mount("https://", adapter)
+                cls._session.mount("http://", adapter)
+            return cls._session
+
     def _post(self, url: str, data: dict) -> dict:
-        response = requests.post(
+        response = self.get_session().post(
             url,
             auth=self.credentials,
             timeout=settings.SERVICE_BUS_TIMEOUT,
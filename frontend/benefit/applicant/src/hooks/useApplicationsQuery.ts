@@ -1,5 +1,8 @@
 import { BackendEndpoint } from 'benefit-shared/backend-api/backend-api';
-import { ApplicationData } from 'benefit-shared/types/application';
+import {
+  ApplicationData,
+  ApplicationListPage,
+} from 'benefit-shared/types/application';
 import { useQuery, UseQueryResult } from 'react-query';
 import useBackendAPI from 'shared/hooks/useBackendAPI';
 
@@ -17,17 +20,28 @@ const useApplicationsQuery = ({
   return useQuery<ApplicationData[], Error>(
     ['applicationsList', ...status, orderBy, isArchived ? '1' : '0'],
     async () => {
-      const res = axios.get<ApplicationData[]>(
-        `${BackendEndpoint.APPLICATIONS_SIMPLIFIED}`,
-        {
-          params: {
-            status: status.join(','),
-            archived_for_applicant: isArchived ?? undefined,
-            order_by: orderBy,
-          },
-        }
-      );
-      return handleResponse(res);
+      const params = {
+        status: status.join(','),
+        archived_for_applicant: isArchived ?? undefined,
+        order_by: orderBy,
+      };
+      // The applications are returned in pages, which are fetched until the last one
+      const applications: ApplicationData[] = [];
+      let cursor: string | null = null;
+      do {
+        // eslint-disable-next-line no-await-in-loop
+        const page: ApplicationListPage = await handleResponse(
+          axios.get<ApplicationListPage>(
+            `${BackendEndpoint.APPLICATIONS_SIMPLIFIED}`,
+            {
+              params: { ...params, ...(cursor && { cursor }) },
+            }
+          )
+        );
+        applications.push(...page.results);
+        cursor = page.next;
+      } while (cursor);
+      return applications;
     },
     {
       retry: false,
@@ -11,11 +11,20 @@ import { getBackendDomain, getFrontendUrl } from '../utils/url.utils';
 
 const url = getFrontendUrl('/archive');
 
+// The simplified list is returned in pages
+const toListPage = <T>(
+  results: T[]
+): { count: number; next: null; results: T[] } => ({
+  count: results.length,
+  next: null,
+  results,
+});
+
 const mockHook = RequestMock()
   .onRequestTo(
     `${getBackendDomain()}/v1/handlerapplications/simplified_list/?status=accepted,rejected,cancelled&order_by=-handled_at&filter_archived=1`
   )
-  .respond(jsonArchivedList);
+  .respond(toListPage(jsonArchivedList));
 
 fixture('Archive')
   .page(url)
@@ -29,25 +29,34 @@ const status = {
   received: ['received'],
   infoNeeded: ['additional_information_needed'],
 };
+// The simplified list is returned in pages
+const toListPage = <T>(
+  results: T[]
+): { count: number; next: null; results: T[] } => ({
+  count: results.length,
+  next: null,
+  results,
+});
+
 const mockHook = RequestMock()
   .onRequestTo(
     `${getBackendDomain()}/v1/handlerapplications/simplified_list/?status=${status.all.join(
       ','
     )}&order_by=-submitted_at&exclude_batched=1`
   )
-  .respond(jsonInProgressApplication)
+  .respond(toListPage(jsonInProgressApplication))
   .onRequestTo(
     `${getBackendDomain()}/v1/handlerapplications/simplified_list/?status=${status.received.join(
       ','
     )}&order_by=-submitted_at`
   )
-  .respond(jsonReceivedApplication)
+  .respond(toListPage(jsonReceivedApplication))
   .onRequestTo(
     `${getBackendDomain()}/v1/handlerapplications/simplified_list/?status=${status.infoNeeded.join(
       ','
     )}&order_by=-submitted_at`
   )
-  .respond(jsonInfoNeededApplication)
+  .respond(toListPage(jsonInfoNeededApplication))
   .onRequestTo(`${getBackendDomain()}/v1/handlerapplications/${applicationId}/`)
   .respond((_, res) => {
     res.setBody(responseReceivedApplication);
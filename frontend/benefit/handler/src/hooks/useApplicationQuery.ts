@@ -14,7 +14,9 @@ const useApplicationQuery = (
       !id
         ? Promise.reject(new Error('Missing application id'))
         : handleResponse<ApplicationData>(
-            axios.get(`${BackendEndpoint.HANDLER_APPLICATIONS}${id}/`)
+            axios.get(`${BackendEndpoint.HANDLER_APPLICATIONS}${id}/`, {
+              params: { include: 'changes' },
+            })
           ),
     {
       enabled: Boolean(id),
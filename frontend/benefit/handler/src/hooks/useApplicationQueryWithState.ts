@@ -19,7 +19,9 @@ const useApplicationQueryWithState = (
       !id
         ? Promise.reject(new Error('Missing application id'))
         : handleResponse<ApplicationData>(
-            axios.get(`${BackendEndpoint.HANDLER_APPLICATIONS}${id}/`)
+            axios.get(`${BackendEndpoint.HANDLER_APPLICATIONS}${id}/`, {
+              params: { include: 'changes' },
+            })
           ),
     {
       onSuccess: (data) => {
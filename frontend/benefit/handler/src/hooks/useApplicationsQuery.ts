@@ -1,5 +1,8 @@
 import { BackendEndpoint } from 'benefit-shared/backend-api/backend-api';
-import { ApplicationData } from 'benefit-shared/types/application';
+import {
+  ApplicationData,
+  ApplicationListPage,
+} from 'benefit-shared/types/application';
 import { useTranslation } from 'next-i18next';
 import { useQuery, UseQueryResult } from 'react-query';
 import showErrorToast from 'shared/components/toast/show-error-toast';
@@ -47,13 +50,23 @@ const useApplicationsQuery = (
   return useQuery<ApplicationData[], Error>(
     ['applicationsList', ...status],
     async () => {
-      const res = axios.get<ApplicationData[]>(
-        `${BackendEndpoint.HANDLER_APPLICATIONS_SIMPLIFIED}`,
-        {
-          params,
-        }
-      );
-      return handleResponse(res);
+      // The applications are returned in pages, which are fetched until the last one
+      const applications: ApplicationData[] = [];
+      let cursor: string | null = null;
+      do {
+        // eslint-disable-next-line no-await-in-loop
+        const page: ApplicationListPage = await handleResponse(
+          axios.get<ApplicationListPage>(
+            `${BackendEndpoint.HANDLER_APPLICATIONS_SIMPLIFIED}`,
+            {
+              params: { ...params, ...(cursor && { cursor }) },
+            }
+          )
+        );
+        applications.push(...page.results);
+        cursor = page.next;
+      } while (cursor);
+      return applications;
     },
     {
       onError: () => handleError(),
@@ -37,10 +37,25 @@ const useSearchApplicationQuery = (
   return useMutation<SearchResponse, Error>(
     ['applicationsList'],
     async () => {
-      const res = axios.get<SearchResponse>(`${BackendEndpoint.SEARCH}`, {
-        params,
-      });
-      return handleResponse(res);
+      // The matches are returned in pages, which are fetched until the last one
+      const response = await handleResponse(
+        axios.get<SearchResponse>(`${BackendEndpoint.SEARCH}`, {
+          params,
+        })
+      );
+      const matches = [...response.matches];
+      let { next } = response;
+      while (next) {
+        // eslint-disable-next-line no-await-in-loop
+        const page = await handleResponse(
+          axios.get<SearchResponse>(`${BackendEndpoint.SEARCH}`, {
+            params: { ...params, cursor: next },
+          })
+        );
+        matches.push(...page.matches);
+        next = page.next;
+      }
+      return { ...response, matches, next: null };
     },
     {
       onError: () => handleError(),
@@ -6,4 +6,5 @@ export interface SearchResponse {
   filter: string;
   search_mode: string;
   count: number;
+  next: string | null;
 }
@@ -522,6 +522,12 @@ export type Company = {
   organizationType: ORGANIZATION_TYPES;
 };
 
+export type ApplicationListPage = {
+  count: number;
+  next: string | null;
+  results: ApplicationData[];
+};
+
 export type ApplicationListItemData = {
   id: string;
   name?: string;